@@ -0,0 +1,100 @@
+# --------------------
+# Rerun payload / render benchmark for the heavy tabs
+#
+# Drives the app headlessly with Streamlit's AppTest and reports, per scenario, how many
+# elements a rerun sends, their serialized size (what goes over the websocket) and how
+# long the rerun takes on the server.
+#
+# Usage:
+#   python bench_render.py SLEEPER_USERNAME [--league "League Name"] [--runs 5]
+# --------------------
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from sleeper_client import get_json
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trade_calculator_multiplayer_test.py")
+
+
+def walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from walk(child)
+
+
+def payload(at):
+    """
+    (element count, serialized bytes) of everything the last rerun rendered.
+    """
+    elements = [node for node in walk(at._tree) if getattr(node, "proto", None) is not None]
+    return len(elements), sum(node.proto.ByteSize() for node in elements)
+
+
+def roster_player_ids(username, league_name):
+    """
+    The user's rostered Sleeper ids in the selected league (the multiselect's raw option values).
+    """
+    user = get_json(f"https://api.sleeper.app/v1/user/{username}")
+    leagues = get_json(f"https://api.sleeper.app/v1/user/{user['user_id']}/leagues/nfl/2025") or []
+    league = next(lg for lg in leagues if lg["name"] == league_name)
+    rosters = get_json(f"https://api.sleeper.app/v1/league/{league['league_id']}/rosters") or []
+    return [pid for r in rosters if r.get("owner_id") == user["user_id"] for pid in r.get("players") or []]
+
+
+def timed_run(widget_action):
+    started = time.perf_counter()
+    widget_action.run()
+    return time.perf_counter() - started
+
+
+def bench(username, league=None, runs=5, timeout=300):
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    at.sidebar.text_input[0].input(username).run()
+    if league:
+        at.sidebar.selectbox[0].set_value(league).run()
+
+    results = []
+
+    def scenario(name, action):
+        times = [timed_run(action()) for _ in range(runs)]
+        elements, size = payload(at)
+        errors = [e.value for e in at.exception]
+        results.append({
+            "scenario": name,
+            "elements": elements,
+            "payload_kb": round(size / 1024, 1),
+            "median_ms": round(statistics.median(times) * 1000),
+            "errors": len(errors),
+        })
+
+    scenario("Roster Overview", lambda: at.radio(key="tab_picker").set_value("Roster Overview"))
+    scenario("Trade Away", lambda: at.radio(key="tab_picker").set_value("Trade Away"))
+    picker = next((m for m in at.multiselect if m.label == "Players to trade away"), None)
+    if picker is not None:
+        options = set(picker.options)
+        choices = [pid for pid in roster_player_ids(username, at.sidebar.selectbox[0].value) if picker.format_func(pid) in options]
+        if choices:
+            top = min(choices, key=lambda pid: picker.options.index(picker.format_func(pid)))
+            scenario(f"Trade Away + {picker.format_func(top)}", lambda: picker.set_value([top]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure rerun payload size and time for the heavy tabs.")
+    parser.add_argument("username")
+    parser.add_argument("--league", help="league name (defaults to the first one)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<40} {'elements':>8} {'payload KB':>10} {'median ms':>9} {'errors':>6}")
+    for row in bench(args.username, args.league, args.runs):
+        print(f"{row['scenario'][:40]:<40} {row['elements']:>8} {row['payload_kb']:>10} {row['median_ms']:>9} {row['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
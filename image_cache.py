@@ -0,0 +1,158 @@
+# --------------------
+# Local thumbnail cache for player headshots and team avatars
+#
+# Each image is downloaded from the CDN once, shrunk to a thumbnail and kept on disk
+# under image_cache/. The app inlines thumbnails as base64 data URIs, so a rerun never
+# sends the browser back to sleepercdn.com. The directory is capped by size and
+# evicts the least recently used thumbnails first.
+# --------------------
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # no Pillow: thumbnails are stored at the original size
+    Image = None
+
+DEFAULT_CACHE_DIR = "image_cache"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+THUMBNAIL_SIZE = 240  # longest side in px; 2x the 120px the app shows, for high-DPI screens
+FAILED_RETRY_SECONDS = 3600  # a missing headshot isn't asked for again on every rerun
+PNG_SIGNATURE = b"\x89PNG"
+
+
+def fetch_url(url, timeout=10):
+    """
+    Default fetcher: raw image bytes, or None if the CDN doesn't have it.
+    """
+    try:
+        response = requests.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"Could not fetch image {url}: {e}")
+        return None
+    return response.content if response.status_code == 200 and response.content else None
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """
+    Image bytes -> thumbnail bytes (PNG when the image has transparency, JPEG otherwise),
+    or None if the bytes aren't an image.
+    """
+    if Image is None:
+        return data
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.save(out, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+        return out.getvalue()
+    except Exception as e:
+        print(f"Could not resize image: {e}")
+        return None
+
+
+class ThumbnailCache:
+    """
+    url -> thumbnail bytes, on disk with an LRU byte cap.
+
+    fetcher(url) -> bytes or None does the actual download; pass a local stand-in in tests.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, size=THUMBNAIL_SIZE, fetcher=fetch_url):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = size
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file name -> bytes on disk, least recently used first
+        self._failed = {}              # file name -> when its fetch last failed
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        files = [entry for entry in os.scandir(directory) if entry.is_file()]
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+            self._entries[entry.name] = entry.stat().st_size
+        self.total_bytes = sum(self._entries.values())
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, url):
+        """
+        Thumbnail bytes for url (fetched and cached on first use), or None if it can't be fetched.
+        """
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        with self._lock:
+            if name in self._entries:
+                try:
+                    with open(self._path(name), "rb") as f:
+                        data = f.read()
+                    self._entries.move_to_end(name)
+                    os.utime(self._path(name))  # keeps LRU order across restarts
+                    self.hits += 1
+                    return data
+                except OSError:
+                    self.total_bytes -= self._entries.pop(name)
+            if time.monotonic() - self._failed.get(name, float("-inf")) < FAILED_RETRY_SECONDS:
+                return None
+
+        # Download outside the lock so one slow image doesn't block the others
+        raw = self.fetcher(url)
+        data = make_thumbnail(raw, self.size) if raw else None
+        if data is None:
+            with self._lock:
+                self._failed[name] = time.monotonic()
+            return None
+
+        with self._lock:
+            self.misses += 1
+            if name not in self._entries:
+                try:
+                    with open(self._path(name), "wb") as f:
+                        f.write(data)
+                except OSError as e:
+                    print(f"Could not cache image {url}: {e}")
+                    return data
+                self._entries[name] = len(data)
+                self.total_bytes += len(data)
+            self._evict()
+        return data
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+
+    def data_uri(self, url):
+        """
+        Inline data: URI for an <img> tag; falls back to the original url if the image can't be fetched.
+        """
+        data = self.get(url)
+        if data is None:
+            return url
+        mime = "image/png" if data.startswith(PNG_SIGNATURE) else "image/jpeg"
+        return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "images": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
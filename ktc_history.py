@@ -0,0 +1,191 @@
+# --------------------
+# Historical KTC values: append-only columnar store of dated snapshots
+#
+# Layout (one directory):
+#   players.txt   one KTC player key per line; line number = player code
+#   player.i4     int32 player code per row   \
+#   day.i4        int32 days since 1970-01-01  > same length, appended together
+#   value.i4      int32 KTC value             /
+#
+# Usage:
+#   python ktc_history.py add ktc_values.csv --date 2025-09-01
+#   python ktc_history.py info
+# --------------------
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_HISTORY_DIR = "ktc_history"
+COLUMNS = ("player", "day", "value")
+
+
+def to_days(dates):
+    """
+    Dates (str, date, datetime64, pandas Timestamp) -> int64 days since epoch.
+    """
+    return np.asarray(pd.to_datetime(np.atleast_1d(dates)).values.astype("datetime64[D]").astype(np.int64))
+
+
+def player_key(name):
+    return " ".join(str(name).split()).lower()
+
+
+class KTCHistory:
+    """
+    Player x date KTC values. Reads are memory-mapped; writes only ever append.
+
+    values_at(players, dates) answers many as-of lookups in one vectorized call: for each
+    (player, date) pair it returns the value from the latest snapshot on or before that date.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DIR):
+        self.path = path
+        self._codes = {}
+        self._keys = []
+        self._index = None  # (sorted composite keys, values in the same order, row count)
+        self._load_players()
+
+    # --- storage
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load_players(self):
+        players_file = self._file("players.txt")
+        if os.path.exists(players_file):
+            with open(players_file, encoding="utf-8") as f:
+                self._keys = [line.rstrip("\n") for line in f]
+        self._codes = {key: code for code, key in enumerate(self._keys)}
+
+    def _column(self, name, rows):
+        column_file = self._file(f"{name}.i4")
+        if rows == 0:
+            return np.zeros(0, dtype=np.int32)
+        return np.memmap(column_file, dtype=np.int32, mode="r", shape=(rows,))
+
+    def __len__(self):
+        sizes = [
+            os.path.getsize(self._file(f"{name}.i4")) // 4 if os.path.exists(self._file(f"{name}.i4")) else 0
+            for name in COLUMNS
+        ]
+        # A crash mid-append can leave one column longer; only whole rows count
+        return min(sizes)
+
+    def columns(self):
+        rows = len(self)
+        return {name: self._column(name, rows) for name in COLUMNS}
+
+    def append_snapshot(self, values_df, date, name_col="Player_Sleeper", value_col="KTC_Value"):
+        """
+        Appends one dated snapshot (a frame shaped like ktc_values.csv).
+        """
+        os.makedirs(self.path, exist_ok=True)
+        day = int(to_days(date)[0])
+        new_keys = []
+        codes = []
+        for name in values_df[name_col]:
+            key = player_key(name)
+            if key not in self._codes:
+                self._codes[key] = len(self._keys)
+                self._keys.append(key)
+                new_keys.append(key)
+            codes.append(self._codes[key])
+
+        if new_keys:
+            with open(self._file("players.txt"), "a", encoding="utf-8") as f:
+                f.writelines(f"{key}\n" for key in new_keys)
+
+        rows = len(self)
+        for name in COLUMNS:
+            # Drop any partial row left by an interrupted append before writing
+            column_file = self._file(f"{name}.i4")
+            if os.path.exists(column_file) and os.path.getsize(column_file) != rows * 4:
+                with open(column_file, "r+b") as f:
+                    f.truncate(rows * 4)
+
+        columns = {
+            "player": np.asarray(codes, dtype=np.int32),
+            "day": np.full(len(codes), day, dtype=np.int32),
+            "value": pd.to_numeric(values_df[value_col], errors="coerce").fillna(0).to_numpy(dtype=np.int32),
+        }
+        for name in COLUMNS:
+            with open(self._file(f"{name}.i4"), "ab") as f:
+                f.write(columns[name].tobytes())
+        self._index = None
+        return len(codes)
+
+    # --- lookups
+    def _sorted_index(self):
+        rows = len(self)
+        if self._index is None or self._index[2] != rows:
+            cols = self.columns()
+            # Stable sort: for a repeated (player, day) the last appended row wins
+            order = np.lexsort((cols["day"], cols["player"]))
+            keys = (cols["player"][order].astype(np.int64) << 32) + cols["day"][order].astype(np.int64)
+            self._index = (keys, np.asarray(cols["value"][order]), rows)
+        return self._index
+
+    def codes_for(self, players):
+        return np.array([self._codes.get(player_key(p), -1) for p in players], dtype=np.int64)
+
+    def values_at(self, players, dates, fill_value=0):
+        """
+        KTC value of each player as of each date (arrays broadcast against each other).
+        Players with no snapshot on or before the date get fill_value.
+        """
+        codes = self.codes_for(np.atleast_1d(players))
+        days = to_days(dates)
+        codes, days = np.broadcast_arrays(codes, days)
+        keys, values, _ = self._sorted_index()
+        result = np.full(codes.shape, fill_value, dtype=np.int64)
+        if len(keys) == 0:
+            return result
+
+        query = (codes << 32) + days
+        pos = np.searchsorted(keys, query, side="right") - 1
+        found = (codes >= 0) & (pos >= 0)
+        pos = np.where(found, pos, 0)
+        # The hit must belong to the same player, not the tail of the previous one
+        found &= (keys[pos] >> 32) == codes
+        result[found] = values[pos[found]]
+        return result
+
+    def snapshot_dates(self):
+        days = np.unique(self.columns()["day"])
+        return days.astype("datetime64[D]")
+
+    def snapshot(self, date):
+        """
+        Full as-of frame for one date, shaped like ktc_values.csv (names are normalized keys).
+        """
+        values = self.values_at(self._keys, date, fill_value=-1)
+        frame = pd.DataFrame({"Player_Sleeper": self._keys, "KTC_Value": values})
+        return frame[frame["KTC_Value"] >= 0].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the historical KTC value store.")
+    parser.add_argument("--dir", default=DEFAULT_HISTORY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="append a dated ktc_values.csv snapshot")
+    add.add_argument("csv")
+    add.add_argument("--date", help="snapshot date (defaults to the file's modified date)")
+    sub.add_parser("info", help="list snapshot dates")
+    args = parser.parse_args()
+
+    history = KTCHistory(args.dir)
+    if args.command == "add":
+        date = args.date or pd.Timestamp(os.path.getmtime(args.csv), unit="s").date()
+        values_df = pd.read_csv(args.csv, encoding="utf-8-sig")
+        rows = history.append_snapshot(values_df, date)
+        print(f"Added {rows} values for {date} to {args.dir}")
+    else:
+        dates = history.snapshot_dates()
+        print(f"{len(history)} rows, {len(history._keys)} players, {len(dates)} snapshots")
+        for d in dates:
+            print(f"  {d}")
+
+
+if __name__ == "__main__":
+    main()
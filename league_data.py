@@ -0,0 +1,649 @@
+# --------------------
+# Sleeper league loading, outside of Streamlit
+#
+# The app builds one LeagueGraph per league and each tab asks it only for the pieces it
+# renders; trade history, pick ownership and the KTC join are fetched on first use.
+# --------------------
+import hashlib
+import json
+import time
+
+import pandas as pd
+
+from name_index import build_ktc_lookup
+from metadata_cache import cached_json, metadata
+from shared_cache import shared_cache
+from sleeper_client import INTERACTIVE, CRAWL
+from sleeper_decode import get_players, get_trades
+
+PLAYER_POOL_TTL = 12 * 3600  # Sleeper asks for /players/nfl at most about once a day
+TRANSACTIONS_TTL = 300       # current-season transaction pages; a finished season's never change
+
+# --------------------
+# Trade history across linked seasons
+# --------------------
+
+def get_all_trades_from_league(league_id):
+    all_trades = []
+    current_league_id = league_id
+    visited = set()
+    pick_owners = {}
+
+    # -- Try fetching users
+    try:
+        league_users = cached_json(f"https://api.sleeper.app/v1/league/{league_id}/users", CRAWL)
+        if not isinstance(league_users, list):
+            raise ValueError(f"unexpected response {league_users!r}")
+    except Exception as e:
+        print(f"Failed to get league users: {e}")
+        return [], {}  # return empty trades and pick map
+
+    user_map = {user["user_id"]: user["display_name"] for user in league_users}
+
+    # -- Now get rosters
+    try:
+        rosters = cached_json(f"https://api.sleeper.app/v1/league/{league_id}/rosters", CRAWL)
+    except Exception as e:
+        print(f"Failed to get rosters: {e}")
+        return [], {}
+
+    roster_map = {str(r["roster_id"]): r["owner_id"] for r in rosters}
+
+    while current_league_id and current_league_id not in visited:
+        visited.add(current_league_id)
+        league_info = cached_json(f"https://api.sleeper.app/v1/league/{current_league_id}", CRAWL)
+        if league_info is None or not isinstance(league_info, dict):
+            print(f"Error: Could not fetch league info for league_id={current_league_id}. Response: {league_info}")
+            break  # or return [], {} or handle as needed
+        is_redraft = str(league_info.get("settings", {}).get("type", "")).lower() not in {"dynasty", "2"}
+        season = league_info.get("season", "?")
+
+        for week in range(1, 19):
+            url = f"https://api.sleeper.app/v1/league/{current_league_id}/transactions/{week}"
+            # Only trades are kept; waivers and free-agent moves are dropped as the page decodes.
+            # Pages are shared between replicas: one crawls, the others read what it stored.
+            transactions = shared_cache().get_or_fetch(
+                "transactions", url, lambda: get_trades(url, CRAWL),
+                ttl=None if metadata.is_finished(current_league_id) else TRANSACTIONS_TTL
+            )
+            if transactions is not None:
+                for t in transactions:
+                    if t.get("type") == "trade":
+                        # Tag with the season it came from; roster_ids are only unique per league
+                        t.setdefault("league_id", current_league_id)
+                        t.setdefault("season", season)
+                        t.setdefault("week", week)
+                        all_trades.append(t)
+                        
+                        adds = t.get("adds") or {}
+                        for pid, roster_id in adds.items():
+                            if pid.startswith("2025_pick_"):
+                                owner_id = roster_map.get(str(roster_id))
+                                if owner_id and owner_id in user_map:
+                                    pick_owners[pid] = user_map[owner_id]
+                                elif pid.split("_")[-1] in user_map:
+                                    generic_uid = pid.split("_")[-1]
+                                    pick_owners[pid] = user_map[generic_uid]
+
+        current_league_id = league_info.get("previous_league_id")
+
+    return all_trades, pick_owners
+
+def load_roster_owners(league_ids):
+    """
+    Returns {(league_id, roster_id): owner display name} for each league in league_ids.
+    """
+    roster_owners = {}
+    for lg_id in league_ids:
+        try:
+            users = cached_json(f"https://api.sleeper.app/v1/league/{lg_id}/users", CRAWL) or []
+            rosters = cached_json(f"https://api.sleeper.app/v1/league/{lg_id}/rosters", CRAWL) or []
+        except Exception as e:
+            print(f"Failed to get owners for league {lg_id}: {e}")
+            continue
+        names = {user["user_id"]: user["display_name"] for user in users}
+        for r in rosters:
+            roster_owners[(lg_id, r["roster_id"])] = names.get(r.get("owner_id"), f"Team {r['roster_id']}")
+    return roster_owners
+
+# --------------------
+# Pick formatter for rookie picks
+# --------------------
+def format_pick_id(pid):
+    if "pick" in pid:
+        parts = pid.split("_")  # example: 2025_pick_1_01
+        if len(parts) == 4 and parts[1] == "pick":
+            return f"{parts[0]} Pick {parts[2]}.{parts[3]}"
+    return pid
+
+# ===============================
+# Helper: Canonicalize pick names
+# ===============================
+def canonical_pick_name(pid):
+    # Matches "2025_pick_1_04" to "2025 Pick 1.04" (same as in your KTC CSV)
+    if pid.startswith("2025_pick_"):
+        parts = pid.split("_")
+        if len(parts) == 4:
+            rd = parts[2]
+            slot = parts[3]
+            return f"2025 Pick {rd}.{slot}"
+    # "2025 1st round pick (Redwards)" or similar — keep as is
+    if pid.startswith("2025") and "round pick" in pid:
+        return pid
+    return pid
+
+def all_equiv_pick_ids(uid, orig_owner):
+    """
+    For a slot UID like '2025_pick_1_04' and owner 'Redwards',
+    return all possible trade IDs for that pick (Sleeper and owner placeholder formats).
+    """
+    num = uid.split("_")[-1]
+    rd = uid.split("_")[2]
+    ktc_fmt = f"2025 Pick {rd}.{num}"
+    sleeper_fmt = uid
+    owner_fmt = f"2025 1st round pick ({orig_owner})"
+    return {sleeper_fmt, ktc_fmt, owner_fmt}
+
+def build_pick_uid_to_orig_owner(pick_order, rosters, user_map):
+    """
+    Returns a dict: pick_uid -> original owner display name, for all round 1 and 2 picks.
+    """
+    pick_uid_to_orig_owner = {}
+    for idx, roster_id in enumerate(pick_order):
+        pick_num = idx + 1
+        # 1st round
+        pick_id_1 = f"2025_pick_1_{str(pick_num).zfill(2)}"
+        owner_id = next((r["owner_id"] for r in rosters if r["roster_id"] == roster_id), None)
+        owner_name = user_map.get(owner_id, f"Team {roster_id}")
+        pick_uid_to_orig_owner[pick_id_1] = owner_name
+        # 2nd round
+        pick_id_2 = f"2025_pick_2_{str(pick_num).zfill(2)}"
+        pick_uid_to_orig_owner[pick_id_2] = owner_name
+    return pick_uid_to_orig_owner
+
+def build_final_pick_ownership_map(trades, pick_uid_to_orig_owner, user_map):
+    """
+    Returns: pick_uid -> current owner display name.
+    Handles all alternate ID formats from trade history.
+    """
+    # Start with original slot assignment
+    pick_to_owner = pick_uid_to_orig_owner.copy()
+    # Map all alternate IDs to pick_uid
+    alt_id_to_uid = {}
+    for uid, orig_owner in pick_uid_to_orig_owner.items():
+        for alt_id in all_equiv_pick_ids(uid, orig_owner):
+            alt_id_to_uid[alt_id] = uid
+    # Step through trades chronologically, update mapping
+    for trade in trades:
+        adds = trade.get("adds", {}) or {}
+        for pid, roster_id in adds.items():
+            uid = alt_id_to_uid.get(pid)
+            if uid:
+                # roster_id may be int or str, but user_map keys are user_id (string)
+                owner_name = user_map.get(str(roster_id), f"Team {roster_id}")
+                pick_to_owner[uid] = owner_name
+    return pick_to_owner
+
+def is_rookie_draft_complete(league_id):
+    """
+    Returns True if the league's rookie draft is marked as complete in Sleeper.
+    """
+    # Get all drafts for this league (could be more than one!)
+    try:
+        drafts = cached_json(f"https://api.sleeper.app/v1/league/{league_id}/drafts", INTERACTIVE)
+        # Find the most recent (should be the rookie draft for dynasty leagues)
+        for draft in drafts:
+            # Optional: could check type: if draft.get("type") == "rookie" or "snake"
+            if draft.get("season_type") == "regular":  # usually rookie or startup, but some leagues only run one
+                status = draft.get("status")
+                if status and status.lower() == "complete":
+                    return True
+        # If you want to be stricter, only check first draft:
+        # draft = drafts[0] if drafts else None
+        # if draft and draft.get("status", "").lower() == "complete":
+        #     return True
+    except Exception as e:
+        print("Error checking rookie draft status:", e)
+    return False
+
+# --------------------
+# Roster rows with KTC values (shared by every loader)
+# --------------------
+def build_roster_rows(rosters, user_map, player_pool, ktc_lookup):
+    data = []
+    
+    for roster in rosters:
+        roster_id = roster["roster_id"]
+        owner_id = roster["owner_id"]
+        owner_name = user_map.get(owner_id, f"User {owner_id}")
+        player_ids = roster.get("players") or []
+        roster_starters = set(roster.get("starters") or [])
+
+        for pid in player_ids:
+            if pid in player_pool:
+                player_data = player_pool[pid]
+                full_name = player_data.get("full_name", pid)
+                position = player_data.get("position", "")
+                team = player_data.get("team", "")
+            elif isinstance(pid, str) and pid.startswith("rookie_"):
+                full_name = format_pick_id(pid)
+                position = "PICK"
+                team = ""
+            else:
+                continue  # Unknown entry; skip
+        
+            ktc_value = ktc_lookup.value(pid, full_name)
+        
+            data.append({
+                "Sleeper_Player_ID": pid,
+                "Player_Sleeper": full_name,
+                "Position": position,
+                "Team": team,
+                "Team_Owner": owner_name,
+                "Roster_ID": roster_id,
+                "KTC_Value": ktc_value,
+                "Is_Starter": pid in roster_starters
+            })
+    return data
+
+# --------------------
+# Rosters-only loader for the cross-league search (no trades or picks)
+# --------------------
+def load_league_roster_records(league_id, player_pool, ktc_lookup, session=None):
+    try:
+        users = cached_json(f"https://api.sleeper.app/v1/league/{league_id}/users", CRAWL, session)
+        rosters = cached_json(f"https://api.sleeper.app/v1/league/{league_id}/rosters", CRAWL, session)
+    except Exception as e:
+        print(f"Failed to load rosters for league {league_id}: {e}")
+        return []
+    if not isinstance(users, list) or not isinstance(rosters, list):
+        return []
+    user_map = {user['user_id']: user['display_name'] for user in users}
+    return build_roster_rows(rosters, user_map, player_pool, ktc_lookup)
+
+# --------------------
+# Rookie draft order from last season's standings
+# --------------------
+def rookie_pick_order(prev_rosters, winners_bracket):
+    """
+    Roster ids in draft order: 1.01-1.06 = worst non-playoff teams, 1.07-1.12 = playoff finish.
+    """
+    # === 1. Split previous season's rosters into non-playoff and playoff
+    non_playoff = [r for r in prev_rosters if not r.get("settings", {}).get("playoff_seed")]
+
+    # === 2. Sort non-playoff teams (worst to best: fewest wins, then fewest points)
+    non_playoff_sorted = sorted(
+        non_playoff,
+        key=lambda r: (
+            r.get("settings", {}).get("wins", 0),   # lowest wins first!
+            r.get("settings", {}).get("fpts", 0)    # lowest points first!
+        )
+    )
+
+    # === 3. Build playoff order map (using Sleeper winners_bracket structure)
+    playoff_order_map = {}
+    for match in winners_bracket or []:
+        place = match.get("p")
+        winner = match.get("w")
+        loser = match.get("l")
+        if place == 1:      # Championship
+            playoff_order_map[12] = winner    # 1.12 (champion)
+            playoff_order_map[11] = loser     # 1.11 (runner up)
+        elif place == 3:    # 3rd place game
+            playoff_order_map[10] = winner
+            playoff_order_map[9] = loser
+        elif place == 5:    # 5th place game
+            playoff_order_map[8] = winner
+            playoff_order_map[7] = loser
+
+    # === 4. Playoff picks (slots 7-12 are 1.07 to 1.12)
+    playoff_picks = [playoff_order_map[slot] for slot in range(7, 13) if playoff_order_map.get(slot) is not None]
+
+    return [r.get("roster_id") for r in non_playoff_sorted[:6]] + playoff_picks
+
+# --------------------
+# Lazy per-league dependency graph
+# --------------------
+class LeagueUnavailable(Exception):
+    pass
+
+
+class LeagueGraph:
+    """
+    Everything the app loads for one league, as lazily evaluated nodes:
+
+        league_info -> users, rosters, traded_picks -> user_map, starters
+        player_pool -> ktc_lookup -> roster_rows (users + rosters + KTC join) -> roster_frame
+        trades (every linked season) -> pick_rows (rookie pick ledger) -> frame
+        player_pool + rosters + trades -> league_players (just the players this league mentions)
+
+    get(name) computes a node, and whatever it depends on, the first time it is asked for
+    and memoizes it. A tab that only needs the league's users never pays for the player
+    pool, the KTC join or an 18-week trade crawl.
+    """
+
+    def __init__(self, league_id, ktc_df, user_id=None, ktc_lookup_factory=build_ktc_lookup, priority=INTERACTIVE):
+        self.league_id = league_id
+        self.priority = priority
+        self.ktc_df = ktc_df
+        self.user_id = user_id
+        self.ktc_lookup_factory = ktc_lookup_factory
+        self._values = {}
+        self.timings = {}
+
+    def get(self, name):
+        if name not in self._values:
+            started = time.perf_counter()
+            self._values[name] = getattr(self, f"_load_{name}")()
+            self.timings[name] = round(time.perf_counter() - started, 3)
+        return self._values[name]
+
+    def loaded(self, name):
+        return name in self._values
+
+    def seed(self, values):
+        """
+        Pre-fills nodes (e.g. from a snapshot) so get() doesn't load them again.
+        """
+        self._values.update(values)
+
+    def _league_json(self, path="", league_id=None):
+        return cached_json(f"https://api.sleeper.app/v1/league/{league_id or self.league_id}{path}", self.priority)
+
+    # --- league metadata
+    def _load_league_info(self):
+        league_info = self._league_json()
+        if not isinstance(league_info, dict):
+            raise LeagueUnavailable("Could not load league info. League may be private or inaccessible.")
+        return league_info
+
+    def _load_users(self):
+        users = self._league_json("/users")
+        if not isinstance(users, list):
+            raise LeagueUnavailable("Could not load league users. League may be private or inaccessible.")
+        return users
+
+    def _load_rosters(self):
+        rosters = self._league_json("/rosters")
+        if not isinstance(rosters, list):
+            raise LeagueUnavailable("Could not load league rosters. League may be private or inaccessible.")
+        return rosters
+
+    def _load_traded_picks(self):
+        return self._league_json("/traded_picks") or []
+
+    def _load_user_map(self):
+        # Merge in previous season user IDs for orphaned teams etc.
+        user_map = {}
+        prev_league_id = self.get("league_info").get("previous_league_id")
+        if prev_league_id:
+            prev_users = self._league_json("/users", league_id=prev_league_id) or []
+            user_map.update({user['user_id']: user['display_name'] for user in prev_users})
+        user_map.update({user['user_id']: user['display_name'] for user in self.get("users")})
+        return user_map
+
+    def _load_starters(self):
+        my_roster = next((r for r in self.get("rosters") if str(r.get("owner_id")) == str(self.user_id)), None)
+        return set(my_roster.get("starters") or []) if my_roster else set()
+
+    # --- players and values
+    def _load_player_pool(self):
+        # Streamed, keeping only full_name / position / team per player; shared between replicas
+        player_pool = shared_cache().get_or_fetch(
+            "player_pool", "nfl", lambda: get_players(self.priority), ttl=PLAYER_POOL_TTL
+        )
+        if player_pool is None:
+            raise LeagueUnavailable("Could not load the Sleeper player list.")
+        return player_pool
+
+    def _player_subset(self, player_pool):
+        ids = {pid for r in self.get("rosters") for pid in r.get("players") or []}
+        if self.loaded("trades"):
+            for trade in self.get("trades"):
+                ids.update((trade.get("adds") or {}).keys())
+                ids.update((trade.get("drops") or {}).keys())
+        players = {pid: player_pool[pid] for pid in ids if pid in player_pool}
+        for pid in ids:
+            if isinstance(pid, str) and pid.startswith("rookie_") and pid not in players:
+                players[pid] = {"full_name": format_pick_id(pid), "position": "PICK", "team": ""}
+        return players
+
+    def _load_league_players(self):
+        """
+        The slice of the player pool this league's rosters and trades mention; enough for the
+        trade tabs, and what a snapshot keeps instead of the whole 5 MB pool.
+        """
+        self.get("trades")
+        return self._player_subset(self.get("player_pool"))
+
+    def _load_ktc_lookup(self):
+        return self.ktc_lookup_factory(self.get("player_pool"), self.ktc_df)
+
+    def _load_roster_rows(self):
+        rosters = self.get("rosters")
+        player_pool = self.get("player_pool")
+        rows = build_roster_rows(rosters, self.get("user_map"), player_pool, self.get("ktc_lookup"))
+
+        # Inject dummy player data for rookie picks
+        for roster in rosters:
+            for pid in roster.get("players") or []:
+                if isinstance(pid, str) and pid.startswith("rookie_"):
+                    player_pool[pid] = {"full_name": format_pick_id(pid), "position": "PICK", "team": ""}
+        return rows
+
+    def _load_roster_frame(self):
+        return pd.DataFrame(self.get("roster_rows"))
+
+    # --- trades and picks
+    def _load_trades(self):
+        # Every linked season, oldest first so pick ownership can be replayed in order
+        trades, _ = get_all_trades_from_league(self.league_id)
+        return sorted(trades, key=lambda t: t.get("status_updated") or t.get("created") or 0)
+
+    def _load_pick_rows(self):
+        league_info = self.get("league_info")
+        prev_league_id = league_info.get("previous_league_id")
+        is_redraft = str(league_info.get("settings", {}).get("type", "")).lower() not in {"dynasty", "2"}
+        # Skip pick logic entirely for redraft leagues or if rookie draft is already done
+        if is_redraft or not prev_league_id or is_rookie_draft_complete(self.league_id):
+            return []
+
+        prev_rosters = self._league_json("/rosters", league_id=prev_league_id) or []
+        winners_bracket = self._league_json("/winners_bracket", league_id=prev_league_id)
+        pick_order = rookie_pick_order(prev_rosters, winners_bracket)
+
+        user_map = self.get("user_map")
+        pick_uid_to_orig_owner = build_pick_uid_to_orig_owner(pick_order, self.get("rosters"), user_map)
+        pick_to_owner = build_final_pick_ownership_map(self.get("trades"), pick_uid_to_orig_owner, user_map)
+        ktc_lookup = self.get("ktc_lookup")
+
+        rows = []
+        for uid, orig_owner in pick_uid_to_orig_owner.items():
+            # Display name: "2025 Pick 1.01 (Mahomeboy93)"
+            rows.append({
+                "Sleeper_Player_ID": uid,
+                "Player_Sleeper": f"{format_pick_id(uid)} ({orig_owner})",
+                "Position": "PICK",
+                "Team": "",
+                "Team_Owner": pick_to_owner.get(uid, orig_owner),
+                "Roster_ID": None,
+                "KTC_Value": ktc_lookup.value(uid, format_pick_id(uid)),
+                "Is_Starter": False
+            })
+        return rows
+
+    def _load_frame(self):
+        """
+        Every rostered player plus this year's rookie picks, with KTC values (what the trade tabs use).
+        """
+        return pd.DataFrame(self.get("roster_rows") + self.get("pick_rows"))
+
+
+# --------------------
+# Warm-start snapshots: a loaded league saved to the shared cache, restored after a freshness probe
+# --------------------
+SNAPSHOT_NAMESPACE = "league_snapshot"
+SNAPSHOT_VERSION = 3
+# Nodes a snapshot keeps (the rest are cheap to derive again)
+SNAPSHOT_NODES = ["league_info", "users", "user_map", "trades", "league_players"]
+# Nodes that hold KTC values; only restored for the same KTC snapshot
+VALUE_NODES = ["ktc_lookup", "roster_rows", "pick_rows"]
+
+
+def roster_hash(roster):
+    """
+    Content hash of one roster: owner, players, starters, reserve and taxi.
+    """
+    content = [
+        str(roster.get("owner_id")),
+        sorted(roster.get("players") or []), sorted(roster.get("starters") or []),
+        sorted(roster.get("reserve") or []), sorted(roster.get("taxi") or []),
+    ]
+    return hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()
+
+
+def roster_hashes(rosters):
+    return {r.get("roster_id"): roster_hash(r) for r in rosters}
+
+
+def player_hashes(rosters):
+    """
+    Per roster, a hash of just who is on it: lineup moves don't change it, trades and adds do.
+    """
+    return {
+        r.get("roster_id"): hashlib.sha1(json.dumps(sorted(r.get("players") or [])).encode("utf-8")).hexdigest()
+        for r in rosters
+    }
+
+
+def picks_fingerprint(traded_picks):
+    picks = sorted(
+        (str(p.get("season")), p.get("round"), p.get("roster_id"), p.get("owner_id")) for p in traded_picks or []
+    )
+    return hashlib.sha1(json.dumps(picks).encode("utf-8")).hexdigest()
+
+
+def ktc_fingerprint(ktc_df):
+    pairs = list(zip(ktc_df["Player_Sleeper"].astype(str).tolist(), ktc_df["KTC_Value"].astype(int).tolist()))
+    return hashlib.sha1(json.dumps(pairs).encode("utf-8")).hexdigest()
+
+
+def save_league_snapshot(league, cache=None, restored=()):
+    """
+    Writes whatever of the league is loaded (rosters at minimum) to the shared cache (or
+    `cache`), unless it adds nothing to the `restored` nodes it started from. Returns the
+    node names saved.
+    """
+    if not league.loaded("rosters"):
+        return []
+    nodes = {name: league.get(name) for name in SNAPSHOT_NODES + VALUE_NODES if league.loaded(name)}
+    if "league_players" not in nodes and league.loaded("player_pool"):
+        nodes["league_players"] = league._player_subset(league.get("player_pool"))
+    if set(nodes) <= set(restored):
+        return []
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "league_id": str(league.league_id),
+        "saved_at": time.time(),
+        "roster_hashes": roster_hashes(league.get("rosters")),
+        "player_hashes": player_hashes(league.get("rosters")),
+        "picks_fingerprint": picks_fingerprint(league.get("traded_picks")),
+        "ktc_fingerprint": ktc_fingerprint(league.ktc_df),
+        "nodes": nodes,
+    }
+    # One row write: other replicas never see a half-written snapshot
+    (cache or shared_cache()).put(SNAPSHOT_NAMESPACE, league.league_id, state)
+    return sorted(nodes)
+
+
+def load_league_snapshot(league_id, cache=None):
+    """
+    The league's saved snapshot state from the shared cache (or `cache`), or None if there is
+    none in this SNAPSHOT_VERSION. Callers that restore the same league often keep it.
+    """
+    saved = (cache or shared_cache()).get(SNAPSHOT_NAMESPACE, league_id)
+    if saved is None or saved[0].get("version") != SNAPSHOT_VERSION:
+        return None
+    return saved[0]
+
+
+def restore_league_snapshot(league, cache=None, state=None):
+    """
+    Seeds a fresh LeagueGraph from its saved snapshot (`state`, if the caller already has it
+    from load_league_snapshot()), patching only the rosters that changed.
+
+    The probe is /rosters and /traded_picks through the metadata cache, so a rerun within
+    their TTL asks Sleeper for nothing. Each roster's content hash is compared with the
+    snapshot's: unchanged rosters keep their rows, changed ones are rebuilt, and trades are
+    crawled again only if players moved between rosters. Returns the node names restored as
+    saved (patched nodes aren't listed, so the next save picks them up).
+    """
+    state = load_league_snapshot(league.league_id, cache) if state is None else state
+    if not state:
+        return []
+
+    try:
+        rosters = league.get("rosters")
+    except LeagueUnavailable:
+        return []
+
+    same_values = state["ktc_fingerprint"] == ktc_fingerprint(league.ktc_df)
+    nodes = {
+        name: value for name, value in state["nodes"].items()
+        if name in SNAPSHOT_NODES or (same_values and name in VALUE_NODES)
+    }
+    new_hashes = roster_hashes(rosters)
+    old_hashes = state["roster_hashes"]
+    changed = {rid for rid in new_hashes.keys() | old_hashes.keys() if new_hashes.get(rid) != old_hashes.get(rid)}
+    picks_same = picks_fingerprint(league.get("traded_picks")) == state["picks_fingerprint"]
+    if not changed and picks_same:
+        league.seed(nodes)
+        return sorted(nodes)
+
+    # A trade moves players between two rosters or moves a pick. Lineup moves, and a single
+    # roster's players changing (waiver claim, free agent add/drop), leave the trade list and
+    # pick ledger as they were, so that decision looks at players only.
+    new_players = player_hashes(rosters)
+    old_players = state["player_hashes"]
+    traded = {rid for rid in new_players.keys() | old_players.keys() if new_players.get(rid) != old_players.get(rid)}
+    if not picks_same or len(traded) > 1:
+        for name in ("trades", "pick_rows"):
+            nodes.pop(name, None)
+    # A new owner isn't in the saved user map
+    changed_rosters = [r for r in rosters if r.get("roster_id") in changed]
+    user_map = nodes.get("user_map", {})
+    if any(r.get("owner_id") and r["owner_id"] not in user_map for r in changed_rosters):
+        for name in ("users", "user_map", "pick_rows"):
+            nodes.pop(name, None)
+    saved_rows = nodes.pop("roster_rows", None)
+    saved_players = nodes.pop("league_players", {})
+    league.seed(nodes)
+
+    if saved_rows is not None:
+        league.seed({"roster_rows": patch_roster_rows(league, saved_rows, changed_rosters, saved_players)})
+    if "trades" in nodes:
+        league.seed({"league_players": league._player_subset(league.get("player_pool"))}
+                    if league.loaded("player_pool") else {"league_players": saved_players})
+    return sorted(nodes)
+
+
+def patch_roster_rows(league, saved_rows, changed_rosters, saved_players):
+    """
+    roster_rows with only `changed_rosters` rebuilt; the rest are the saved rows, in roster order.
+    """
+    changed_ids = {r.get("roster_id") for r in changed_rosters}
+    needed = {
+        pid for r in changed_rosters for pid in r.get("players") or []
+        if not (isinstance(pid, str) and pid.startswith("rookie_"))
+    }
+    # The saved slice of the pool covers anyone who was already in the league
+    pool = saved_players if needed <= saved_players.keys() else league.get("player_pool")
+    rebuilt = build_roster_rows(changed_rosters, league.get("user_map"), pool, league.get("ktc_lookup"))
+
+    rows_by_roster = {}
+    for row in saved_rows:
+        if row["Roster_ID"] not in changed_ids:
+            rows_by_roster.setdefault(row["Roster_ID"], []).append(row)
+    for row in rebuilt:
+        rows_by_roster.setdefault(row["Roster_ID"], []).append(row)
+    return [row for r in league.get("rosters") for row in rows_by_roster.get(r.get("roster_id"), [])]
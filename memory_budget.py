@@ -0,0 +1,219 @@
+# --------------------
+# Process-wide memory budget for cached league state
+#
+# Everything the app keeps between reruns (KTC lookups, band indexes, each session's widget
+# state) and everything the trade service keeps between requests (league snapshots) is
+# registered here with an estimated size. When the total goes over the budget the least
+# recently used entries are dropped, so a shared instance stops growing with every league
+# anyone has ever opened.
+#
+# Deployments set the cap with TRADE_MEMORY_BUDGET_MB (default 512).
+# --------------------
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MB = 1024 * 1024
+DEFAULT_BUDGET_MB = 512
+BUDGET_MB_ENV = "TRADE_MEMORY_BUDGET_MB"
+EVICTED_KEYS_KEPT = 4096  # evicted keys remembered for pop_evicted()
+
+_OPAQUE = (types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.ModuleType, type)
+
+
+def estimate_size(obj):
+    """
+    Rough deep size of `obj` in bytes. DataFrames and arrays report their buffers; containers
+    and plain objects are walked, counting anything shared only once. Functions, modules and
+    classes count as nothing (they're not what a cache entry owns).
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _OPAQUE):
+            continue
+        seen.add(id(item))
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(index=True, deep=True).sum())
+        elif isinstance(item, (pd.Series, pd.Index)):
+            total += int(item.memory_usage(deep=True))
+        elif isinstance(item, np.ndarray):
+            total += sys.getsizeof(item) if item.base is None else item.nbytes
+            if item.dtype == object:
+                stack.extend(item.ravel().tolist())
+        else:
+            total += sys.getsizeof(item)
+            if isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                stack.extend(item)
+            elif hasattr(item, "__dict__"):
+                stack.append(vars(item))
+            elif hasattr(type(item), "__slots__"):
+                stack.extend(getattr(item, name) for name in type(item).__slots__ if hasattr(item, name))
+    return total
+
+
+def budget_mb_from_env():
+    """
+    The budget in MB from TRADE_MEMORY_BUDGET_MB, or DEFAULT_BUDGET_MB if it is unset or not a positive number.
+    """
+    value = os.environ.get(BUDGET_MB_ENV)
+    if value is None:
+        return DEFAULT_BUDGET_MB
+    try:
+        budget_mb = float(value)
+    except ValueError:
+        budget_mb = 0
+    if budget_mb <= 0:
+        print(f"Ignoring {BUDGET_MB_ENV}={value!r}; using {DEFAULT_BUDGET_MB} MB")
+        return DEFAULT_BUDGET_MB
+    return budget_mb
+
+
+class MemoryBudget:
+    """
+    key -> value, least recently used first out once the estimated total passes `budget_bytes`.
+
+    Keys are tuples whose first element names the kind of entry ("band_index", "session", ...),
+    which is how stats() breaks usage down. The newest entry is never evicted, even when it is
+    bigger than the whole budget on its own.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * MB, sizer=estimate_size):
+        self.budget_bytes = budget_bytes
+        self.sizer = sizer
+        self._entries = OrderedDict()  # key -> (value, size, on_evict)
+        self._evicted = OrderedDict()
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None, on_evict=None):
+        """
+        Stores `value` (replacing any entry under `key`) and evicts down to the budget.
+        on_evict(key, value) is called, outside the lock, if the entry is later dropped.
+        """
+        size = self.sizer(value) if size is None else size
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old[1]
+            self._entries[key] = (value, size, on_evict)
+            self._evicted.pop(key, None)
+            self.used_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+            dropped = self._evict_over_budget()
+        self._notify(dropped)
+        return value
+
+    def get_or_build(self, key, build, on_evict=None):
+        """
+        The cached value for `key`, or build() stored under it. Two callers racing on a missing
+        key may both build; the later one wins.
+        """
+        marker = object()
+        value = self.get(key, marker)
+        if value is marker:
+            value = self.put(key, build(), on_evict=on_evict)
+        return value
+
+    def resize(self, key):
+        """
+        Measures the entry under `key` again (for values that fill themselves in after they are
+        stored, like a BandIndex building a package size) and evicts down to the budget.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = self.sizer(entry[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._entries[key] = (entry[0], size, entry[2])
+            self.used_bytes += size - entry[1]
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+            dropped = self._evict_over_budget()
+        self._notify(dropped)
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.used_bytes -= entry[1]
+
+    def pop_evicted(self, key):
+        """
+        True (once) if `key` was evicted since it was last put; for owners that have to do
+        their own cleanup, like a session clearing its widget state on its next run.
+        """
+        with self._lock:
+            return self._evicted.pop(key, None) is not None
+
+    def _evict_over_budget(self):
+        dropped = []
+        while self.used_bytes > self.budget_bytes and len(self._entries) > 1:
+            key, (value, size, on_evict) = self._entries.popitem(last=False)
+            self.used_bytes -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+            self._evicted[key] = True
+            if len(self._evicted) > EVICTED_KEYS_KEPT:
+                self._evicted.popitem(last=False)
+            if on_evict is not None:
+                dropped.append((on_evict, key, value))
+        return dropped
+
+    @staticmethod
+    def _notify(dropped):
+        for on_evict, key, value in dropped:
+            try:
+                on_evict(key, value)
+            except Exception as e:
+                print(f"Eviction callback for {key!r} failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            by_kind = {}
+            for key, (_, size, _) in self._entries.items():
+                kind = key[0] if isinstance(key, tuple) and key else "other"
+                usage = by_kind.setdefault(str(kind), {"entries": 0, "mb": 0.0})
+                usage["entries"] += 1
+                usage["mb"] += size / MB
+            for usage in by_kind.values():
+                usage["mb"] = round(usage["mb"], 2)
+            return {
+                "budget_mb": round(self.budget_bytes / MB, 1),
+                "used_mb": round(self.used_bytes / MB, 2),
+                "peak_mb": round(self.peak_bytes / MB, 2),
+                "entries": len(self._entries),
+                "by_kind": by_kind,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "evicted_mb": round(self.evicted_bytes / MB, 2),
+            }
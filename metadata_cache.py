@@ -0,0 +1,215 @@
+# --------------------
+# Persistent cache for Sleeper league metadata
+#
+# League info, users, rosters, traded picks, drafts and playoff brackets are kept in SQLite
+# with a TTL per kind of resource. A finished season never changes, so anything under a
+# league whose info says "complete" (which covers the whole previous_league_id chain) is
+# kept for good.
+# Stale entries are served immediately and refreshed on a background thread
+# (stale-while-revalidate), so pages render from cache while Sleeper is asked again.
+# --------------------
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from sleeper_client import INTERACTIVE, BACKGROUND, sleeper_get
+
+DEFAULT_METADATA_PATH = "metadata_cache.sqlite"
+
+# Seconds an entry is fresh, per resource; None = never expires
+LEAGUE_TTLS = {
+    "league": 600,
+    "users": 600,
+    "rosters": 60,
+    "traded_picks": 60,
+    "drafts": 300,
+    "winners_bracket": 600,
+    "losers_bracket": 600,
+}
+FINISHED_TTL = None
+MAX_STALE_SECONDS = 24 * 3600  # older than this is fetched before answering, not served
+
+LEAGUE_URL = re.compile(r"^https://api\.sleeper\.app/v1/league/([^/?]+)(?:/(\w+))?/?$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    url TEXT PRIMARY KEY,
+    league_id TEXT NOT NULL,
+    body TEXT NOT NULL,          -- the JSON exactly as Sleeper sent it
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def league_resource(url):
+    """
+    (league_id, resource) for a cacheable league metadata url, else None.
+    """
+    match = LEAGUE_URL.match(url)
+    if not match:
+        return None
+    resource = match.group(2) or "league"
+    return (match.group(1), resource) if resource in LEAGUE_TTLS else None
+
+
+class MetadataCache:
+    """
+    url -> parsed JSON with per-resource TTLs, stored in SQLite and shared by every session.
+
+    get_json() answers fresh entries from disk, answers stale ones from disk while a background
+    refresh runs, and only waits on Sleeper for urls it has never seen (or has held too long).
+    """
+
+    def __init__(self, path=DEFAULT_METADATA_PATH, fetch=sleeper_get, clock=time.time):
+        self.path = path
+        self.fetch = fetch
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._finished = set()  # league ids whose season is complete
+        self._local = threading.local()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        try:
+            conn = self._connect()
+            # WAL: background refreshes writing don't block page renders reading
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            print(f"Could not open metadata cache: {e}")
+
+    def _connect(self):
+        """
+        This thread's connection (autocommit), opened on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _read(self, url):
+        try:
+            return self._connect().execute("SELECT body, fetched_at FROM metadata WHERE url = ?", (url,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Could not read metadata cache: {e}")
+            return None
+
+    def _write(self, url, league_id, body):
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO metadata (url, league_id, body, fetched_at) VALUES (?, ?, ?, ?)",
+                (url, league_id, body, self.clock())
+            )
+        except sqlite3.Error as e:
+            print(f"Could not write metadata cache: {e}")
+
+    def is_finished(self, league_id):
+        """
+        True once the league's cached info says its season is complete.
+        """
+        if league_id in self._finished:
+            return True
+        row = self._read(f"https://api.sleeper.app/v1/league/{league_id}")
+        if row is not None and (json.loads(row[0]) or {}).get("status") == "complete":
+            self._finished.add(league_id)
+            return True
+        return False
+
+    def _note_lineage(self, league_id, data):
+        """
+        A league that has a successor season is finished, and so is one whose info says complete.
+        """
+        if not isinstance(data, dict):
+            return
+        if data.get("status") == "complete":
+            self._finished.add(league_id)
+        if data.get("previous_league_id"):
+            self._finished.add(str(data["previous_league_id"]))
+
+    def ttl(self, league_id, resource):
+        return FINISHED_TTL if self.is_finished(league_id) else LEAGUE_TTLS[resource]
+
+    def _fetch(self, url, league_id, priority, session):
+        """
+        Asks Sleeper and stores the answer. Returns the parsed JSON, or None on a bad response.
+        """
+        response = self.fetch(url, priority, session)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if data is not None:
+            self._write(url, league_id, response.text)
+        return data
+
+    def _refresh(self, url, league_id):
+        try:
+            self._fetch(url, league_id, BACKGROUND, None)
+        except Exception as e:
+            print(f"Background refresh of {url} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(url)
+
+    def _refresh_later(self, url, league_id):
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+            self.refreshes += 1
+        threading.Thread(target=self._refresh, args=(url, league_id), daemon=True).start()
+
+    def get_json(self, url, priority=INTERACTIVE, session=None):
+        """
+        Parsed JSON for a Sleeper url. League metadata urls go through the cache; anything
+        else is fetched directly. None if Sleeper doesn't answer 200.
+        """
+        key = league_resource(url)
+        if key is None:
+            response = self.fetch(url, priority, session)
+            return response.json() if response.status_code == 200 else None
+        league_id, resource = key
+
+        row = self._read(url)
+        age = self.clock() - row[1] if row is not None else None
+        ttl = self.ttl(league_id, resource) if row is not None else None
+        if row is not None and (ttl is None or age < ttl):
+            with self._lock:
+                self.hits += 1
+            data = json.loads(row[0])
+        elif row is not None and age < MAX_STALE_SECONDS:
+            with self._lock:
+                self.stale_hits += 1
+            self._refresh_later(url, league_id)
+            data = json.loads(row[0])
+        else:
+            with self._lock:
+                self.misses += 1
+            data = self._fetch(url, league_id, priority, session)
+
+        if resource == "league":
+            self._note_lineage(league_id, data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "background_refreshes": self.refreshes,
+                "refreshing_now": len(self._refreshing),
+                "finished_leagues": len(self._finished),
+            }
+
+
+metadata = MetadataCache()
+
+
+def cached_json(url, priority=INTERACTIVE, session=None):
+    return metadata.get_json(url, priority, session)
@@ -0,0 +1,176 @@
+# --------------------
+# Sleeper <-> KTC name resolution
+#
+# Sleeper full_name and KTC names disagree on punctuation, suffixes and diacritics
+# ("Kenneth Walker III", "D.J. Moore", "Marvin Harrison Jr."). Every Sleeper player is
+# resolved once per KTC snapshot: normalized exact match first, then a character
+# trigram fuzzy fallback. Results are persisted by Sleeper id in ktc_aliases.csv; rows
+# with Method "manual" are never overwritten, so bad guesses can be pinned by hand.
+# --------------------
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+DEFAULT_ALIAS_PATH = "ktc_aliases.csv"
+KTC_POSITIONS = {"QB", "RB", "WR", "TE"}
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+FUZZY_MIN_SCORE = 0.85          # accept on name similarity alone
+FUZZY_NICKNAME_MIN_SCORE = 0.5  # "Cam Ward" / "Cameron Ward": same last name, first names share a prefix
+ALIAS_COLUMNS = ["Sleeper_Player_ID", "Sleeper_Name", "KTC_Name", "Method", "Score"]
+
+
+def normalize_name(name):
+    """
+    "Marvin Harrison Jr." -> "marvin harrison", "D.J. Moore" -> "dj moore", "Amon-Ra St. Brown" -> "amonra st brown"
+    """
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).lower()
+    name = re.sub(r"[.'’\-]", "", name)
+    name = re.sub(r"[^a-z0-9 ]", " ", name)
+    tokens = name.split()
+    while len(tokens) > 2 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def is_nickname(key_a, key_b):
+    a, b = key_a.split(), key_b.split()
+    return len(a) >= 2 and len(b) >= 2 and a[-1] == b[-1] and a[0][:3] == b[0][:3]
+
+
+class NameIndex:
+    """
+    Normalized-key and trigram indexes over one KTC snapshot's names.
+    """
+
+    def __init__(self, ktc_names):
+        self.names = list(ktc_names)
+        self.keys = [normalize_name(n) for n in self.names]
+        self.exact = {}
+        for i, key in enumerate(self.keys):
+            self.exact.setdefault(key, i)
+        self.grams = [trigrams(key) for key in self.keys]
+        self.postings = {}
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def fuzzy(self, key):
+        """
+        Best (index, dice score) among KTC names sharing trigrams with key, or (None, 0.0).
+        """
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        best, best_score = None, 0.0
+        for i, count in shared.items():
+            score = 2 * count / (len(grams) + len(self.grams[i]))
+            if score > best_score:
+                best, best_score = i, score
+        return best, best_score
+
+    def match(self, name):
+        """
+        (KTC name, method, score) for a Sleeper name; method is "exact", "fuzzy" or "unmatched".
+        """
+        key = normalize_name(name)
+        if key in self.exact:
+            return self.names[self.exact[key]], "exact", 1.0
+        i, score = self.fuzzy(key)
+        if i is not None:
+            if score >= FUZZY_MIN_SCORE or (is_nickname(key, self.keys[i]) and score >= FUZZY_NICKNAME_MIN_SCORE):
+                return self.names[i], "fuzzy", round(score, 3)
+        return None, "unmatched", round(score, 3)
+
+
+class KTCLookup:
+    """
+    Resolved KTC values for one snapshot: by Sleeper id first, normalized name as fallback.
+    """
+
+    def __init__(self, ktc_df, aliases):
+        self.values = dict(zip(ktc_df["Player_Sleeper"], ktc_df["KTC_Value"]))
+        self.name_by_key = {normalize_name(n): n for n in self.values}
+        self.aliases = aliases
+        self.ktc_name_by_id = {
+            row.Sleeper_Player_ID: row.KTC_Name
+            for row in aliases.itertuples() if isinstance(row.KTC_Name, str) and row.KTC_Name in self.values
+        }
+
+    def ktc_name(self, sleeper_id, name=None):
+        """
+        KTC name for a Sleeper id; names (picks, players outside the alias table) fall back to a normalized match.
+        """
+        ktc_name = self.ktc_name_by_id.get(str(sleeper_id))
+        if ktc_name is None and name is not None:
+            ktc_name = self.name_by_key.get(normalize_name(name))
+        return ktc_name
+
+    def value(self, sleeper_id, name=None):
+        ktc_name = self.ktc_name(sleeper_id, name)
+        return int(self.values[ktc_name]) if ktc_name is not None else 0
+
+    def unmatched(self, sleeper_ids):
+        """
+        Sleeper ids (e.g. everyone rostered) the snapshot has no value for.
+        """
+        resolved = set(self.ktc_name_by_id)
+        known = set(self.aliases["Sleeper_Player_ID"])
+        return [pid for pid in sleeper_ids if str(pid) in known and str(pid) not in resolved]
+
+
+def load_aliases(path=DEFAULT_ALIAS_PATH):
+    if os.path.exists(path):
+        return pd.read_csv(path, dtype={"Sleeper_Player_ID": str, "KTC_Name": str}, encoding="utf-8")
+    return pd.DataFrame(columns=ALIAS_COLUMNS)
+
+
+def build_ktc_lookup(player_pool, ktc_df, alias_path=DEFAULT_ALIAS_PATH):
+    """
+    Resolves every offensive Sleeper player against this KTC snapshot and saves the alias table.
+    Manual rows are kept as they are, even for players this pool no longer lists as offensive.
+    """
+    index = NameIndex(ktc_df["Player_Sleeper"])
+    previous = load_aliases(alias_path)
+    manual = previous[previous["Method"] == "manual"].drop_duplicates("Sleeper_Player_ID", keep="last")
+
+    rows = [
+        [pid, player_pool.get(pid, {}).get("full_name") or sleeper_name, ktc_name, "manual", 1.0]
+        for pid, sleeper_name, ktc_name in zip(manual["Sleeper_Player_ID"], manual["Sleeper_Name"], manual["KTC_Name"])
+    ]
+    pinned = set(manual["Sleeper_Player_ID"])
+    for pid, player in player_pool.items():
+        if player.get("position") not in KTC_POSITIONS or not player.get("full_name"):
+            continue
+        pid = str(pid)
+        if pid in pinned:
+            continue
+        ktc_name, method, score = index.match(player["full_name"])
+        rows.append([pid, player["full_name"], ktc_name, method, score])
+
+    aliases = pd.DataFrame(rows, columns=ALIAS_COLUMNS)
+    # A fuzzy guess never takes a KTC name that an exact or manual match already owns
+    claimed = aliases[aliases["Method"] == "exact"].drop_duplicates("KTC_Name")
+    taken = set(claimed["KTC_Name"]) | set(manual["KTC_Name"].dropna())
+    fuzzy_clash = (aliases["Method"] == "fuzzy") & aliases["KTC_Name"].isin(taken)
+    aliases.loc[fuzzy_clash, ["KTC_Name", "Method"]] = [None, "unmatched"]
+
+    # Written beside the table and swapped in, so a reader never sees a half-written file
+    temp_path = f"{alias_path}.{os.getpid()}.tmp"
+    try:
+        aliases.sort_values("Sleeper_Player_ID").to_csv(temp_path, index=False, encoding="utf-8")
+        os.replace(temp_path, alias_path)
+    except OSError as e:
+        print(f"Could not save KTC aliases to {alias_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return KTCLookup(ktc_df, aliases)
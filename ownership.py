@@ -0,0 +1,129 @@
+# --------------------
+# League-wide player ownership matrix (backs the Player Portfolio tab)
+# --------------------
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from sleeper_client import CRAWL, get_json
+
+FORMAT_TYPES = ["Dynasty Lineup", "Dynasty Best Ball", "Redraft Lineup", "Redraft Best Ball"]
+
+
+def league_format(league):
+    """
+    Dynasty/Redraft x Lineup/Best Ball class for a Sleeper league object.
+    """
+    lg_type = str(league.get('settings', {}).get('type', '')).lower()
+    is_dynasty = (lg_type == "dynasty" or lg_type == "2" or "dynasty" in league.get('name', '').lower())
+    is_bestball = league.get("settings", {}).get("best_ball", 0) == 1
+    return f"{'Dynasty' if is_dynasty else 'Redraft'} {'Best Ball' if is_bestball else 'Lineup'}"
+
+
+def _get_json(url):
+    return get_json(url, CRAWL)
+
+
+class OwnershipMatrix:
+    """
+    Sparse owner x player ownership, stored as COO rows (owner_id, league_id, format, player_id).
+
+    memberships has one row per (owner_id, league_id, format) so ownership % can be taken over
+    every league an owner is in, even ones whose roster could not be loaded.
+    """
+
+    def __init__(self, entries, memberships):
+        self.entries = entries
+        self.memberships = memberships
+
+    def format_counts(self, owner_id):
+        owner_leagues = self.memberships[self.memberships["owner_id"] == owner_id]
+        counts = owner_leagues["format"].value_counts()
+        format_counts = {ftype: int(counts.get(ftype, 0)) for ftype in FORMAT_TYPES}
+        format_counts["All"] = len(owner_leagues)
+        return format_counts
+
+    def portfolio(self, owner_id, fmt="All"):
+        """
+        Player_ID, Leagues Owned and Ownership % for one owner, most-owned first.
+        """
+        entries = self.entries[self.entries["owner_id"] == owner_id]
+        if fmt != "All":
+            entries = entries[entries["format"] == fmt]
+        total_leagues = self.format_counts(owner_id)[fmt]
+        counts = entries["player_id"].value_counts()
+        return pd.DataFrame({
+            "Player_ID": counts.index,
+            "Leagues Owned": counts.values,
+            "Ownership %": (counts.values / total_leagues * 100) if total_leagues else 0.0,
+        })
+
+    def top_holders(self, player_id, fmt="All"):
+        """
+        Owners holding the most shares of one player: Owner_ID, Shares, Leagues, Ownership %.
+        """
+        entries = self.entries[self.entries["player_id"] == player_id]
+        memberships = self.memberships
+        if fmt != "All":
+            entries = entries[entries["format"] == fmt]
+            memberships = memberships[memberships["format"] == fmt]
+        shares = entries["owner_id"].value_counts()
+        leagues = memberships["owner_id"].value_counts().reindex(shares.index).fillna(0).astype(int)
+        return pd.DataFrame({
+            "Owner_ID": shares.index,
+            "Shares": shares.values,
+            "Leagues": leagues.values,
+            "Ownership %": (shares.values / leagues.clip(lower=1).values) * 100,
+        })
+
+
+def build_ownership_matrix(owner_ids, season="2025", fetch_json=_get_json, max_workers=8):
+    """
+    Fetches each owner's leagues, then each distinct league's rosters exactly once
+    (leagues shared by several owners are deduplicated), and builds an OwnershipMatrix.
+    """
+    owner_ids = list(owner_ids)
+    owner_set = set(owner_ids)
+
+    def owner_leagues(owner_id):
+        try:
+            leagues = fetch_json(f"https://api.sleeper.app/v1/user/{owner_id}/leagues/nfl/{season}")
+            return leagues if isinstance(leagues, list) else []
+        except Exception as e:
+            print(f"Failed to get leagues for {owner_id}: {e}")
+            return []
+
+    def league_rosters(league_id):
+        try:
+            rosters = fetch_json(f"https://api.sleeper.app/v1/league/{league_id}/rosters")
+            return rosters if isinstance(rosters, list) else []
+        except Exception as e:
+            print(f"Failed to get rosters for {league_id}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        leagues_by_owner = dict(zip(owner_ids, pool.map(owner_leagues, owner_ids)))
+
+        membership_rows = []
+        league_formats = {}
+        for owner_id, leagues in leagues_by_owner.items():
+            for league in leagues:
+                fmt = league_formats.setdefault(league["league_id"], league_format(league))
+                membership_rows.append({"owner_id": owner_id, "league_id": league["league_id"], "format": fmt})
+
+        league_ids = list(league_formats)
+        rosters_by_league = dict(zip(league_ids, pool.map(league_rosters, league_ids)))
+
+    entry_rows = []
+    for league_id, rosters in rosters_by_league.items():
+        fmt = league_formats[league_id]
+        for roster in rosters:
+            owner_id = roster.get("owner_id")
+            if owner_id not in owner_set:
+                continue
+            for pid in roster.get("players") or []:
+                entry_rows.append((owner_id, league_id, fmt, pid))
+
+    entries = pd.DataFrame(entry_rows, columns=["owner_id", "league_id", "format", "player_id"])
+    memberships = pd.DataFrame(membership_rows, columns=["owner_id", "league_id", "format"])
+    return OwnershipMatrix(entries, memberships)
@@ -0,0 +1,94 @@
+# --------------------
+# Per-league player directory
+#
+# One pass over the league frame gives every player's row keyed by Sleeper id, the labels
+# the pickers show, each owner's players in KTC order and a sorted token list for
+# type-ahead search. Built once per league state, so reruns don't iterate the frame to
+# rebuild drop-downs, and selections are Sleeper ids (two players can share a name).
+# --------------------
+from bisect import bisect_left
+
+from name_index import normalize_name
+
+
+class PlayerDirectory:
+    """
+    League frame rows by Sleeper id, in KTC order, with labels and a prefix search over names.
+    """
+
+    def __init__(self, df):
+        records = df.sort_values("KTC_Value", ascending=False, kind="stable").to_dict(orient="records")
+        self.rows = {r["Sleeper_Player_ID"]: r for r in records}
+        self.order = list(self.rows)
+        self.labels = {
+            pid: f"{r['Player_Sleeper']} ({r['Position']}, {r['Team_Owner']}, KTC: {r['KTC_Value']})"
+            for pid, r in self.rows.items()
+        }
+        self.short_labels = {pid: f"{r['Player_Sleeper']} ({r['Position']}, KTC: {r['KTC_Value']})" for pid, r in self.rows.items()}
+        self.by_owner = {}
+        for pid, r in self.rows.items():
+            self.by_owner.setdefault(str(r["Team_Owner"]).lower(), []).append(pid)
+        # (token, rank) pairs, sorted: every name token is a prefix-searchable entry
+        rank = {pid: i for i, pid in enumerate(self.order)}
+        self._tokens = sorted(
+            (token, rank[pid]) for pid, r in self.rows.items() for token in normalize_name(r["Player_Sleeper"]).split()
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, pid):
+        return pid in self.rows
+
+    def row(self, pid):
+        return self.rows[pid]
+
+    def name(self, pid):
+        return self.rows[pid]["Player_Sleeper"]
+
+    def label(self, pid):
+        return self.labels.get(pid, str(pid))
+
+    def short_label(self, pid):
+        return self.short_labels.get(pid, str(pid))
+
+    def ids(self, owner=None, exclude_owner=None, positions=None):
+        """
+        Sleeper ids in KTC order, optionally only one owner's (or everyone else's) and only some positions.
+        """
+        pids = self.by_owner.get(str(owner).lower(), []) if owner is not None else self.order
+        if exclude_owner is not None:
+            exclude_owner = str(exclude_owner).lower()
+            pids = [pid for pid in pids if str(self.rows[pid]["Team_Owner"]).lower() != exclude_owner]
+        if positions is not None:
+            pids = [pid for pid in pids if self.rows[pid]["Position"] in positions]
+        return pids
+
+    def _prefix_ranks(self, prefix):
+        ranks = set()
+        i = bisect_left(self._tokens, (prefix, -1))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(prefix):
+            ranks.add(self._tokens[i][1])
+            i += 1
+        return ranks
+
+    def search(self, query, ids=None, limit=None):
+        """
+        Ids whose name has a token starting with every token of `query` ("ja chas" finds
+        Ja'Marr Chase), best KTC first. `ids` limits the answer to those players.
+        """
+        tokens = normalize_name(query).split()
+        if not tokens:
+            matches = self.order
+        else:
+            ranks = None
+            for token in tokens:
+                found = self._prefix_ranks(token)
+                ranks = found if ranks is None else ranks & found
+                if not ranks:
+                    return []
+            matches = [self.order[i] for i in sorted(ranks)]
+        if ids is not None:
+            allowed = set(ids)
+            matches = [pid for pid in matches if pid in allowed]
+        return matches[:limit] if limit else matches
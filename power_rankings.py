@@ -0,0 +1,207 @@
+# --------------------
+# League power rankings, with what-if trades
+#
+# One grouped aggregation over the league frame gives every team's total, starter and
+# per-position KTC value, ranked across the league. A proposed trade only changes the teams
+# that send or receive something, so what_if() rebuilds those two or three teams' rows from
+# their rosters and moves everyone else's rank by how many of the changed teams passed them
+# (or fell behind them), instead of aggregating and ranking the league again.
+# --------------------
+import numpy as np
+import pandas as pd
+
+POSITIONS = ("QB", "RB", "WR", "TE")
+COLUMNS = ("Total", "Starters") + POSITIONS + ("Picks",)
+_POSITION_COLUMN = {pos: COLUMNS.index(pos) for pos in POSITIONS}
+_POSITION_COLUMN["PICK"] = COLUMNS.index("Picks")
+
+
+def _ranks(values):
+    """
+    1 + how many teams are worth strictly more, per column (ties share a rank).
+    """
+    return 1 + (values[None, :, :] > values[:, None, :]).sum(axis=1)
+
+
+class PowerRankings:
+    """
+    Every team's value by COLUMNS and its league rank in each. Teams are keyed by Team_Owner.
+    """
+
+    def __init__(self, df):
+        frame = df[["Sleeper_Player_ID", "Team_Owner", "Position", "KTC_Value", "Is_Starter"]].copy()
+        frame["KTC_Value"] = pd.to_numeric(frame["KTC_Value"], errors="coerce").fillna(0)
+        frame["Is_Starter"] = frame["Is_Starter"].fillna(False).astype(bool)
+        frame["Starter_Value"] = frame["KTC_Value"].where(frame["Is_Starter"], 0)
+
+        # The one pass over the league: value and starter value per team and position
+        grouped = frame.groupby(["Team_Owner", "Position"])[["KTC_Value", "Starter_Value"]].sum()
+        by_position = grouped["KTC_Value"].unstack(fill_value=0)
+        self.owners = list(by_position.index)
+        self.index = {owner: i for i, owner in enumerate(self.owners)}
+        self.values = np.zeros((len(self.owners), len(COLUMNS)))
+        self.values[:, 0] = by_position.sum(axis=1).to_numpy()
+        self.values[:, 1] = grouped["Starter_Value"].groupby(level=0).sum().reindex(self.owners).to_numpy()
+        for pos, col in _POSITION_COLUMN.items():
+            if pos in by_position:
+                self.values[:, col] = by_position[pos].to_numpy()
+        self.ranks = _ranks(self.values)
+
+        # What what_if() needs to rebuild one team: its players, and each player's row
+        self.players = {
+            pid: (owner, pos, value, starter)
+            for pid, owner, pos, value, starter in zip(
+                frame["Sleeper_Player_ID"], frame["Team_Owner"], frame["Position"], frame["KTC_Value"], frame["Is_Starter"]
+            )
+        }
+        self.rosters = {owner: [] for owner in self.owners}
+        for pid, (owner, *_) in self.players.items():
+            self.rosters[owner].append(pid)
+
+    def __len__(self):
+        return len(self.owners)
+
+    def owner(self, name):
+        """
+        The Team_Owner spelled as the frame has it, matched case-insensitively; None if unknown.
+        """
+        lowered = str(name).lower()
+        return next((owner for owner in self.owners if str(owner).lower() == lowered), None)
+
+    def table(self, values=None, ranks=None):
+        """
+        One row per team, best total first: each column's value and its rank.
+        """
+        values = self.values if values is None else values
+        ranks = self.ranks if ranks is None else ranks
+        data = {"Team": self.owners}
+        for col, name in enumerate(COLUMNS):
+            data[name] = values[:, col].round().astype(int)
+            data[f"{name} Rank"] = ranks[:, col]
+        return pd.DataFrame(data).sort_values(["Total Rank", "Team"]).reset_index(drop=True)
+
+    def _team_row(self, owner, pids):
+        """
+        One team's COLUMNS from its player ids. The lineup keeps its shape: each position
+        starts as many players as it does now, chosen from the current starters still on the
+        roster plus anyone arriving (best first), with the bench filling any slot left open.
+        """
+        row = np.zeros(len(COLUMNS))
+        slots, contenders, bench = {}, {}, {}
+        for pid in pids:
+            from_owner, pos, value, starter = self.players[pid]
+            row[0] += value
+            if pos in _POSITION_COLUMN:
+                row[_POSITION_COLUMN[pos]] += value
+            if from_owner == owner:
+                if starter:
+                    slots[pos] = slots.get(pos, 0) + 1
+                    contenders.setdefault(pos, []).append(value)
+                else:
+                    bench.setdefault(pos, []).append(value)
+            else:
+                contenders.setdefault(pos, []).append(value)
+        # Starting slots the team had at each position before the trade (departed starters included)
+        for pid in self.rosters.get(owner, ()):
+            _, pos, _, starter = self.players[pid]
+            if starter and pid not in pids:
+                slots[pos] = slots.get(pos, 0) + 1
+        for pos, count in slots.items():
+            lineup = sorted(contenders.get(pos, []), reverse=True)[:count]
+            lineup += sorted(bench.get(pos, []), reverse=True)[:count - len(lineup)]
+            row[1] += sum(lineup)
+        return row
+
+    def what_if(self, moves):
+        """
+        The league after `moves` ({player_id: receiving Team_Owner}): a WhatIf with every
+        team's values and ranks, rebuilt only for the teams that send or receive a player.
+        """
+        moves = {pid: to for pid, to in moves.items() if pid in self.players and to in self.index}
+        affected = {self.players[pid][0] for pid in moves} | set(moves.values())
+        rows = {
+            owner: self._team_row(owner, [
+                pid for pid in self.rosters[owner] if pid not in moves
+            ] + [pid for pid, to in moves.items() if to == owner])
+            for owner in affected
+        }
+        idx = np.array([self.index[owner] for owner in affected], dtype=int)
+        old = self.values[idx]
+        new = np.array([rows[owner] for owner in affected]).reshape(len(idx), len(COLUMNS))
+        values = self.values.copy()
+        values[idx] = new
+        # Unchanged teams only move past (or behind) the affected ones
+        ranks = (self.ranks
+                 + (new[:, None, :] > self.values[None, :, :]).sum(axis=0)
+                 - (old[:, None, :] > self.values[None, :, :]).sum(axis=0))
+        ranks[idx] = 1 + (values[None, :, :] > new[:, None, :]).sum(axis=1)
+        return WhatIf(self, values, ranks, [self.owners[i] for i in sorted(idx)])
+
+    def rank_impacts(self, trades, owner, columns=("Total", "Starters")):
+        """
+        One row per candidate trade ({label: moves}), for comparing many proposals at once:
+        `owner`'s rank in each of `columns` after the trade ("+2" is up two places), and the
+        same for the other teams involved.
+        """
+        rows = []
+        for label, moves in trades.items():
+            result = self.what_if(moves)
+            row = {"Trade": label}
+            for name in columns:
+                row[f"{name} Rank"] = result.rank_change(owner, name)
+            row["Other Teams"] = "; ".join(
+                f"{other}: " + ", ".join(f"{name.lower()} {result.rank_change(other, name)}" for name in columns)
+                for other in result.affected if other != owner
+            )
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+class WhatIf:
+    """
+    The league's values and ranks after one proposed trade, next to the current ones.
+    """
+
+    def __init__(self, rankings, values, ranks, affected):
+        self.rankings = rankings
+        self.values = values
+        self.ranks = ranks
+        self.affected = affected
+
+    def rank(self, owner, column="Total", before=False):
+        ranks = self.rankings.ranks if before else self.ranks
+        return int(ranks[self.rankings.index[owner], COLUMNS.index(column)])
+
+    def rank_change(self, owner, column="Total"):
+        """
+        "3 (+1)": the rank after the trade and how many places it moved; just "3" if it held.
+        """
+        before, after = self.rank(owner, column, before=True), self.rank(owner, column)
+        return f"{after} ({before - after:+d})" if after != before else str(after)
+
+    def table(self):
+        return self.rankings.table(self.values, self.ranks)
+
+    def changes(self):
+        """
+        The affected teams only: each column before and after, with the rank change.
+        """
+        rows = []
+        for owner in self.affected:
+            i = self.rankings.index[owner]
+            row = {"Team": owner}
+            for col, name in enumerate(COLUMNS):
+                before, after = self.rankings.values[i, col], self.values[i, col]
+                row[name] = f"{int(round(after)):,} ({int(round(after - before)):+,})"
+                row[f"{name} Rank"] = f"{self.ranks[i, col]} ({self.rankings.ranks[i, col] - self.ranks[i, col]:+d})"
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def swap(owner_a, send_a, owner_b, send_b):
+    """
+    Moves for a two-team trade: `owner_a` sends `send_a` to `owner_b` and gets `send_b` back.
+    """
+    moves = {pid: owner_b for pid in send_a}
+    moves.update({pid: owner_a for pid in send_b})
+    return moves
@@ -0,0 +1,287 @@
+# --------------------
+# Cache backends shared across app replicas
+#
+# League snapshots, transaction pages and the Sleeper player pool are kept in a backend
+# chosen by URL, so several replicas on one host can share them instead of each repeating
+# the same crawls into its own cold cache:
+#
+#   sqlite:///cache.sqlite           one SQLite file in WAL mode (relative path; four slashes,
+#   sqlite:////shared/cache.sqlite   as here, for an absolute one on a volume every replica
+#                                    mounts); readers never block the writer
+#   memory://                        this process only (tests, or a single replica)
+#
+# get_or_fetch() holds a cross-process lock while it fetches a missing entry, so when two
+# replicas miss at once one of them asks Sleeper and the other waits and reads the answer.
+# Locks are leases in the same database: a replica that dies holding one only blocks the
+# others until the lease runs out. Nothing here needs a cache service; WAL needs every
+# process on the same host (not a network filesystem).
+#
+# Replicas pick the backend with TRADE_CACHE_URL; the default is a file in the working directory.
+# --------------------
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+CACHE_URL_ENV = "TRADE_CACHE_URL"
+DEFAULT_CACHE_URL = "sqlite:///shared_cache.sqlite"
+LOCK_LEASE_SECONDS = 120  # a fetch holding a lock longer than this is presumed dead
+LOCK_POLL_SECONDS = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,         -- pickled
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class CacheBackend:
+    """
+    (namespace, key) -> value, with the time it was stored. Subclasses provide _read, _write,
+    delete and _try_lock / _unlock; values go in pickled, so a reader always gets its own copy.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.peer_fills = 0  # misses another process filled while we waited on its lock
+        self.lock_waits = 0
+        self.errors = 0
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, namespace, key):
+        """
+        (value, stored_at), or None if nothing is stored (or it can't be read).
+        """
+        try:
+            row = self._read(namespace, str(key))
+            return None if row is None else (pickle.loads(row[0]), row[1])
+        except Exception as e:
+            self._count("errors")
+            print(f"Could not read {namespace}/{key} from the shared cache: {e}")
+            return None
+
+    def put(self, namespace, key, value):
+        try:
+            self._write(namespace, str(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.clock())
+        except Exception as e:
+            self._count("errors")
+            print(f"Could not write {namespace}/{key} to the shared cache: {e}")
+
+    @contextmanager
+    def lock(self, namespace, key, lease=LOCK_LEASE_SECONDS):
+        """
+        Cross-process lock on one entry, waiting at most `lease` seconds for it (after that
+        the caller goes ahead unlocked rather than hang). Yields True if it holds the lock.
+        """
+        name = f"{namespace}/{key}"
+        holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        deadline = time.monotonic() + lease
+        held = self._try_lock(name, holder, lease)
+        if not held:
+            self._count("lock_waits")
+        while not held and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            held = self._try_lock(name, holder, lease)
+        try:
+            yield held
+        finally:
+            if held:
+                self._unlock(name, holder)
+
+    def get_or_fetch(self, namespace, key, fetch, ttl=None):
+        """
+        The stored value if it is younger than `ttl` seconds (None = never stale), otherwise
+        fetch()'s answer, stored for everyone. Only one process fetches a given entry at a
+        time; the rest wait and read what it stored. A None answer isn't stored, and falls
+        back to the stale value when there is one.
+        """
+        hit = self.get(namespace, key)
+        if hit is not None and (ttl is None or self.clock() - hit[1] < ttl):
+            self._count("hits")
+            return hit[0]
+        with self.lock(namespace, key):
+            fresh = self.get(namespace, key)
+            if fresh is not None and (hit is None or fresh[1] > hit[1]) and (ttl is None or self.clock() - fresh[1] < ttl):
+                self._count("peer_fills")
+                return fresh[0]
+            self._count("misses")
+            value = fetch()
+            if value is not None:
+                self.put(namespace, key, value)
+                return value
+        return hit[0] if hit is not None else None
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "backend": self.url,
+                "hits": self.hits,
+                "misses": self.misses,
+                "filled_by_other_replicas": self.peer_fills,
+                "lock_waits": self.lock_waits,
+                "errors": self.errors,
+            }
+
+
+class MemoryBackend(CacheBackend):
+    """
+    This process only: the same interface with no sharing, for tests or a single replica.
+    """
+
+    url = "memory://"
+
+    def __init__(self, clock=time.time):
+        super().__init__(clock)
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _read(self, namespace, key):
+        with self._lock:
+            return self._entries.get((namespace, key))
+
+    def _write(self, namespace, key, blob, stored_at):
+        with self._lock:
+            self._entries[(namespace, key)] = (blob, stored_at)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._entries.pop((namespace, str(key)), None)
+
+    def _try_lock(self, name, holder, lease):
+        with self._lock:
+            current = self._locks.get(name)
+            if current is not None and current[1] > time.time():
+                return False
+            self._locks[name] = (holder, time.time() + lease)
+            return True
+
+    def _unlock(self, name, holder):
+        with self._lock:
+            if self._locks.get(name, (None,))[0] == holder:
+                del self._locks[name]
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    One SQLite file in WAL mode, shared by every process that opens it; one connection per thread.
+    """
+
+    def __init__(self, path, clock=time.time):
+        super().__init__(clock)
+        self.path = path
+        self.url = f"sqlite:///{path}"
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")  # persistent: set once for the file
+        conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; transactions are opened explicitly where they matter
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _read(self, namespace, key):
+        return self._connect().execute(
+            "SELECT value, stored_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+
+    def _write(self, namespace, key, blob, stored_at):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, blob, stored_at)
+        )
+
+    def delete(self, namespace, key):
+        self._connect().execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, str(key)))
+
+    def _try_lock(self, name, holder, lease):
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so check-and-claim is atomic across processes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute("SELECT expires_at FROM locks WHERE name = ?", (name,)).fetchone()
+                if row is not None and row[0] > now:
+                    conn.execute("COMMIT")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO locks (name, holder, expires_at) VALUES (?, ?, ?)", (name, holder, now + lease)
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._count("errors")
+            print(f"Could not take shared cache lock {name}: {e}")
+            return False
+
+    def _unlock(self, name, holder):
+        try:
+            self._connect().execute("DELETE FROM locks WHERE name = ? AND holder = ?", (name, holder))
+        except sqlite3.Error as e:
+            print(f"Could not release shared cache lock {name}: {e}")
+
+
+def open_backend(url):
+    """
+    The backend for a cache URL: sqlite:///path or memory://.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url == "memory://":
+        return MemoryBackend()
+    raise ValueError(f"Unknown cache backend {url!r} (expected sqlite:///path or memory://)")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def configure(url):
+    """
+    Points this process's shared cache at another backend (for command-line tools).
+    """
+    global _shared
+    with _shared_lock:
+        _shared = open_backend(url)
+    return _shared
+
+
+def shared_cache():
+    """
+    This process's backend, opened from TRADE_CACHE_URL on first use.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = open_backend(os.environ.get(CACHE_URL_ENV, DEFAULT_CACHE_URL))
+        return _shared
@@ -0,0 +1,157 @@
+# --------------------
+# Sleeper API client: one process-wide request budget shared by every session
+# --------------------
+import contextvars
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+
+# Sleeper asks clients to stay under 1000 API calls per minute (per IP)
+SLEEPER_CALLS_PER_MINUTE = 1000
+SLEEPER_BURST = 20
+RATE_LIMIT_PAUSE_SECONDS = 5
+
+# Priority classes, highest first
+INTERACTIVE = 0   # something a user is waiting on right now (user, league, rosters)
+CRAWL = 1         # tab-level fan-out (trade history weeks, portfolio, league breakdown)
+BACKGROUND = 2    # warmup / batch jobs nobody is watching
+PRIORITY_NAMES = {INTERACTIVE: "interactive", CRAWL: "crawl", BACKGROUND: "background"}
+
+_current_session = contextvars.ContextVar("sleeper_session", default=None)
+
+
+def set_session(session_id):
+    """
+    Tags requests made from this thread/context with a session id for fair sharing.
+    """
+    _current_session.set(session_id)
+
+
+def current_session():
+    return _current_session.get()
+
+
+class RequestScheduler:
+    """
+    Token bucket refilled at the Sleeper rate limit.
+
+    Waiting requests are granted strictly by priority class. Within a class,
+    sessions are served round-robin, so one session's crawl of 200 leagues
+    can't hold up another session's crawl.
+    """
+
+    def __init__(self, calls_per_minute=SLEEPER_CALLS_PER_MINUTE, burst=SLEEPER_BURST, clock=time.monotonic):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._cond = threading.Condition()
+        self._waiting = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+        self._tickets = itertools.count()
+        self._stats = {
+            priority: {"granted": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+        self.rate_limited = 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _next_ticket(self):
+        for priority in sorted(self._waiting):
+            sessions = self._waiting[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def acquire(self, priority=INTERACTIVE, session=None):
+        """
+        Blocks until this request may be sent.
+        """
+        ticket = next(self._tickets)
+        started = self.clock()
+        with self._cond:
+            sessions = self._waiting[priority]
+            sessions.setdefault(session, deque()).append(ticket)
+            while True:
+                self._refill()
+                is_next = self._next_ticket() == ticket
+                if is_next and self.tokens >= 1:
+                    break
+                if is_next:
+                    self._cond.wait(timeout=(1 - self.tokens) / self.rate)
+                else:
+                    self._cond.wait(timeout=1.0)
+
+            self.tokens -= 1
+            queue = sessions[session]
+            queue.popleft()
+            if queue:
+                sessions.move_to_end(session)  # round-robin between sessions
+            else:
+                del sessions[session]
+
+            waited = self.clock() - started
+            stats = self._stats[priority]
+            stats["granted"] += 1
+            stats["wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+            self._cond.notify_all()
+
+    def pause(self, seconds=RATE_LIMIT_PAUSE_SECONDS):
+        """
+        Empties the bucket for `seconds` after Sleeper answers 429.
+        """
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+            self.rate_limited += 1
+
+    def metrics(self):
+        with self._cond:
+            self._refill()
+            per_class = {}
+            for priority, name in PRIORITY_NAMES.items():
+                sessions = self._waiting[priority]
+                stats = self._stats[priority]
+                per_class[name] = {
+                    "queued": sum(len(q) for q in sessions.values()),
+                    "sessions_waiting": len(sessions),
+                    "granted": stats["granted"],
+                    "avg_wait_ms": round(stats["wait_seconds"] / stats["granted"] * 1000, 1) if stats["granted"] else 0.0,
+                    "max_wait_ms": round(stats["max_wait_seconds"] * 1000, 1),
+                }
+            return {
+                "tokens_available": round(max(self.tokens, 0), 1),
+                "calls_per_minute": round(self.rate * 60),
+                "rate_limited": self.rate_limited,
+                "queues": per_class,
+            }
+
+
+scheduler = RequestScheduler()
+
+
+def sleeper_get(url, priority=INTERACTIVE, session=None, timeout=10, **kwargs):
+    """
+    requests.get through the shared scheduler. Retries once after a 429.
+    """
+    if session is None:
+        session = current_session()
+    scheduler.acquire(priority, session)
+    response = requests.get(url, timeout=timeout, **kwargs)
+    if response.status_code == 429:
+        scheduler.pause()
+        scheduler.acquire(priority, session)
+        response = requests.get(url, timeout=timeout, **kwargs)
+    return response
+
+
+def get_json(url, priority=INTERACTIVE, session=None):
+    return sleeper_get(url, priority, session).json()
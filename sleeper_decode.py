@@ -0,0 +1,350 @@
+# --------------------
+# Field-selective decoding of large Sleeper payloads
+#
+# /players/nfl is several MB of JSON with dozens of fields per player, and the app reads
+# three of them. Instead of response.json() building every player's full dict at once, the
+# response is decoded as it streams in: the top-level object (or array) is walked here and
+# each member goes through the C scanner (JSONDecoder.raw_decode) on its own, so only one
+# player's dict exists at a time and what is kept is a compact PlayerRecord. Transaction
+# pages are walked the same way, keeping only trades.
+#
+# Usage (benchmark against json.loads):
+#   python sleeper_decode.py [--payload players_nfl.json] [--players 11000]
+# --------------------
+import argparse
+import codecs
+import json
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+from sleeper_client import INTERACTIVE, sleeper_get
+
+PLAYERS_URL = "https://api.sleeper.app/v1/players/nfl"
+PLAYER_FIELDS = ("full_name", "position", "team")  # everything the app reads from the player pool
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class PlayerRecord:
+    """
+    The player-pool fields the app uses, with the dict-style access the pool has always had:
+    record["full_name"], record.get("team", ""). A field Sleeper left out stays missing
+    (get() returns the default); one it sent as null is None, as before.
+    """
+
+    __slots__ = PLAYER_FIELDS
+
+    def __init__(self, fields):
+        for key in PLAYER_FIELDS:
+            if key in fields:
+                value = fields[key]
+                # Positions and teams repeat thousands of times; keep one copy of each
+                setattr(self, key, sys.intern(value) if isinstance(value, str) and key != "full_name" else value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in PLAYER_FIELDS else default
+
+    def __getitem__(self, key):
+        if key in PLAYER_FIELDS and hasattr(self, key):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in PLAYER_FIELDS and hasattr(self, key)
+
+    def __repr__(self):
+        return f"PlayerRecord({ {key: getattr(self, key) for key in PLAYER_FIELDS if hasattr(self, key)} })"
+
+
+def compact_players(player_pool):
+    """
+    An already-parsed /players/nfl answer as PlayerRecords (for fetchers that hand back JSON).
+    """
+    return {pid: PlayerRecord(player) for pid, player in (player_pool or {}).items()}
+
+
+# --------------------
+# Streaming walker
+# --------------------
+_skip = re.compile(r"[ \t\n\r]*").match
+_scan = _decoder.scan_once  # the C scanner behind raw_decode, without its Python wrapper
+
+
+class _TextStream:
+    """
+    A growing text buffer over an iterator of UTF-8 byte chunks; consumed text is dropped.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.done = False
+
+    def more(self):
+        """
+        Appends the next chunk; False once the stream is exhausted.
+        """
+        if self.done:
+            return False
+        text = ""
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                break
+        else:
+            text = self._utf8.decode(b"", final=True)
+            self.done = True
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return bool(text)
+
+    def peek(self):
+        """
+        Next non-whitespace character (not consumed), or None at the end of the stream.
+        """
+        while True:
+            self.pos = _skip(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decodes the next JSON value, pulling more chunks until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _scan(self.buf, self.pos)
+            except (json.JSONDecodeError, StopIteration):
+                # Cut off mid-value: fetch more and rescan (a member is small next to a chunk)
+                if not self.more():
+                    raise ValueError("JSON stream ended inside a value") from None
+                continue
+            # A number running into the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.done and self.more():
+                continue
+            self.pos = end
+            return value
+
+
+def _members(stream, close):
+    while True:
+        char = stream.peek()
+        if char == close:
+            stream.pos += 1
+            return
+        if char == ",":
+            stream.pos += 1
+            continue
+        if char is None:
+            raise ValueError("JSON stream ended inside a container")
+        yield
+
+
+def iter_object(chunks):
+    """
+    (key, value) for each member of a streamed top-level JSON object; nothing for null.
+    """
+    stream = _TextStream(chunks)
+    if stream.peek() != "{":
+        if stream.value() is not None:
+            raise ValueError("expected a JSON object")
+        return
+    stream.pos += 1
+    for _ in _members(stream, "}"):
+        key = stream.value()
+        stream.expect(":")
+        yield key, stream.value()
+
+
+def iter_array(chunks):
+    """
+    Each item of a streamed top-level JSON array; nothing for null.
+    """
+    stream = _TextStream(chunks)
+    if stream.peek() != "[":
+        if stream.value() is not None:
+            raise ValueError("expected a JSON array")
+        return
+    stream.pos += 1
+    for _ in _members(stream, "]"):
+        yield stream.value()
+
+
+def decode_players(chunks):
+    """
+    {player_id: PlayerRecord} from the byte chunks of a /players/nfl response.
+    """
+    return {pid: PlayerRecord(player) for pid, player in iter_object(chunks) if isinstance(player, dict)}
+
+
+# --------------------
+# Fetchers
+# --------------------
+def get_players(priority=INTERACTIVE, session=None):
+    """
+    The Sleeper player pool as {player_id: PlayerRecord}, decoded while it downloads.
+    None if Sleeper doesn't answer 200.
+    """
+    response = sleeper_get(PLAYERS_URL, priority, session, stream=True)
+    try:
+        if response.status_code != 200:
+            return None
+        return decode_players(response.iter_content(CHUNK_SIZE))
+    finally:
+        response.close()
+
+
+def get_trades(url, priority=INTERACTIVE, session=None):
+    """
+    Only the trades from one /transactions/{week} page (waivers and free-agent moves are
+    decoded one at a time and dropped). None if Sleeper doesn't answer 200.
+    """
+    response = sleeper_get(url, priority, session, stream=True)
+    try:
+        if response.status_code != 200:
+            return None
+        return [
+            t for t in iter_array(response.iter_content(CHUNK_SIZE))
+            if isinstance(t, dict) and t.get("type") == "trade"
+        ]
+    finally:
+        response.close()
+
+
+# --------------------
+# Benchmark
+# --------------------
+def synthetic_players(count, seed=7):
+    """
+    A /players/nfl-shaped payload: roughly the fields and sizes Sleeper sends per player.
+    """
+    rng = random.Random(seed)
+    teams = ["ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB", "HOU", "IND", None]
+    positions = ["QB", "RB", "WR", "TE", "K", "DEF", "OL", "DL", "LB", "DB"]
+    players = {}
+    for i in range(count):
+        first, last = f"First{i}", f"Last{rng.randint(0, 99999)}"
+        position = rng.choice(positions)
+        players[str(1000 + i)] = {
+            "player_id": str(1000 + i), "first_name": first, "last_name": last, "full_name": f"{first} {last}",
+            "search_first_name": first.lower(), "search_last_name": last.lower(), "search_full_name": f"{first}{last}".lower(),
+            "search_rank": rng.randint(1, 9999999), "position": position, "fantasy_positions": [position],
+            "team": rng.choice(teams), "team_abbr": None, "team_changed_at": None, "number": rng.randint(0, 99),
+            "depth_chart_position": position, "depth_chart_order": rng.randint(1, 4), "status": "Active",
+            "injury_status": None, "injury_body_part": None, "injury_notes": None, "injury_start_date": None,
+            "practice_participation": None, "practice_description": None, "news_updated": rng.randint(10**12, 2 * 10**12),
+            "age": rng.randint(21, 38), "birth_date": "1999-01-01", "birth_city": None, "birth_state": None,
+            "birth_country": None, "height": "74", "weight": str(rng.randint(180, 320)), "college": "State",
+            "high_school": None, "years_exp": rng.randint(0, 15), "hashtag": f"#{first}{last}-NFL-FA-0",
+            "active": True, "sport": "nfl", "espn_id": rng.randint(1, 10**7), "yahoo_id": rng.randint(1, 10**5),
+            "rotowire_id": rng.randint(1, 10**5), "rotoworld_id": None, "sportradar_id": f"{rng.getrandbits(128):032x}",
+            "stats_id": None, "fantasy_data_id": rng.randint(1, 10**5), "gsis_id": None, "swish_id": None,
+            "pandascore_id": None, "oddsjam_id": None, "opta_id": None, "competitions": [],
+            "metadata": {"channel_id": str(rng.getrandbits(60)), "rookie_year": "2020"},
+        }
+    return json.dumps(players).encode("utf-8")
+
+
+def chunks_of(payload):
+    return (payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE))
+
+
+def paced_chunks(payload, mb_per_second):
+    """
+    The payload's chunks arriving at a fixed rate, like a download: a background thread
+    delivers them on schedule while the consumer decodes whatever has arrived.
+    """
+    arrived = queue.Queue()
+
+    def deliver():
+        started = time.perf_counter()
+        for sent, chunk in enumerate(chunks_of(payload), start=1):
+            time.sleep(max(0.0, started + sent * CHUNK_SIZE / (mb_per_second * 2**20) - time.perf_counter()))
+            arrived.put(chunk)
+        arrived.put(None)
+
+    threading.Thread(target=deliver, daemon=True).start()
+    while (chunk := arrived.get()) is not None:
+        yield chunk
+
+
+def best_time(decode, make_chunks, runs):
+    times = []
+    for _ in range(runs):
+        chunks = make_chunks()
+        started = time.perf_counter()
+        decode(chunks)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def memory_use(decode, payload):
+    """
+    (peak MB while decoding, MB still held by the result).
+    """
+    tracemalloc.start()
+    result = decode(chunks_of(payload))
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 2**20, held / 2**20
+
+
+def benchmark(payload, runs=3, mb_per_second=10):
+    contenders = {
+        # What response.json() does: wait for the whole body, then every field of every player
+        "response.json()": lambda chunks: json.loads(b"".join(chunks).decode("utf-8")),
+        "streamed PlayerRecords": decode_players,
+    }
+    rows = []
+    for name, decode in contenders.items():
+        peak, held = memory_use(decode, payload)
+        rows.append({
+            "decoder": name,
+            "decode_s": round(best_time(decode, lambda: chunks_of(payload), runs), 3),
+            "download_and_decode_s": round(best_time(decode, lambda: paced_chunks(payload, mb_per_second), 1), 3),
+            "peak_mb": round(peak, 1),
+            "held_mb": round(held, 1),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field-selective decoding of /players/nfl.")
+    parser.add_argument("--payload", help="a saved /players/nfl response (defaults to a synthetic one)")
+    parser.add_argument("--players", type=int, default=11000, help="players in the synthetic payload")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mbps", type=float, default=10, help="simulated download speed, MB/s of JSON")
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, "rb") as f:
+            payload = f.read()
+    else:
+        payload = synthetic_players(args.players)
+    print(f"payload: {len(payload) / 2**20:.1f} MB, download simulated at {args.mbps:g} MB/s")
+    print(f"{'decoder':<24} {'decode s':>9} {'download+decode s':>18} {'peak MB':>8} {'held MB':>8}")
+    for row in benchmark(payload, args.runs, args.mbps):
+        print(f"{row['decoder']:<24} {row['decode_s']:>9} {row['download_and_decode_s']:>18} "
+              f"{row['peak_mb']:>8} {row['held_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
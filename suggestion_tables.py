@@ -0,0 +1,335 @@
+# --------------------
+# Precomputed Trade Away / Trade For tables for busy leagues
+#
+# A nightly job runs both searches at the default sliders for every rostered player and
+# stores the finished tables in SQLite. The app answers from there when the sliders are
+# at their defaults and the league's rosters/values still hash the same; anything else
+# falls back to the live search.
+#
+# Usage (e.g. from cron):
+#   python suggestion_tables.py LEAGUE_ID [LEAGUE_ID ...]
+#   python suggestion_tables.py --user SLEEPER_USERNAME
+# --------------------
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import pandas as pd
+
+from league_data import LeagueGraph
+from sleeper_client import BACKGROUND, get_json
+from trade_engine import (
+    CORE_POSITIONS, lineup_minimums, position_counts, movable_players, with_effective_values,
+    top_qb_names, trade_for_packages, trade_away_packages
+)
+
+DEFAULT_TABLES_PATH = "suggestions.sqlite"
+DEFAULT_TOLERANCE = 5
+DEFAULT_QB_PREMIUM = 750
+DEFAULT_MAX_SIZE = 3
+TRADE_FOR_TOP_N = 25   # the 3-for-1 table only shows the best 25
+MEMO_MAX_ENTRIES = 512  # live search results kept in memory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    league_id TEXT NOT NULL,
+    kind TEXT NOT NULL,          -- 'away': owner sells player_id; 'for': owner buys player_id
+    owner TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    tables BLOB NOT NULL,        -- zlib'd JSON {size: [row, ...]}, rows exactly as the app shows them
+    PRIMARY KEY (league_id, kind, owner, player_id)
+);
+CREATE TABLE IF NOT EXISTS builds (
+    league_id TEXT PRIMARY KEY,
+    inputs_hash TEXT NOT NULL,
+    built_at REAL NOT NULL
+);
+"""
+
+
+FRAME_FINGERPRINT_COLUMNS = ["Sleeper_Player_ID", "Team_Owner", "Position", "KTC_Value", "Is_Starter"]
+
+
+def frame_fingerprint(df):
+    """
+    Fingerprint of a league frame's rosters and values: who owns whom, KTC values and starters.
+    Per-session settings (lineup minimums, sliders) are not in it; they go in the search_query().
+    """
+    rows = sorted(map(tuple, df[FRAME_FINGERPRINT_COLUMNS].astype(str).values.tolist()))
+    return hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+def inputs_hash(df, minimums):
+    """
+    Fingerprint of everything the default-slider results depend on: the frame_fingerprint()
+    plus the league's lineup minimums.
+    """
+    payload = json.dumps([frame_fingerprint(df), sorted(minimums.items())])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# --------------------
+# Result tables (shared with the live search so both look identical)
+# --------------------
+def trade_away_rows(offers):
+    tables = {}
+    if 1 in offers:
+        singles = sorted(offers[1], key=lambda p: p["KTC_Value"], reverse=True)
+        tables[1] = [
+            {k: p[k] for k in ["Player_Sleeper", "Position", "Team", "KTC_Value", "Team_Owner"]}
+            for p in singles
+        ]
+    if 2 in offers:
+        pairs = [
+            {
+                "Team_Owner": p1["Team_Owner"],
+                "Player 1": f"{p1['Player_Sleeper']} (KTC: {p1['KTC_Value']})",
+                "Player 2": f"{p2['Player_Sleeper']} (KTC: {p2['KTC_Value']})",
+                "Total Value": p1["Value"] + p2["Value"]
+            }
+            for p1, p2 in offers[2]
+        ]
+        tables[2] = sorted(pairs, key=lambda row: row["Total Value"], reverse=True)
+    return tables
+
+
+def trade_for_rows(offers):
+    tables = {}
+    for size, packages in offers.items():
+        results = []
+        for combo in packages:
+            if size == 1:
+                results.append({
+                    "Player": f"{combo[0]['Player_Sleeper']} (KTC: {combo[0]['KTC_Value']})",
+                    "Position": combo[0]["Position"],
+                    "Total Value": combo[0]["Value"]
+                })
+            else:
+                row = {f"Player {i + 1}": f"{p['Player_Sleeper']} (KTC: {p['KTC_Value']})" for i, p in enumerate(combo)}
+                row["Total Value"] = sum(p["Value"] for p in combo)
+                results.append(row)
+        results = sorted(results, key=lambda row: row["Total Value"], reverse=True)
+        tables[size] = results[:TRADE_FOR_TOP_N] if size == 3 else results
+    return tables
+
+
+# --------------------
+# Storage
+# --------------------
+class SuggestionTables:
+    def __init__(self, path=DEFAULT_TABLES_PATH):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def lookup(self, league_id, current_hash, kind, owner, player_id):
+        """
+        {size: rows} if tonight's build covers this exact league state, else None.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            conn = self._connect()
+            try:
+                build = conn.execute("SELECT inputs_hash FROM builds WHERE league_id = ?", (str(league_id),)).fetchone()
+                if build is None or build[0] != current_hash:
+                    return None
+                row = conn.execute(
+                    "SELECT tables FROM suggestions WHERE league_id = ? AND kind = ? AND owner = ? AND player_id = ?",
+                    (str(league_id), kind, owner, str(player_id))
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Could not read precomputed suggestions: {e}")
+            return None
+        if row is None:
+            return None
+        return {int(size): rows for size, rows in json.loads(zlib.decompress(row[0])).items()}
+
+    def replace_league(self, league_id, current_hash, entries):
+        """
+        Swaps in a league's new tables in one transaction. entries: (kind, owner, player_id, tables).
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM suggestions WHERE league_id = ?", (str(league_id),))
+                conn.executemany(
+                    "INSERT INTO suggestions (league_id, kind, owner, player_id, tables) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (str(league_id), kind, owner, str(player_id), zlib.compress(json.dumps(tables, default=int).encode("utf-8")))
+                        for kind, owner, player_id, tables in entries
+                    )
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO builds (league_id, inputs_hash, built_at) VALUES (?, ?, ?)",
+                    (str(league_id), current_hash, time.time())
+                )
+        finally:
+            conn.close()
+
+
+# --------------------
+# Live search results (any sliders), remembered until the league's rosters change
+# --------------------
+def search_query(kind, owner, player_ids, tolerance, qb_premium, max_size, blocked_ids=(), minimums=None):
+    """
+    Hashable description of one live search; player_ids are the players sold ("away"),
+    the target ("for") or the package offered to two other teams ("three_team"), and
+    minimums the lineup minimums it enforced ({} or None for none).
+    """
+    return (
+        kind, str(owner), tuple(sorted(str(pid) for pid in player_ids)),
+        int(tolerance), int(qb_premium), int(max_size), tuple(sorted(str(pid) for pid in blocked_ids)),
+        tuple(sorted((minimums or {}).items()))
+    )
+
+
+class SuggestionMemo:
+    """
+    Bounded LRU of live search results keyed by (league, roster hash, search_query()).
+
+    The roster hash is frame_fingerprint() of the league frame, so any change to ownership, values
+    or starters is a different key; settings that differ between sessions (lineup minimums)
+    are part of the query instead. The first lookup that sees a league under a new hash also
+    drops everything cached for its old one.
+    """
+
+    def __init__(self, max_entries=MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._league_hash = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def _check_hash(self, league_id, roster_hash):
+        if self._league_hash.get(league_id) == roster_hash:
+            return
+        stale = [key for key in self._entries if key[0] == league_id]
+        for key in stale:
+            del self._entries[key]
+        self.invalidated += len(stale)
+        self._league_hash[league_id] = roster_hash
+
+    def get_or_search(self, league_id, roster_hash, query, search):
+        """
+        The remembered result for this league state and query, or search() remembered.
+        """
+        key = (str(league_id), roster_hash, query)
+        with self._lock:
+            self._check_hash(key[0], roster_hash)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = search()
+        with self._lock:
+            # Only keep it if the league hasn't moved on while we searched
+            if self._league_hash.get(key[0]) == roster_hash:
+                self._entries[key] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            looked_up = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / looked_up, 3) if looked_up else None,
+                "invalidated_by_roster_change": self.invalidated,
+            }
+
+
+# --------------------
+# Batch job
+# --------------------
+def precompute_league(df, minimums, tolerance=DEFAULT_TOLERANCE, qb_premium=DEFAULT_QB_PREMIUM, max_size=DEFAULT_MAX_SIZE):
+    """
+    Yields (kind, owner, player_id, tables) for every rostered player: the Trade Away tables for
+    its owner selling it alone, and the Trade For tables for every other owner trying to get it.
+    """
+    players = df.to_dict(orient="records")
+    top_qbs = top_qb_names(players)
+    rosters = {}
+    for p in players:
+        rosters.setdefault(p["Team_Owner"], []).append(p)
+    counts = {owner: position_counts(rows) for owner, rows in rosters.items()}
+    movable = {
+        owner: with_effective_values(movable_players(rows), top_qbs, qb_premium)
+        for owner, rows in rosters.items()
+    }
+
+    for p in players:
+        if p["Position"] in CORE_POSITIONS:
+            offers = trade_away_packages(players, p["Team_Owner"], [p], top_qbs, tolerance, qb_premium, max_size, minimums)
+            yield "away", p["Team_Owner"], p["Sleeper_Player_ID"], trade_away_rows(offers)
+
+        if p["Position"] == "PICK":
+            continue
+        for owner in rosters:
+            if owner == p["Team_Owner"]:
+                continue
+            offers = trade_for_packages(
+                movable[owner], p, tolerance, max_size,
+                counts=counts[owner], minimums=minimums, target_owner_counts=counts[p["Team_Owner"]]
+            )
+            yield "for", owner, p["Sleeper_Player_ID"], trade_for_rows(offers)
+
+
+def build_league(league_id, ktc_df, tables):
+    league = LeagueGraph(league_id, ktc_df, priority=BACKGROUND)
+    df = league.get("frame")
+    if df.empty:
+        return 0
+    minimums = lineup_minimums(league.get("league_info").get("roster_positions", []))
+    entries = list(precompute_league(df, minimums))
+    tables.replace_league(league_id, inputs_hash(df, minimums), entries)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute default-slider trade suggestions for leagues.")
+    parser.add_argument("league_ids", nargs="*")
+    parser.add_argument("--user", help="also build every 2025 league this Sleeper user is in")
+    parser.add_argument("--ktc", default="ktc_values.csv")
+    parser.add_argument("--db", default=DEFAULT_TABLES_PATH)
+    args = parser.parse_args()
+
+    league_ids = list(args.league_ids)
+    if args.user:
+        user = get_json(f"https://api.sleeper.app/v1/user/{args.user}", BACKGROUND)
+        leagues = get_json(f"https://api.sleeper.app/v1/user/{user['user_id']}/leagues/nfl/2025", BACKGROUND) or []
+        league_ids += [lg["league_id"] for lg in leagues if lg["league_id"] not in league_ids]
+    if not league_ids:
+        parser.error("give at least one league id or --user")
+
+    ktc_df = pd.read_csv(args.ktc, encoding="utf-8-sig")
+    tables = SuggestionTables(args.db)
+    for league_id in league_ids:
+        started = time.perf_counter()
+        try:
+            count = build_league(league_id, ktc_df, tables)
+        except Exception as e:
+            print(f"League {league_id}: failed ({e})")
+            continue
+        print(f"League {league_id}: {count} tables in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,44 @@
 import streamlit as st
 import pandas as pd
-import requests
 import traceback
-from itertools import combinations
+import os
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from sleeper_client import (
+    INTERACTIVE, CRAWL, scheduler, set_session, current_session, sleeper_get, get_json
+)
+from ktc_history import DEFAULT_HISTORY_DIR, KTCHistory
+from trade_grading import grade_trades
+from name_index import KTC_POSITIONS, build_ktc_lookup
+from ownership import FORMAT_TYPES, league_format, build_ownership_matrix
+from image_cache import ThumbnailCache
+from metadata_cache import metadata
+from shared_cache import shared_cache
+from player_directory import PlayerDirectory
+from power_rankings import PowerRankings, swap
+from memory_budget import MB, MemoryBudget, budget_mb_from_env, estimate_size
+from league_data import (
+    LeagueGraph, LeagueUnavailable, format_pick_id, load_roster_owners, load_league_roster_records,
+    load_league_snapshot, restore_league_snapshot, save_league_snapshot
+)
+from trade_engine import (
+    package_bonus, lineup_minimums, position_counts, movable_players,
+    with_effective_values, trade_for_packages, trade_away_packages, three_team_trades, league_trade_for_offers, BandIndex,
+    TWO_SIDED_SHAPES, two_sided_trades
+)
+from suggestion_tables import (
+    DEFAULT_TOLERANCE, DEFAULT_QB_PREMIUM, SuggestionMemo, SuggestionTables, frame_fingerprint, inputs_hash, search_query,
+    trade_away_rows, trade_for_rows
+)
+
+# Tag this session's Sleeper requests so the shared scheduler can share the budget fairly
+_script_ctx = get_script_run_ctx()
+session_id = _script_ctx.session_id if _script_ctx else None
+set_session(session_id)
+
+KTC_VALUES_PATH = "ktc_values.csv"
+MEMORY_BUDGET_MB = budget_mb_from_env()  # process-wide cap on league state kept between reruns, across all sessions (TRADE_MEMORY_BUDGET_MB)
 
 DEFAULT_SCORING = {
     "rec": 1.0,              # PPR
@@ -163,405 +198,93 @@ st.markdown("""
 <div id='main-title'>Sleeper Trade Scout</div>
 """, unsafe_allow_html=True)
 
-# --------------------
-# Package Bonus Function (for multi-player trade away)
-# --------------------
-def package_bonus(values):
-    total = sum(values)
-    num_players = len(values)
-
-    if num_players == 1:
-        if total >= 9000: return 3700
-        elif total >= 8500: return 3200
-        elif total >= 8000: return 2900
-        elif total >= 7500: return 2550
-        elif total >= 7000: return 2300
-        elif total >= 6500: return 2100
-        elif total >= 6000: return 1850
-        elif total >= 5000: return 1650
-        elif total >= 4000: return 1300
-        elif total >= 3000: return 1000
-        elif total >= 2000: return 700
-        else: return 0
-    else:
-        penalty = max(0, (num_players - 1) * 400)
-        if total >= 9000: base = 3500
-        elif total >= 8000: base = 2700
-        elif total >= 7000: base = 2200
-        elif total >= 6000: base = 1800
-        elif total >= 5000: base = 1300
-        elif total >= 4000: base = 900
-        elif total >= 3000: base = 600
-        elif total >= 2000: base = 400
-        else: base = 0
-        return base - penalty
-
-# --------------------
-# Dud Bonus Function
-# --------------------
-def dud_bonus(value):
-    if value <= 1000: return -800
-    elif value <= 1500: return -600
-    elif value <= 2000: return -400
-    elif value <= 2500: return -250
-    return 0
-
 # --------------------
 # Trade Value Calculator
 # --------------------
-def calculate_trade_value(players_df, selected_names, top_qbs, qb_premium_setting):
-    selected_rows = players_df[players_df["Player_Sleeper"].isin(selected_names)]
+def calculate_trade_value(players_df, selected_ids, top_qbs, qb_premium_setting):
+    selected_rows = players_df[players_df["Sleeper_Player_ID"].isin(selected_ids)]
     total_ktc = selected_rows["KTC_Value"].sum()
     total_qb_premium = selected_rows.apply(
         lambda row: qb_premium_setting if row["Position"] == "QB" and row["Player_Sleeper"] in top_qbs else 0,
         axis=1
     ).sum()
-    total_bonus = package_bonus(selected_rows["KTC_Value"].tolist()) if len(selected_names) == 1 else 0
+    total_bonus = package_bonus(selected_rows["KTC_Value"].tolist()) if len(selected_ids) == 1 else 0
     adjusted_total = total_ktc + total_qb_premium  # for 1-for-1 use only
     return selected_rows, total_ktc, total_qb_premium, total_bonus, adjusted_total
 
-def get_all_trades_from_league(league_id):
-    all_trades = []
-    current_league_id = league_id
-    visited = set()
-    pick_owners = {}
+# --------------------
+# Memory budget shared by every session; least recently used league state goes first
+# --------------------
+@st.cache_resource(show_spinner=False)
+def load_memory_budget():
+    return MemoryBudget(MEMORY_BUDGET_MB * MB)
 
-    # -- Try fetching users
-    try:
-        user_response = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users")
-        user_response.raise_for_status()
-        league_users = user_response.json()
-    except Exception as e:
-        print(f"Failed to get league users: {e}")
-        return [], {}  # return empty trades and pick map
+memory = load_memory_budget()
 
-    user_map = {user["user_id"]: user["display_name"] for user in league_users}
+# This session sat idle long enough to be evicted: drop the per-league selections it kept
+if memory.pop_evicted(("session", session_id)):
+    for key in [k for k in st.session_state if str(k).startswith("trade_away_ids_")]:
+        del st.session_state[key]
 
-    # -- Now get rosters
-    try:
-        rosters = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/rosters").json()
-    except Exception as e:
-        print(f"Failed to get rosters: {e}")
-        return [], {}
-
-    roster_map = {str(r["roster_id"]): r["owner_id"] for r in rosters}
-
-    while current_league_id and current_league_id not in visited:
-        visited.add(current_league_id)
-        league_info = requests.get(f"https://api.sleeper.app/v1/league/{current_league_id}").json()
-        if league_info is None or not isinstance(league_info, dict):
-            print(f"Error: Could not fetch league info for league_id={current_league_id}. Response: {league_info}")
-            break  # or return [], {} or handle as needed
-        is_redraft = str(league_info.get("settings", {}).get("type", "")).lower() not in {"dynasty", "2"}
-        season = league_info.get("season", "?")
-
-        for week in range(1, 19):
-            url = f"https://api.sleeper.app/v1/league/{current_league_id}/transactions/{week}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                transactions = response.json()
-                for t in transactions:
-                    if t.get("type") == "trade":
-                        all_trades.append(t)
-                        
-                        adds = t.get("adds") or {}
-                        for pid, roster_id in adds.items():
-                            if pid.startswith("2025_pick_"):
-                                owner_id = roster_map.get(str(roster_id))
-                                if owner_id and owner_id in user_map:
-                                    pick_owners[pid] = user_map[owner_id]
-                                elif pid.split("_")[-1] in user_map:
-                                    generic_uid = pid.split("_")[-1]
-                                    pick_owners[pid] = user_map[generic_uid]
-
-        current_league_id = league_info.get("previous_league_id")
-
-    return all_trades, pick_owners
+# --------------------
+# Sleeper -> KTC name resolution (runs once per KTC snapshot, not on every rerun)
+# --------------------
+def load_ktc_lookup(player_pool, ktc_df, ktc_mtime, pool_size):
+    return memory.get_or_build(("ktc_lookup", ktc_mtime, pool_size), lambda: build_ktc_lookup(player_pool, ktc_df))
 
 # --------------------
-# Pick formatter for rookie picks
+# Headshot / avatar thumbnails (one disk cache shared by every session)
 # --------------------
-def format_pick_id(pid):
-    if "pick" in pid:
-        parts = pid.split("_")  # example: 2025_pick_1_01
-        if len(parts) == 4 and parts[1] == "pick":
-            return f"{parts[0]} Pick {parts[2]}.{parts[3]}"
-    return pid
-
-# ===============================
-# Helper: Canonicalize pick names
-# ===============================
-def canonical_pick_name(pid):
-    # Matches "2025_pick_1_04" to "2025 Pick 1.04" (same as in your KTC CSV)
-    if pid.startswith("2025_pick_"):
-        parts = pid.split("_")
-        if len(parts) == 4:
-            rd = parts[2]
-            slot = parts[3]
-            return f"2025 Pick {rd}.{slot}"
-    # "2025 1st round pick (Redwards)" or similar — keep as is
-    if pid.startswith("2025") and "round pick" in pid:
-        return pid
-    return pid
-
-def all_equiv_pick_ids(uid, orig_owner):
-    """
-    For a slot UID like '2025_pick_1_04' and owner 'Redwards',
-    return all possible trade IDs for that pick (Sleeper and owner placeholder formats).
-    """
-    num = uid.split("_")[-1]
-    rd = uid.split("_")[2]
-    ktc_fmt = f"2025 Pick {rd}.{num}"
-    sleeper_fmt = uid
-    owner_fmt = f"2025 1st round pick ({orig_owner})"
-    return {sleeper_fmt, ktc_fmt, owner_fmt}
-
-def build_pick_uid_to_orig_owner(pick_order, rosters, user_map):
-    """
-    Returns a dict: pick_uid -> original owner display name, for all round 1 and 2 picks.
-    """
-    pick_uid_to_orig_owner = {}
-    for idx, roster_id in enumerate(pick_order):
-        pick_num = idx + 1
-        # 1st round
-        pick_id_1 = f"2025_pick_1_{str(pick_num).zfill(2)}"
-        owner_id = next((r["owner_id"] for r in rosters if r["roster_id"] == roster_id), None)
-        owner_name = user_map.get(owner_id, f"Team {roster_id}")
-        pick_uid_to_orig_owner[pick_id_1] = owner_name
-        # 2nd round
-        pick_id_2 = f"2025_pick_2_{str(pick_num).zfill(2)}"
-        pick_uid_to_orig_owner[pick_id_2] = owner_name
-    return pick_uid_to_orig_owner
-
-def build_final_pick_ownership_map(trades, pick_uid_to_orig_owner, user_map):
-    """
-    Returns: pick_uid -> current owner display name.
-    Handles all alternate ID formats from trade history.
-    """
-    # Start with original slot assignment
-    pick_to_owner = pick_uid_to_orig_owner.copy()
-    # Map all alternate IDs to pick_uid
-    alt_id_to_uid = {}
-    for uid, orig_owner in pick_uid_to_orig_owner.items():
-        for alt_id in all_equiv_pick_ids(uid, orig_owner):
-            alt_id_to_uid[alt_id] = uid
-    # Step through trades chronologically, update mapping
-    for trade in trades:
-        adds = trade.get("adds", {}) or {}
-        for pid, roster_id in adds.items():
-            uid = alt_id_to_uid.get(pid)
-            if uid:
-                # roster_id may be int or str, but user_map keys are user_id (string)
-                owner_name = user_map.get(str(roster_id), f"Team {roster_id}")
-                pick_to_owner[uid] = owner_name
-    return pick_to_owner
-
-def is_rookie_draft_complete(league_id):
-    """
-    Returns True if the league's rookie draft is marked as complete in Sleeper.
-    """
-    # Get all drafts for this league (could be more than one!)
-    try:
-        drafts = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/drafts").json()
-        # Find the most recent (should be the rookie draft for dynasty leagues)
-        for draft in drafts:
-            # Optional: could check type: if draft.get("type") == "rookie" or "snake"
-            if draft.get("season_type") == "regular":  # usually rookie or startup, but some leagues only run one
-                status = draft.get("status")
-                if status and status.lower() == "complete":
-                    return True
-        # If you want to be stricter, only check first draft:
-        # draft = drafts[0] if drafts else None
-        # if draft and draft.get("status", "").lower() == "complete":
-        #     return True
-    except Exception as e:
-        print("Error checking rookie draft status:", e)
-    return False
+@st.cache_resource(show_spinner=False)
+def load_thumbnail_cache():
+    return ThumbnailCache()
+
+thumbnails = load_thumbnail_cache()
 
 # --------------------
-# Sleeper League Loader with KTC Matching
+# Band index per league state: slider changes are range queries, not new searches
 # --------------------
-def load_league_data(league_id, ktc_df):
-    player_pool_url = "https://api.sleeper.app/v1/players/nfl"
-    pool_response = requests.get(player_pool_url)
-    player_pool = pool_response.json()
-
-    users_url = f"https://api.sleeper.app/v1/league/{league_id}/users"
-    users = requests.get(users_url).json()
-    
-    rosters_url = f"https://api.sleeper.app/v1/league/{league_id}/rosters"
-    rosters = requests.get(rosters_url).json()
-
-    my_roster = next((r for r in rosters if str(r.get("owner_id")) == str(user_id)), None)
-    if my_roster:
-        team_name = my_roster.get("settings", {}).get("team_name", "No Team Name")
-        starters_list = set(my_roster.get("starters", []))
-    else:
-        team_name = "No Team Name"
-        starters_list = set()
-        
-    if users is None or not isinstance(users, list):
-        st.error("Could not load league users. League may be private or inaccessible.")
-        st.stop()
-    
-    rosters = requests.get(rosters_url).json()
-    if rosters is None or not isinstance(rosters, list):
-        st.error("Could not load league rosters. League may be private or inaccessible.")
-        st.stop()
-
-    # --- Build user_map for both current and previous year
-    user_map = {user['user_id']: user['display_name'] for user in users}
-    
-    # --- Fetch all trades from this and previous season
-    league_info = requests.get(f"https://api.sleeper.app/v1/league/{league_id}").json()
-    prev_league_id = league_info.get("previous_league_id")
-    all_trades_current, _ = get_all_trades_from_league(league_id)
-    all_trades_prev, _ = get_all_trades_from_league(prev_league_id) if prev_league_id else ([], {})
-    all_trades = all_trades_prev + all_trades_current
-    
-    # --- Merge in previous season user IDs for orphaned teams etc.
-    if prev_league_id:
-        prev_users = requests.get(f"https://api.sleeper.app/v1/league/{prev_league_id}/users").json()
-        user_map.update({user['user_id']: user['display_name'] for user in prev_users})
-    
-    data = []
-    
-    for roster in rosters:
-        roster_id = roster["roster_id"]
-        owner_id = roster["owner_id"]
-        owner_name = user_map.get(owner_id, f"User {owner_id}")
-        player_ids = roster.get("players", [])
-
-        print("✅ running edited file")  # Add this temporarily
-        for pid in player_ids:
-            if pid in player_pool:
-                player_data = player_pool[pid]
-                full_name = player_data.get("full_name", pid)
-                position = player_data.get("position", "")
-                team = player_data.get("team", "")
-            elif isinstance(pid, str) and pid.startswith("rookie_"):
-                full_name = format_pick_id(pid)
-                position = "PICK"
-                team = ""
-            else:
-                continue  # Unknown entry; skip
-        
-            ktc_row = ktc_df[ktc_df["Player_Sleeper"].str.strip().str.lower() == full_name.lower()]
-            ktc_value = int(ktc_row["KTC_Value"].iloc[0]) if not ktc_row.empty else 0
-        
-            data.append({
-                "Sleeper_Player_ID": pid,
-                "Player_Sleeper": full_name,
-                "Position": position,
-                "Team": team,
-                "Team_Owner": owner_name,
-                "Roster_ID": roster_id,
-                "KTC_Value": ktc_value
-            })
-
-    # Inject dummy player data for rookie picks
-    for pid in set(sum([roster.get("players", []) for roster in rosters], [])):
-        if isinstance(pid, str) and pid.startswith("rookie_"):
-            player_pool[pid] = {
-                "full_name": format_pick_id(pid),
-                "position": "PICK",
-                "team": ""
-            }
-
-    # Fetch previous league standings to assign rookie picks
-    league_info = requests.get(f"https://api.sleeper.app/v1/league/{league_id}").json()
-    prev_league_id = league_info.get("previous_league_id")
-    if prev_league_id:
-        prev_league_info = requests.get(f"https://api.sleeper.app/v1/league/{prev_league_id}").json()
-        
-    is_redraft = str(league_info.get("settings", {}).get("type", "")).lower() not in {"dynasty", "2"}
-
-    # -- NEW: Check if rookie draft is already complete --
-    rookie_draft_done = is_rookie_draft_complete(league_id)
-    
-    # Skip pick logic entirely for redraft leagues or if rookie draft is already done
-    if not is_redraft and not rookie_draft_done:
-        prev_league_id = league_info.get("previous_league_id")
-        pick_order = []
-        if prev_league_id and not is_redraft:
-            prev_rosters = requests.get(f"https://api.sleeper.app/v1/league/{prev_league_id}/rosters").json()
-            winners_bracket_url = f"https://api.sleeper.app/v1/league/{prev_league_id}/winners_bracket"
-            winners_bracket = requests.get(winners_bracket_url).json()
-            
-            # === 1. Split previous season's rosters into non-playoff and playoff
-            non_playoff = []
-            playoff = []
-            for r in prev_rosters:
-                if r.get("settings", {}).get("playoff_seed"):
-                    playoff.append(r)
-                else:
-                    non_playoff.append(r)
-            
-            # === 2. Sort non-playoff teams (worst to best: fewest wins, then fewest points)
-            non_playoff_sorted = sorted(
-                non_playoff,
-                key=lambda r: (
-                    r.get("settings", {}).get("wins", 0),   # lowest wins first!
-                    r.get("settings", {}).get("fpts", 0)    # lowest points first!
-                )
-            )
-            
-            # === 3. Build playoff order map (using Sleeper winners_bracket structure)
-            playoff_order_map = {}
-            if winners_bracket:
-                for match in winners_bracket:
-                    place = match.get("p")
-                    winner = match.get("w")
-                    loser = match.get("l")
-                    if place == 1:      # Championship
-                        playoff_order_map[12] = winner    # 1.12 (champion)
-                        playoff_order_map[11] = loser     # 1.11 (runner up)
-                    elif place == 3:    # 3rd place game
-                        playoff_order_map[10] = winner
-                        playoff_order_map[9] = loser
-                    elif place == 5:    # 5th place game
-                        playoff_order_map[8] = winner
-                        playoff_order_map[7] = loser
-            
-            # === 4. Make list of playoff picks (slots 7-12 are 1.07 to 1.12)
-            playoff_picks = []
-            for slot in range(7, 13):
-                rid = playoff_order_map.get(slot)
-                if rid is not None:
-                    playoff_picks.append(rid)
-            
-            # === 5. Final pick order for both rounds: 1.01–1.06 = worst non-playoff, 1.07–1.12 = playoff
-            pick_order = [r.get("roster_id") for r in non_playoff_sorted[:6]] + playoff_picks
-            
-            # Build mapping: pick_uid -> original owner
-            pick_uid_to_orig_owner = build_pick_uid_to_orig_owner(pick_order, rosters, user_map)
-            
-            # Get all trades from previous and current seasons, in order
-            all_trades_current, _ = get_all_trades_from_league(league_id)
-            all_trades_prev, _ = get_all_trades_from_league(prev_league_id) if prev_league_id else ([], {})
-            all_trades = all_trades_prev + all_trades_current
-            
-            # Build pick_uid -> current owner mapping
-            pick_to_owner = build_final_pick_ownership_map(all_trades, pick_uid_to_orig_owner, user_map)
-            
-            # Add 1st and 2nd round picks to the data table
-            for uid, orig_owner in pick_uid_to_orig_owner.items():
-                # Display name: "2025 Pick 1.01 (Mahomeboy93)"
-                display = f"{format_pick_id(uid)} ({orig_owner})"
-                ktc_row = ktc_df[ktc_df["Player_Sleeper"].str.strip().str.lower() == format_pick_id(uid).lower()]
-                ktc_value = int(ktc_row["KTC_Value"].iloc[0]) if not ktc_row.empty else 0
-                final_owner = pick_to_owner.get(uid, orig_owner)
-                data.append({
-                    "Sleeper_Player_ID": uid,
-                    "Player_Sleeper": display,
-                    "Position": "PICK",
-                    "Team": "",
-                    "Team_Owner": final_owner,
-                    "Roster_ID": None,
-                    "KTC_Value": ktc_value
-                })
-                
-    return pd.DataFrame(data), player_pool, starters_list
+def load_band_index(league_id, frame_hash, top_qbs, records):
+    # records: a list of player dicts, or a function returning one (only called on a miss)
+    key = ("band_index", league_id, frame_hash, top_qbs)
+
+    def build():
+        index = BandIndex(records() if callable(records) else records, list(top_qbs))
+        # Package groups are built on first query; have the budget count them as they appear
+        index.on_grow = lambda: memory.resize(key)
+        return index
+
+    return memory.get_or_build(key, build)
+
+# --------------------
+# Live search results, shared by every session until the league's rosters change
+# --------------------
+@st.cache_resource(show_spinner=False)
+def load_suggestion_memo():
+    return SuggestionMemo()
+
+suggestion_memo = load_suggestion_memo()
+
+# --------------------
+# Player directory per league state: id-keyed rows, picker labels, type-ahead search
+# --------------------
+def load_player_directory(league_id, frame_hash, df):
+    return memory.get_or_build(("player_directory", league_id, frame_hash), lambda: PlayerDirectory(df))
+
+# --------------------
+# Power rankings per league state: grouped team values, what-if trades
+# --------------------
+def load_power_rankings(league_id, frame_hash, df):
+    return memory.get_or_build(("power_rankings", league_id, frame_hash), lambda: PowerRankings(df))
+
+# --------------------
+# League-wide ownership matrix (cached per league)
+# --------------------
+@st.cache_data(ttl=900, show_spinner=False)
+def load_ownership_matrix(league_id, owner_ids):
+    # league_id only keys the cache; the matrix covers every league these owners are in
+    session = current_session()
+    return build_ownership_matrix(owner_ids, fetch_json=lambda url: get_json(url, CRAWL, session))
 
 # --------------------
 # Streamlit UI Setup
@@ -573,9 +296,22 @@ username_lower = username.lower()
 with st.sidebar:
     st.markdown("---")
     st.subheader("Trade Settings")
-    tolerance = st.slider("Match Tolerance (%)", 1, 15, 5)
-    qb_premium_setting = st.slider("QB Premium Bonus", 0, 1500, 750, step=50,
+    tolerance = st.slider("Match Tolerance (%)", 1, 15, DEFAULT_TOLERANCE)
+    qb_premium_setting = st.slider("QB Premium Bonus", 0, 1500, DEFAULT_QB_PREMIUM, step=50,
                                    help="How much does your league value the QB position? Set to 1500 if trading with McNutted")
+    st.markdown("---")
+    st.subheader("Roster Constraints")
+    enforce_minimums = st.checkbox("Keep starting lineup minimums", value=True,
+                                   help="Skip trades that leave either team unable to fill its QB/RB/WR/TE starting slots")
+    protect_starters = st.checkbox("Don't trade starters", value=False)
+    max_players_per_side = st.slider("Max Players Per Side", 1, 3, 3)
+
+# Nightly precomputed suggestions (suggestion_tables.py) only answer for the default sliders
+suggestion_tables = SuggestionTables()
+uses_default_sliders = (
+    tolerance == DEFAULT_TOLERANCE and qb_premium_setting == DEFAULT_QB_PREMIUM
+    and enforce_minimums and not protect_starters
+)
 
 league_id = None
 league_options = {}
@@ -584,23 +320,34 @@ df = pd.DataFrame()
 if username:
     try:
         user_info_url = f"https://api.sleeper.app/v1/user/{username}"
-        user_response = requests.get(user_info_url, timeout=10)
+        user_response = sleeper_get(user_info_url, INTERACTIVE)
         user_response.raise_for_status()
         user_id = user_response.json().get("user_id")
         user_info = user_response.json()
         user_avatar = user_info.get("avatar")
 
         leagues_url = f"https://api.sleeper.app/v1/user/{user_id}/leagues/nfl/2025"
-        response = requests.get(leagues_url)
+        response = sleeper_get(leagues_url, INTERACTIVE)
         response.raise_for_status()
         leagues = response.json()
 
         league_options = {league['name']: league['league_id'] for league in leagues}
+        leagues_by_id = {league['league_id']: league for league in leagues}
         selected_league_name = st.sidebar.selectbox("Select a League", list(league_options.keys()))
         league_id = league_options[selected_league_name]
 
-        # Find the selected league's info object
-        league_info = requests.get(f"https://api.sleeper.app/v1/league/{league_id}").json()
+        # Everything else about the league loads lazily, when a tab asks for it
+        ktc_df = pd.read_csv(KTC_VALUES_PATH, encoding="utf-8-sig")
+        restored_nodes = []
+        league = LeagueGraph(
+            league_id, ktc_df, user_id,
+            ktc_lookup_factory=lambda pool, ktc: load_ktc_lookup(pool, ktc, os.path.getmtime(KTC_VALUES_PATH), len(pool))
+        )
+        # Warm start: trades, values and pick ownership from the last snapshot if rosters still match.
+        # The snapshot is read from the shared cache once per league, not on every rerun.
+        league_snapshot = memory.get_or_build(("league_snapshot", league_id), lambda: load_league_snapshot(league_id) or {})
+        restored_nodes = restore_league_snapshot(league, state=league_snapshot)
+        league_info = league.get("league_info")
 
         # Number of Teams
         num_teams = league_info.get("total_rosters", "?")
@@ -640,6 +387,9 @@ if username:
         
         # Start X (number of starting spots)
         start_x = len(starting_lineup)
+
+        # Position floors each side must keep after a trade
+        position_minimums = lineup_minimums(positions) if enforce_minimums else {}
         
        # Scoring settings (PPR and TEP)
         scoring = league_info.get("scoring_settings", {})
@@ -666,9 +416,6 @@ if username:
         # Show league_desc in the sidebar under league selection
         st.sidebar.markdown(f"<div style='font-size:16px; font-weight:600; color:#4da6ff; text-align:center;'>{league_desc}</div>", unsafe_allow_html=True)
 
-        ktc_df = pd.read_csv("ktc_values.csv", encoding="utf-8-sig")
-        df, player_pool, starters_list = load_league_data(league_id, ktc_df)
-            
          # Sidebar: List custom scoring settings
         non_default_settings = []
         for k, v in scoring.items():
@@ -698,19 +445,21 @@ if username:
         # ===================
         # Tab Layout
         # ===================
-        tab_names = ["Roster Overview", "Trade Away", "Trade For", "League Breakdown", "Player Portfolio"]
+        tab_names = ["Roster Overview", "Trade Away", "Trade For", "Acquire Anywhere", "Trade Grades", "League Breakdown", "Player Portfolio"]
         active_tab = st.radio("Go to:", tab_names, index=0, horizontal=True, key="tab_picker")
         
         if active_tab == "Roster Overview":
+            df = league.get("roster_frame")
+            starters_list = league.get("starters")
             if not df.empty:
                 # Filter to user's team
                 team_df = df[df["Team_Owner"].str.lower() == username_lower]
         
                 # Get avatar (use a generic if missing)
                 if user_avatar:
-                    team_avatar_url = f"https://sleepercdn.com/avatars/{user_avatar}"
+                    team_avatar_url = thumbnails.data_uri(f"https://sleepercdn.com/avatars/{user_avatar}")
                 else:
-                    team_avatar_url = "https://sleepercdn.com/images/logos/logo.png"  # fallback generic
+                    team_avatar_url = thumbnails.data_uri("https://sleepercdn.com/images/logos/logo.png")  # fallback generic
                 team_name = selected_league_name
                 owner_name = username
                 avg_age = team_df[team_df["Position"].isin(["QB", "RB", "WR", "TE"])]["KTC_Value"].mean()
@@ -744,74 +493,85 @@ if username:
                     """, unsafe_allow_html=True
                 )
         
-                # Position columns
+                # Position columns, one HTML block each (one element per column instead of one per player)
                 pos_cols = st.columns(4)
                 for i, pos in enumerate(["QB", "RB", "WR", "TE"]):
+                    pos_df = pos_ranks[pos]["top_players"]
+                    player_lines = [
+                        # Green if this player is a starter, else light gray
+                        f"<div style='font-size:17px;color:{'#44c553' if str(pid) in starters_list else '#f5f6fa'};font-weight:600'>"
+                        f"{name} <span style='float:right;color:#aaa'>{int(val):,}</span></div>"
+                        for pid, name, val in zip(
+                            pos_df["Sleeper_Player_ID"].tolist(), pos_df["Player_Sleeper"].tolist(), pos_df["KTC_Value"].tolist()
+                        )
+                    ]
                     with pos_cols[i]:
-                        st.markdown(f"<h4 style='color:#4da6ff;'>{pos}</h4>", unsafe_allow_html=True)
-                        pos_df = pos_ranks[pos]["top_players"]
-                        for _, row in pos_df.iterrows():
-                            pid = str(row["Sleeper_Player_ID"])
-                            val = int(row["KTC_Value"])
-                            # Green if this player is a starter, else light gray
-                            color = "#44c553" if pid in starters_list else "#f5f6fa"
-                            st.markdown(
-                                f"<div style='font-size:17px;color:{color};font-weight:600'>{row['Player_Sleeper']} <span style='float:right;color:#aaa'>{val:,}</span></div>",
-                                unsafe_allow_html=True
-                            )
+                        st.markdown(
+                            f"<h4 style='color:#4da6ff;'>{pos}</h4>" + "".join(player_lines),
+                            unsafe_allow_html=True
+                        )
+
+                # League-wide power rankings (the full frame, so rookie picks count too)
+                if st.checkbox("Show league power rankings", key="show_power_rankings"):
+                    frame = league.get("frame")
+                    frame_hash = frame_fingerprint(frame)
+                    rankings = load_power_rankings(league_id, frame_hash, frame)
+                    st.markdown("<h3 style='text-align:center;'>League Power Rankings</h3>", unsafe_allow_html=True)
+                    st.dataframe(rankings.table(), use_container_width=True, hide_index=True)
+
+                    my_owner = rankings.owner(username_lower)
+                    partners = [owner for owner in rankings.owners if owner != my_owner]
+                    if my_owner is not None and partners:
+                        directory = load_player_directory(league_id, frame_hash, frame)
+                        st.markdown("<h4>What If: rankings after a trade</h4>", unsafe_allow_html=True)
+                        partner = st.selectbox("Trade partner", partners, key="what_if_partner")
+                        what_if_cols = st.columns(2)
+                        with what_if_cols[0]:
+                            send_ids = st.multiselect("You send", directory.ids(owner=my_owner),
+                                                      format_func=directory.short_label, key="what_if_send")
+                        with what_if_cols[1]:
+                            get_ids = st.multiselect(f"You get from {partner}", directory.ids(owner=partner),
+                                                     format_func=directory.short_label, key="what_if_get")
+                        # Candidate trades kept for side-by-side comparison, per league
+                        compared = st.session_state.setdefault(f"what_if_trades_{league_id}", {})
+                        if send_ids or get_ids:
+                            result = rankings.what_if(swap(my_owner, send_ids, partner, get_ids))
+                            st.dataframe(result.changes(), use_container_width=True, hide_index=True)
+                            if st.button("Add to comparison", key="what_if_add"):
+                                label = (", ".join(directory.name(pid) for pid in send_ids) or "nothing") + " for " + \
+                                        (", ".join(directory.name(pid) for pid in get_ids) or "nothing") + f" ({partner})"
+                                compared[label] = swap(my_owner, send_ids, partner, get_ids)
+                        if compared:
+                            st.markdown("<h4>Compared Trades</h4>", unsafe_allow_html=True)
+                            st.dataframe(rankings.rank_impacts(compared, my_owner), use_container_width=True, hide_index=True)
+                            if st.button("Clear comparison", key="what_if_clear"):
+                                compared.clear()
+                                st.rerun()
         
         elif active_tab == "Trade Away":  # Main trade tool as before!
+            df = league.get("frame")
             if not df.empty:
                 top_qbs = df[df["Position"] == "QB"].sort_values("KTC_Value", ascending=False).head(30)["Player_Sleeper"].tolist()
-        
-                # Sort players by KTC descending
-                user_players = df[df["Team_Owner"].str.lower() == username_lower].sort_values("KTC_Value", ascending=False)
-                selected_names = []
-        
+                frame_hash = frame_fingerprint(df)
+                directory = load_player_directory(league_id, frame_hash, df)
+                selected_ids = []
+
                 st.markdown("<h3 style='text-align:center;'>Select player(s) to trade away:</h3>", unsafe_allow_html=True)
-                positions = ['QB', 'RB', 'WR', 'TE',]
                 with st.expander("Player Selection", expanded=True):  # Change to False if you want collapsed by default
-                    display_map = {'QB': 'QB', 'RB': 'RB', 'WR': 'WR', 'TE': 'TE'}
-                    selected_names = []
-                
-                    # Define which positions go in each column
-                    col1_positions = ['QB', 'RB']
-                    col2_positions = ['WR', 'TE']
-                
-                    # Create two columns for selection
-                    col1, col2 = st.columns(2)
-                
-                    # First column: QB and RB
-                    with col1:
-                        for pos in col1_positions:
-                            st.markdown(f"**{display_map[pos]}**")
-                            pos_players = user_players[user_players["Position"] == pos]
-                            for _, row in pos_players.iterrows():
-                                key = f"cb_{row['Sleeper_Player_ID']}"
-                                name = row['Player_Sleeper']
-                                ktc = row['KTC_Value']
-                                label = f"{name} (KTC: {ktc})"
-                                checked = st.checkbox(label, key=key)
-                                if checked:
-                                    selected_names.append(name)
-                
-                    # Second column: WR and TE
-                    with col2:
-                        for pos in col2_positions:
-                            st.markdown(f"**{display_map[pos]}**")
-                            pos_players = user_players[user_players["Position"] == pos]
-                            for _, row in pos_players.iterrows():
-                                key = f"cb_{row['Sleeper_Player_ID']}"
-                                name = row['Player_Sleeper']
-                                ktc = row['KTC_Value']
-                                label = f"{name} (KTC: {ktc})"
-                                checked = st.checkbox(label, key=key)
-                                if checked:
-                                    selected_names.append(name)
-
-                if selected_names:
+                    # One multiselect instead of a checkbox per player: QBs, RBs, WRs, TEs, each by KTC
+                    pos_order = {'QB': 0, 'RB': 1, 'WR': 2, 'TE': 3}
+                    selectable = sorted(
+                        directory.ids(owner=username_lower, positions=pos_order),
+                        key=lambda pid: pos_order[directory.row(pid)["Position"]]
+                    )
+                    selected_ids = st.multiselect(
+                        "Players to trade away", selectable, format_func=directory.short_label,
+                        key=f"trade_away_ids_{league_id}"
+                    )
+
+                if selected_ids:
                     selected_rows, total_ktc, total_qb_premium, total_bonus, adjusted_total = calculate_trade_value(
-                        df, selected_names, top_qbs, qb_premium_setting
+                        df, selected_ids, top_qbs, qb_premium_setting
                     )
                     owner = selected_rows.iloc[0]["Team_Owner"]
                 
@@ -820,7 +580,7 @@ if username:
 
                     with img_col:
                         # Calculate the vertical space to add above the images (adjust as needed)
-                        n_images = len(selected_names)
+                        n_images = len(selected_ids)
                         image_block_height = n_images * 150  # estimate: image+name ~150px per player
                         value_block_height = 340  # adjust to match your value column (trial/error)
                         top_padding = max(0, (value_block_height - image_block_height) // 2)
@@ -828,9 +588,9 @@ if username:
                         # Add dynamic vertical spacer
                         st.markdown(f"<div style='height: {top_padding}px;'></div>", unsafe_allow_html=True)
                     
-                        for name in selected_names:
-                            selected_id = df[df["Player_Sleeper"] == name].iloc[0]["Sleeper_Player_ID"]
-                            headshot_url = f"https://sleepercdn.com/content/nfl/players/{selected_id}.jpg"
+                        for selected_id in selected_ids:
+                            name = directory.name(selected_id)
+                            headshot_url = thumbnails.data_uri(f"https://sleepercdn.com/content/nfl/players/{selected_id}.jpg")
                             st.markdown(
                                 f"""
                                 <div style='display: flex; flex-direction: column; align-items: center; margin-bottom: 16px;'>
@@ -849,87 +609,117 @@ if username:
                         st.markdown(f"<ul style='text-align:center; list-style-position: inside;'><strong>QB Premium Total:</strong> +{total_qb_premium}</li>", unsafe_allow_html=True)
                         st.markdown(f"<ul style='text-align:center; list-style-position: inside;'><strong>Adjusted Trade Value:</strong> {adjusted_total}</li></ul>", unsafe_allow_html=True)
         
-                    try:
-                        with st.expander(f"📈 {len(selected_names)}-for-1 Trade Suggestions"):
-                            one_low = int(adjusted_total * (1 - tolerance / 100))
-                            one_high = int(adjusted_total * (1 + tolerance / 100))
-        
-                            one_for_one = df[
-                               ((df["KTC_Value"] + df.apply(
-                                    lambda row: package_bonus([row["KTC_Value"]]) if len(selected_names) > 1 else 0, axis=1
-                                )) >= one_low) &
-                                ((df["KTC_Value"] + df.apply(
-                                  lambda row: package_bonus([row["KTC_Value"]]) if len(selected_names) > 1 else 0, axis=1
-                                )) <= one_high) &
-                                (df["Team_Owner"] != owner)
-                           ][["Player_Sleeper", "Position", "Team", "KTC_Value", "Team_Owner"]]
-        
-                            if not one_for_one.empty:
-                                st.dataframe(one_for_one.sort_values("KTC_Value", ascending=False).reset_index(drop=True))
-                            else:
-                                st.write("No 1-for-1 trades found in that range.")
-        
-                        with st.expander(f"👥 {len(selected_names)}-for-2 Trade Suggestions"):
-                            your_side_total = total_ktc + package_bonus(selected_rows["KTC_Value"].tolist())
-                            two_low = int(your_side_total * (1 - tolerance / 100))
-                            two_high = int(your_side_total * (1 + tolerance / 100))
-        
-                            results = []
-                            other_teams = df[df["Team_Owner"] != owner]["Team_Owner"].unique()
-        
-                            for team_owner in other_teams:
-                                team_players = df[df["Team_Owner"] == team_owner]
-                                combos = combinations(team_players.iterrows(), 2)
-                                for (i1, p1), (i2, p2) in combos:
-                                  if p1["KTC_Value"] > total_ktc or p2["KTC_Value"] > total_ktc:
-                                      continue
-        
-                                  value = p1["KTC_Value"] + p2["KTC_Value"]
-                                  if p1["Position"] == "QB" and p1["Player_Sleeper"] in top_qbs:
-                                      value += qb_premium_setting
-                                  if p2["Position"] == "QB" and p2["Player_Sleeper"] in top_qbs:
-                                      value += qb_premium_setting
-                                  if two_low <= value <= two_high:
-                                      results.append({
-                                          "Team_Owner": team_owner,
-                                          "Player 1": f"{p1['Player_Sleeper']} (KTC: {p1['KTC_Value']})",
-                                          "Player 2": f"{p2['Player_Sleeper']} (KTC: {p2['KTC_Value']})",
-                                         "Total Value": value
-                                      })
-        
-                            if results:
-                                st.dataframe(pd.DataFrame(results).sort_values("Total Value", ascending=False).reset_index(drop=True))
-                            else:
-                                st.write("No 2-for-1 trades found in that range.")
-                    except Exception as trade_error:
-                        st.error(f"⚠️ Trade suggestion error: {trade_error}")
+                    blocked_ids = set(df.loc[df["Is_Starter"], "Sleeper_Player_ID"]) if protect_starters else set()
+
+                    if len(selected_ids) > max_players_per_side:
+                        st.warning(f"You selected {len(selected_ids)} players; Max Players Per Side is {max_players_per_side}.")
+                    else:
+                        try:
+                            # Single-player sells at the default sliders come from the nightly tables
+                            away_tables = None
+                            if len(selected_rows) == 1 and uses_default_sliders:
+                                away_tables = suggestion_tables.lookup(
+                                    league_id, inputs_hash(df, position_minimums), "away", owner,
+                                    selected_rows.iloc[0]["Sleeper_Player_ID"]
+                                )
+                            if away_tables is None:
+                                def search_away():
+                                    records = df.to_dict(orient="records")
+                                    return trade_away_rows(trade_away_packages(
+                                        records, owner, selected_rows.to_dict(orient="records"),
+                                        top_qbs, tolerance, qb_premium_setting, max_players_per_side,
+                                        minimums=position_minimums, blocked_ids=blocked_ids,
+                                        index=load_band_index(league_id, frame_hash, tuple(top_qbs), records)
+                                    ))
+                                # Same players and sliders on the same rosters: reuse the last answer
+                                away_tables = suggestion_memo.get_or_search(league_id, frame_hash, search_query(
+                                    "away", owner, selected_ids, tolerance, qb_premium_setting, max_players_per_side, blocked_ids,
+                                    minimums=position_minimums
+                                ), search_away)
+
+                            with st.expander(f"📈 {len(selected_ids)}-for-1 Trade Suggestions"):
+                                if away_tables[1]:
+                                    st.dataframe(pd.DataFrame(away_tables[1]))
+                                else:
+                                    st.write("No 1-for-1 trades found in that range.")
+
+                            if max_players_per_side >= 2:
+                                with st.expander(f"👥 {len(selected_ids)}-for-2 Trade Suggestions"):
+                                    if away_tables[2]:
+                                        st.dataframe(pd.DataFrame(away_tables[2]))
+                                    else:
+                                        st.write("No 2-for-1 trades found in that range.")
+
+                            # Rotations you -> Team A -> Team B -> you (opt-in: it searches every pair of teams)
+                            if st.checkbox("Find 3-team trades", key="find_three_team"):
+                                with st.expander("🔺 3-Team Trade Suggestions", expanded=True):
+                                    with st.spinner("Searching every pair of teams..."):
+                                        three_team_rows = suggestion_memo.get_or_search(league_id, frame_hash, search_query(
+                                            "three_team", owner, selected_ids, tolerance, qb_premium_setting,
+                                            min(max_players_per_side, 2), blocked_ids, minimums=position_minimums
+                                        ), lambda: three_team_trades(
+                                            df.to_dict(orient="records"), owner, selected_rows.to_dict(orient="records"),
+                                            top_qbs, tolerance, qb_premium_setting, min(max_players_per_side, 2),
+                                            minimums=position_minimums, blocked_ids=blocked_ids
+                                        ))
+                                    if three_team_rows:
+                                        st.caption("You send to Team A, Team A sends to Team B, Team B sends to you. "
+                                                   "Each Gap % is what that team receives minus what it sends.")
+                                        st.dataframe(pd.DataFrame(three_team_rows), use_container_width=True)
+                                    else:
+                                        st.write("No 3-team trades found in that range.")
+
+                            # Both sides grow: 2-for-2 / 3-for-2 deals built around the selected players
+                            two_sided_shapes = [
+                                (mine, theirs) for mine, theirs in TWO_SIDED_SHAPES
+                                if len(selected_ids) <= mine <= max_players_per_side and theirs <= max_players_per_side
+                            ]
+                            if two_sided_shapes and st.checkbox("Find 2-for-2 / 3-for-2 trades", key="find_two_sided_away"):
+                                for my_size, their_size in two_sided_shapes:
+                                    with st.expander(f"🔁 {my_size}-for-{their_size} Trade Suggestions", expanded=True):
+                                        two_sided_rows = suggestion_memo.get_or_search(league_id, frame_hash, search_query(
+                                            f"two_sided_{my_size}x{their_size}", owner, selected_ids, tolerance,
+                                            qb_premium_setting, max_players_per_side, blocked_ids, minimums=position_minimums
+                                        ), lambda: two_sided_trades(
+                                            df.to_dict(orient="records"), owner, top_qbs, tolerance, qb_premium_setting,
+                                            my_size, their_size, must_send=selected_ids, minimums=position_minimums,
+                                            blocked_ids=blocked_ids
+                                        ))
+                                        if two_sided_rows:
+                                            st.dataframe(pd.DataFrame(two_sided_rows), use_container_width=True)
+                                        else:
+                                            st.write(f"No {my_size}-for-{their_size} trades found in that range.")
+                        except Exception as trade_error:
+                            st.error(f"⚠️ Trade suggestion error: {trade_error}")
 
         elif active_tab == "Trade For":
+            df = league.get("frame")
             if not df.empty:
                 top_qbs = df[df["Position"] == "QB"].sort_values("KTC_Value", ascending=False).head(30)["Player_Sleeper"].tolist()
                 st.markdown("<h3 style='text-align:center;'>Trade For a Player</h3>", unsafe_allow_html=True)
                 # Your team owner
                 my_team_owner = username_lower
                 my_roster = df[df["Team_Owner"].str.lower() == my_team_owner]
-                my_player_names = set(my_roster["Player_Sleeper"])
-        
-                # Pool of all players not on your team
-                available_players = df[~df["Player_Sleeper"].isin(my_player_names)].sort_values("KTC_Value", ascending=False)
-                available_players = available_players[available_players["Position"] != "PICK"]
-        
-                # Drop-down is built from available_players only (fast)
-                player_options = [
-                    f"{row['Player_Sleeper']} ({row['Position']}, {row['Team_Owner']}, KTC: {row['KTC_Value']})"
-                    for _, row in available_players.iterrows()
+                frame_hash = frame_fingerprint(df)
+                directory = load_player_directory(league_id, frame_hash, df)
+
+                # Every player not on your team (ids, best KTC first), narrowed by the search box
+                available_ids = [
+                    pid for pid in directory.ids(exclude_owner=my_team_owner) if directory.row(pid)["Position"] != "PICK"
                 ]
-                player_map = {f"{row['Player_Sleeper']} ({row['Position']}, {row['Team_Owner']}, KTC: {row['KTC_Value']})": row
-                              for _, row in available_players.iterrows()}
-        
-                selected_dropdown = st.selectbox("Select a player to trade for:", player_options)
+                player_search = st.text_input("Search players", placeholder="e.g. ja chase", key="trade_for_search")
+                player_options = directory.search(player_search, ids=available_ids) if player_search.strip() else available_ids
+
+                selected_target_id = st.selectbox("Select a player to trade for:", player_options, format_func=directory.label)
+                excluded_ids = st.multiselect(
+                    "Players you won't trade:",
+                    my_roster["Sleeper_Player_ID"].tolist(),
+                    format_func=directory.name
+                )
         
                 # Only do the heavy calculation AFTER a player is selected!
-                if selected_dropdown:
-                    target_row = player_map[selected_dropdown]
+                if selected_target_id is not None:
+                    target_row = directory.row(selected_target_id)
                     target_name = target_row["Player_Sleeper"]
                     target_owner = target_row["Team_Owner"]
                     target_ktc = target_row["KTC_Value"]
@@ -937,13 +727,11 @@ if username:
         
                     # Apply package bonus to the *target*, not to your own side!
                     target_adjusted_value = target_ktc + package_bonus([target_ktc])
-                    one_low = int(target_adjusted_value * (1 - tolerance / 100))
-                    one_high = int(target_adjusted_value * (1 + tolerance / 100))
         
                     # Show interface
                     img_col, val_col = st.columns([1, 2], gap="large")
                     with img_col:
-                        headshot_url = f"https://sleepercdn.com/content/nfl/players/{target_id}.jpg"
+                        headshot_url = thumbnails.data_uri(f"https://sleepercdn.com/content/nfl/players/{target_id}.jpg")
                         st.markdown(
                             f"""
                             <div style='display: flex; flex-direction: column; align-items: center; margin-bottom: 16px;'>
@@ -960,84 +748,169 @@ if username:
                         st.markdown(f"<ul style='text-align:center; list-style-position: inside;'><strong>Adjusted Trade Value:</strong> {target_adjusted_value}</li>", unsafe_allow_html=True)
                         st.markdown(f"<ul style='text-align:center; list-style-position: inside;'><strong>Owner:</strong> {target_owner}</li></ul>", unsafe_allow_html=True)
         
+                    # Default sliders with nothing excluded: answer from the nightly tables
+                    for_tables = None
+                    if uses_default_sliders and not excluded_ids and not my_roster.empty:
+                        for_tables = suggestion_tables.lookup(
+                            league_id, inputs_hash(df, position_minimums), "for", my_roster.iloc[0]["Team_Owner"], target_id
+                        )
+                        if for_tables is not None:
+                            for_tables = {size: rows for size, rows in for_tables.items() if size <= max_players_per_side}
+
+                    blocked_ids = set(excluded_ids)
+                    if protect_starters:
+                        blocked_ids |= set(my_roster.loc[my_roster["Is_Starter"], "Sleeper_Player_ID"])
+
                     # Only compute suggestions after player is selected (for lazy load)
-                    possible_players = my_roster.sort_values("KTC_Value", ascending=False)
-                    my_players_list = possible_players[["Player_Sleeper", "KTC_Value", "Position", "Team"]].to_dict(orient="records")
-        
-                    # 1-for-1 suggestion (no package bonus applied to your side!)
-                    one_for_one_list = []
-                    for _, row in possible_players.iterrows():
-                        value = row["KTC_Value"]
-                        if row["Position"] == "QB" and row["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if one_low <= value <= one_high:
-                            one_for_one_list.append({
-                                "Player": f"{row['Player_Sleeper']} (KTC: {row['KTC_Value']})",
-                                "Position": row["Position"],
-                                "Total Value": value
-                            })
-                    one_for_one_df = pd.DataFrame(one_for_one_list)
-        
-                    st.markdown("<h4>1-for-1 Offers:</h4>", unsafe_allow_html=True)
-                    if not one_for_one_df.empty:
-                        st.dataframe(one_for_one_df.reset_index(drop=True))
-                    else:
-                        st.write("No single-player offers found in that range.")
-        
-                    # 2-for-1 suggestion (again, no package bonus applied to your side!)
-                    st.markdown("<h4>2-for-1 Offers:</h4>", unsafe_allow_html=True)
-                    from itertools import combinations
-                    results = []
-                    for combo in combinations(my_players_list, 2):
-                        value = combo[0]["KTC_Value"] + combo[1]["KTC_Value"]
-                        # QB Premium for each player in the combo
-                        if combo[0]["Position"] == "QB" and combo[0]["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if combo[1]["Position"] == "QB" and combo[1]["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if one_low <= value <= one_high:
-                            results.append({
-                                "Player 1": f"{combo[0]['Player_Sleeper']} (KTC: {combo[0]['KTC_Value']})",
-                                "Player 2": f"{combo[1]['Player_Sleeper']} (KTC: {combo[1]['KTC_Value']})",
-                                "Total Value": value
-                            })
-                    results_df = pd.DataFrame(results)
-                    if not results_df.empty:
-                        st.dataframe(results_df.sort_values("Total Value", ascending=False).reset_index(drop=True))
-                    else:
-                        st.write("No 2-for-1 offers found in that range.")
-
-                    # 3-for-1 Offers
-                    st.markdown("<h4>3-for-1 Offers:</h4>", unsafe_allow_html=True)
-                    results_3for1 = []
-                    for combo in combinations(my_players_list, 3):
-                        value = combo[0]["KTC_Value"] + combo[1]["KTC_Value"] + combo[2]["KTC_Value"]
-                        if combo[0]["Position"] == "QB" and combo[0]["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if combo[1]["Position"] == "QB" and combo[1]["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if combo[2]["Position"] == "QB" and combo[2]["Player_Sleeper"] in top_qbs:
-                            value += qb_premium_setting
-                        if one_low <= value <= one_high:
-                            results_3for1.append({
-                                "Player 1": f"{combo[0]['Player_Sleeper']} (KTC: {combo[0]['KTC_Value']})",
-                                "Player 2": f"{combo[1]['Player_Sleeper']} (KTC: {combo[1]['KTC_Value']})",
-                                "Player 3": f"{combo[2]['Player_Sleeper']} (KTC: {combo[2]['KTC_Value']})",
-                                "Total Value": value
-                            })
-                    results_3for1_df = pd.DataFrame(results_3for1)
-                    if not results_3for1_df.empty:
-                        # Sort and limit to top 25 offers
-                        results_3for1_df = results_3for1_df.sort_values("Total Value", ascending=False).reset_index(drop=True).head(25)
-                        st.dataframe(results_3for1_df)
+                    if for_tables is None:
+                        def search_for():
+                            my_records = my_roster.to_dict(orient="records")
+                            my_counts = position_counts(my_records)
+                            target_owner_counts = position_counts(df[df["Team_Owner"] == target_owner].to_dict(orient="records"))
+                            my_players_list = with_effective_values(
+                                movable_players(my_records, blocked_ids), top_qbs, qb_premium_setting
+                            )
+                            # 1/2/3-for-1 suggestions (no package bonus applied to your side!)
+                            return trade_for_rows(trade_for_packages(
+                                my_players_list, target_row, tolerance, max_players_per_side,
+                                counts=my_counts, minimums=position_minimums,
+                                target_owner_counts=target_owner_counts,
+                                index=load_band_index(league_id, frame_hash, tuple(top_qbs), lambda: df.to_dict(orient="records")),
+                                qb_premium=qb_premium_setting
+                            ))
+                        # Going back to an earlier target on the same rosters reuses its answer
+                        for_tables = suggestion_memo.get_or_search(league_id, frame_hash, search_query(
+                            "for", username_lower, [target_id], tolerance, qb_premium_setting, max_players_per_side, blocked_ids,
+                            minimums=position_minimums
+                        ), search_for)
+                    for size, results in for_tables.items():
+                        st.markdown(f"<h4>{size}-for-1 Offers:</h4>", unsafe_allow_html=True)
+                        if results:
+                            st.dataframe(pd.DataFrame(results))
+                        elif size == 1:
+                            st.write("No single-player offers found in that range.")
+                        else:
+                            st.write(f"No {size}-for-1 offers found in that range.")
+
+                    # Both sides grow: the target plus one more of theirs, for 2 or 3 of yours
+                    two_sided_shapes = [
+                        (mine, theirs) for mine, theirs in TWO_SIDED_SHAPES
+                        if mine <= max_players_per_side and theirs <= max_players_per_side
+                    ]
+                    if two_sided_shapes and not my_roster.empty and st.checkbox("Find 2-for-2 / 3-for-2 offers", key="find_two_sided_for"):
+                        my_owner = my_roster.iloc[0]["Team_Owner"]
+                        for my_size, their_size in two_sided_shapes:
+                            st.markdown(f"<h4>{my_size}-for-{their_size} Offers:</h4>", unsafe_allow_html=True)
+                            two_sided_rows = suggestion_memo.get_or_search(league_id, frame_hash, search_query(
+                                f"two_sided_{my_size}x{their_size}", my_owner, [target_id], tolerance,
+                                qb_premium_setting, max_players_per_side, blocked_ids, minimums=position_minimums
+                            ), lambda: two_sided_trades(
+                                df.to_dict(orient="records"), my_owner, top_qbs, tolerance, qb_premium_setting,
+                                my_size, their_size, must_get=[target_id], minimums=position_minimums,
+                                blocked_ids=blocked_ids
+                            ))
+                            if two_sided_rows:
+                                st.dataframe(pd.DataFrame(two_sided_rows))
+                            else:
+                                st.write(f"No {my_size}-for-{their_size} offers found in that range.")
+
+        elif active_tab == "Acquire Anywhere":
+            player_pool = league.get("player_pool")
+            ktc_lookup = league.get("ktc_lookup")
+            st.markdown("<h3 style='text-align:center;'>Acquire a Player Across All Your Leagues</h3>", unsafe_allow_html=True)
+            target_options = sorted(
+                (pid for pid in ktc_lookup.ktc_name_by_id if pid in player_pool),
+                key=lambda pid: ktc_lookup.value(pid),
+                reverse=True
+            )
+            acquire_id = st.selectbox(
+                "Select a player to acquire:",
+                target_options,
+                format_func=lambda pid: f"{player_pool[pid]['full_name']} ({player_pool[pid].get('position', '')}, KTC: {ktc_lookup.value(pid)})"
+            )
+
+            if acquire_id and st.button(f"Search all {len(league_options)} leagues"):
+                with st.spinner("Loading rosters from every league..."):
+                    # Rosters are I/O bound: fetch every league at once
+                    session = current_session()
+                    with ThreadPoolExecutor(max_workers=8) as pool:
+                        league_records = dict(zip(
+                            league_options.items(),
+                            pool.map(lambda lid: load_league_roster_records(lid, player_pool, ktc_lookup, session), league_options.values())
+                        ))
+
+                jobs = []
+                for (lg_name, lg_id), records in league_records.items():
+                    target = next((r for r in records if str(r["Sleeper_Player_ID"]) == str(acquire_id)), None)
+                    my_owner = next((r["Team_Owner"] for r in records if r["Team_Owner"].lower() == username_lower), None)
+                    if target is None or my_owner is None or target["Team_Owner"] == my_owner:
+                        continue
+                    lg_positions = leagues_by_id.get(lg_id, {}).get("roster_positions", [])
+                    jobs.append({
+                        "league_name": lg_name,
+                        "league_id": lg_id,
+                        "roster": records,
+                        "my_owner": my_owner,
+                        "target_id": acquire_id,
+                        "tolerance": tolerance,
+                        "qb_premium": qb_premium_setting,
+                        "max_size": max_players_per_side,
+                        "minimums": lineup_minimums(lg_positions) if enforce_minimums else {},
+                        "blocked_ids": [r["Sleeper_Player_ID"] for r in records
+                                        if protect_starters and r["Team_Owner"] == my_owner and r["Is_Starter"]],
+                    })
+
+                if not jobs:
+                    st.write(f"{player_pool[acquire_id]['full_name']} isn't on another team in any of your leagues.")
+                else:
+                    with st.spinner(f"Searching offers in {len(jobs)} leagues..."):
+                        # Package search is CPU bound: one league per worker process
+                        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+                            offer_rows = [row for rows in pool.map(league_trade_for_offers, jobs) for row in rows]
+                    st.write(f"Found on another team in {len(jobs)} of your {len(league_options)} leagues.")
+                    if offer_rows:
+                        offers_df = pd.DataFrame(offer_rows)
+                        offers_df = offers_df.assign(_gap=offers_df["Gap %"].abs()).sort_values(
+                            ["_gap", "Total Value"], ascending=[True, False]
+                        ).drop(columns="_gap").reset_index(drop=True)
+                        st.dataframe(offers_df, use_container_width=True)
                     else:
-                        st.write("No 3-for-1 offers found in that range.")
-        
+                        st.write("No offers found in that range in any league.")
+
+        elif active_tab == "Trade Grades":
+            with st.spinner("Grading every trade in the league's history..."):
+                league_trades = league.get("trades")
+                player_pool = league.get("player_pool")
+                roster_owners = load_roster_owners({t["league_id"] for t in league_trades} | {league_id})
+                history = KTCHistory() if os.path.isdir(DEFAULT_HISTORY_DIR) else None
+                per_trade_df, per_owner_df = grade_trades(
+                    league_trades, player_pool, ktc_df, roster_owners, qb_premium_setting, history,
+                    ktc_lookup=league.get("ktc_lookup")
+                )
+
+            st.markdown("<h3 style='text-align:center;'>Trade Grades</h3>", unsafe_allow_html=True)
+            if per_trade_df.empty:
+                st.write("No trades found in this league's history.")
+            else:
+                # Only call it dated values when most assets actually had a snapshot on or before their trade
+                history_share = per_trade_df.attrs.get("history_share", 0.0)
+                if history_share >= 0.5:
+                    value_basis = (f"KTC values on the date of each trade ({history_share:.0%} of assets; "
+                                   "the rest at today's values)")
+                elif history_share > 0:
+                    value_basis = f"today's KTC values ({history_share:.0%} of assets valued on their trade date)"
+                else:
+                    value_basis = "today's KTC values"
+                st.write(f"{per_trade_df['Trade ID'].nunique()} trades across all linked seasons, graded with {value_basis}. "
+                         "Net Value is what each owner received minus what they sent.")
+                st.markdown("<h4>By Owner</h4>", unsafe_allow_html=True)
+                st.dataframe(per_owner_df, use_container_width=True)
+                st.markdown("<h4>Every Trade</h4>", unsafe_allow_html=True)
+                st.dataframe(per_trade_df, use_container_width=True, height=max(400, min(40 * len(per_trade_df) + 60, 900)))
+
         elif active_tab == "League Breakdown":
             with st.spinner("Calculating League Statistics..."):
-                import time
-        
-                this_league_users = requests.get(f"https://api.sleeper.app/v1/league/{league_id}/users").json()
+                this_league_users = league.get("users")
                 league_breakdown_rows = []
         
                 for u in this_league_users:
@@ -1051,23 +924,20 @@ if username:
                     
                     try:
                         owner_leagues_url = f"https://api.sleeper.app/v1/user/{their_user_id}/leagues/nfl/2025"
-                        leagues_for_owner = requests.get(owner_leagues_url).json()
+                        leagues_for_owner = sleeper_get(owner_leagues_url, CRAWL).json()
                         for lg in leagues_for_owner:
-                            lg_type = str(lg.get('settings', {}).get('type', '')).lower()
-                            is_dynasty = (lg_type == "dynasty" or lg_type == "2" or "dynasty" in lg.get('name', '').lower())
-                            is_bestball = lg.get("settings", {}).get("best_ball", 0) == 1
+                            fmt = league_format(lg)
                     
-                            if is_dynasty and is_bestball:
+                            if fmt == "Dynasty Best Ball":
                                 dynasty_bestball += 1
-                            elif is_dynasty and not is_bestball:
+                            elif fmt == "Dynasty Lineup":
                                 dynasty_lineup += 1
-                            elif not is_dynasty and is_bestball:
+                            elif fmt == "Redraft Best Ball":
                                 redraft_bestball += 1
-                            elif not is_dynasty and not is_bestball:
+                            elif fmt == "Redraft Lineup":
                                 redraft_lineup += 1
                     
                         total_count = len(leagues_for_owner)
-                        time.sleep(0.10)
                     except Exception:
                         dynasty_lineup = -1
                         dynasty_bestball = -1
@@ -1095,10 +965,10 @@ if username:
         elif active_tab == "Player Portfolio":
             with st.spinner("Calculating Player Ownership..."):
                 # Get all owners in the current league
-                league_users_url = f"https://api.sleeper.app/v1/league/{league_id}/users"
-                league_users = requests.get(league_users_url).json()
+                league_users = league.get("users")
                 owner_display_map = {u['display_name']: u['user_id'] for u in league_users}
                 owner_names = list(owner_display_map.keys())
+                owner_id_to_name = {uid: name for name, uid in owner_display_map.items()}
                 
                 username_display = username  # (from the sidebar input)
                 default_index = 0  # Fallback: first owner in the list
@@ -1107,46 +977,20 @@ if username:
                     if name.strip().lower() == username_display.strip().lower():
                         default_index = i
                         break
+
+                # One owner x player matrix for the whole league; every selection below is a lookup
+                ownership = load_ownership_matrix(league_id, tuple(owner_display_map.values()))
+                player_pool = league.get("player_pool")
                 
                 selected_owner = st.selectbox("Select Owner for Player Portfolio", owner_names, index=default_index)
                 selected_owner_id = owner_display_map[selected_owner]
-            
-                # Fetch all of the selected owner's leagues (2025)
-                owner_leagues_url = f"https://api.sleeper.app/v1/user/{selected_owner_id}/leagues/nfl/2025"
-                leagues_for_owner = requests.get(owner_leagues_url).json()
                
                 # --- Build counts for each format ---
-                format_types = [
-                    "Dynasty Lineup",
-                    "Dynasty Best Ball",
-                    "Redraft Lineup",
-                    "Redraft Best Ball"
-                ]
-                format_counts = {ftype: 0 for ftype in format_types}
-                
-                for league in leagues_for_owner:
-                    lg_type = str(league.get('settings', {}).get('type', '')).lower()
-                    is_dynasty = (lg_type == "dynasty" or lg_type == "2" or "dynasty" in league.get('name', '').lower())
-                    is_bestball = league.get("settings", {}).get("best_ball", 0) == 1
-                
-                    if is_dynasty and is_bestball:
-                        format_counts["Dynasty Best Ball"] += 1
-                    elif is_dynasty and not is_bestball:
-                        format_counts["Dynasty Lineup"] += 1
-                    elif not is_dynasty and is_bestball:
-                        format_counts["Redraft Best Ball"] += 1
-                    elif not is_dynasty and not is_bestball:
-                        format_counts["Redraft Lineup"] += 1
-                
-                format_counts["All"] = sum(format_counts.values())
+                format_counts = ownership.format_counts(selected_owner_id)
                 
                 # --- Build options with counts ---
-                filter_options = [
-                    f"All ({format_counts['All']})",
-                    f"Dynasty Lineup ({format_counts['Dynasty Lineup']})",
-                    f"Dynasty Best Ball ({format_counts['Dynasty Best Ball']})",
-                    f"Redraft Lineup ({format_counts['Redraft Lineup']})",
-                    f"Redraft Best Ball ({format_counts['Redraft Best Ball']})"
+                filter_options = [f"All ({format_counts['All']})"] + [
+                    f"{ftype} ({format_counts[ftype]})" for ftype in FORMAT_TYPES
                 ]
                 
                 selected_filter = st.selectbox(
@@ -1158,50 +1002,14 @@ if username:
                 # Use just the type for your filter logic
                 filter_option = selected_filter.split(' (')[0]
             
-                def league_matches_filter(league, option):
-                    lg_type = str(league.get('settings', {}).get('type', '')).lower()
-                    is_dynasty = (lg_type == "dynasty" or lg_type == "2" or "dynasty" in league.get('name', '').lower())
-                    is_bestball = league.get("settings", {}).get("best_ball", 0) == 1
-            
-                    if option == "All":
-                        return True
-                    if option == "Dynasty Lineup":
-                        return is_dynasty and not is_bestball
-                    if option == "Dynasty Best Ball":
-                        return is_dynasty and is_bestball
-                    if option == "Redraft Lineup":
-                        return (not is_dynasty) and not is_bestball
-                    if option == "Redraft Best Ball":
-                        return (not is_dynasty) and is_bestball
-                    return True
-            
                 try:
-                    filtered_leagues = [league for league in leagues_for_owner if league_matches_filter(league, filter_option)]
-                    total_leagues = len(filtered_leagues)
-                    player_counts = {}
-            
-                    for league in filtered_leagues:
-                        league_id_this = league['league_id']
-                        rosters = requests.get(f"https://api.sleeper.app/v1/league/{league_id_this}/rosters").json()
-                        my_roster = next((r for r in rosters if r.get("owner_id") == selected_owner_id), None)
-                        if not my_roster:
-                            continue
-                        players_on_roster = my_roster.get("players") or []
-                        for pid in players_on_roster:
-                            player_counts[pid] = player_counts.get(pid, 0) + 1
-            
-                    rows = []
-                    for pid, count in player_counts.items():
-                        player_name = player_pool.get(pid, {}).get("full_name", pid)
-                        ownership_pct = (count / total_leagues) * 100 if total_leagues else 0
-                        rows.append({
-                            "Player": player_name,
-                            "Leagues Owned": count,
-                            "Ownership %": f"{ownership_pct:.0f}%"
-                        })
-                    
-                    # FIX: Build the DataFrame here BEFORE you use it!
-                    portfolio_df = pd.DataFrame(rows).sort_values("Leagues Owned", ascending=False).reset_index(drop=True)
+                    total_leagues = format_counts[filter_option]
+                    portfolio_df = ownership.portfolio(selected_owner_id, filter_option)
+                    portfolio_df = pd.DataFrame({
+                        "Player": [player_pool.get(pid, {}).get("full_name", pid) for pid in portfolio_df["Player_ID"]],
+                        "Leagues Owned": portfolio_df["Leagues Owned"],
+                        "Ownership %": [f"{pct:.0f}%" for pct in portfolio_df["Ownership %"]],
+                    })
                     
                     # Show league total description
                     if filter_option == "All":
@@ -1219,9 +1027,43 @@ if username:
                     st.write("This table shows the 2025 ownership % for each player across all their leagues (filtered):")
                     table_height = max(400, 40 * len(portfolio_df) + 60)
                     st.dataframe(portfolio_df, use_container_width=True, height=table_height)
+
+                    # --- Who in this league owns the most shares of a player ---
+                    st.markdown("<h3 style='text-align:center;'>Most Shares Held</h3>", unsafe_allow_html=True)
+                    owned_ids = ownership.entries["player_id"].value_counts().index.tolist()
+                    owned_ids = [pid for pid in owned_ids if pid in player_pool]
+                    shares_pid = st.selectbox(
+                        "Who owns the most shares of:",
+                        owned_ids,
+                        format_func=lambda pid: player_pool[pid].get("full_name", pid)
+                    )
+                    if shares_pid:
+                        holders_df = ownership.top_holders(shares_pid, filter_option)
+                        holders_df = pd.DataFrame({
+                            "Owner": [owner_id_to_name.get(uid, uid) for uid in holders_df["Owner_ID"]],
+                            "Shares": holders_df["Shares"],
+                            "Leagues": holders_df["Leagues"],
+                            "Ownership %": [f"{pct:.0f}%" for pct in holders_df["Ownership %"]],
+                        })
+                        st.dataframe(holders_df, use_container_width=True)
                 except Exception as e:
                     st.error(f"Could not calculate player portfolio: {e}")
 
+        # Rostered players the KTC snapshot has no value for (see ktc_aliases.csv to pin a match).
+        # Only reported once a tab has already done the KTC join.
+        if league.loaded("roster_rows"):
+            rostered = league.get("roster_frame")
+            rostered = rostered[rostered["Position"].isin(KTC_POSITIONS)]
+            unmatched_ids = set(league.get("ktc_lookup").unmatched(rostered["Sleeper_Player_ID"]))
+            if unmatched_ids:
+                with st.sidebar.expander(f"Unmatched KTC Players ({len(unmatched_ids)})"):
+                    st.dataframe(
+                        rostered[rostered["Sleeper_Player_ID"].isin(unmatched_ids)][["Player_Sleeper", "Position", "Team_Owner"]].reset_index(drop=True),
+                        use_container_width=True
+                    )
+
+    except LeagueUnavailable as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"⚠️ Something went wrong: {e}")
         st.text(traceback.format_exc())
@@ -1229,54 +1071,30 @@ if username:
 else:
     st.info("Enter your Sleeper username to get started.")
 
-# --------------------
-# Inject rookie picks into player_pool once function is available
-if 'league_id' in locals():
-    try:
-        all_trades_preview = get_all_trades_from_league(league_id)
-        all_ids_preview = set()
-        for trade in all_trades_preview:
-            all_ids_preview.update((trade.get("adds") or {}).keys())
-            all_ids_preview.update((trade.get("drops") or {}).keys())
-        for pid in all_ids_preview:
-            if isinstance(pid, str) and pid.startswith("rookie_") and pid not in player_pool:
-                player_pool[pid] = {
-                    "full_name": format_pick_id(pid),
-                    "position": "PICK",
-                    "team": ""
-                }
-    except:
-        pass
-
 # --------------------
 # Pick formatter for rough rookie picks
 # --------------------
 def ordinal(n):
     return "%d%s" % (n, "tsnrhtdd"[(n//10%10!=1)*(n%10<4)*n%10::4])
 
-def filter_trades_for_player(trades, player_name, player_pool):
+def filter_trades_for_player(trades, player_id):
     """
-    Filters a list of trades to return only those that involve the given player.
+    Filters a list of trades to return only those that involve the given player (by Sleeper id).
     """
-    filtered = []
-    for trade in trades:
-        added = trade.get("adds") or {}
-        dropped = trade.get("drops") or {}
-        all_players_involved = list(added.keys()) + list(dropped.keys())
-        for player_id in all_players_involved:
-            sleeper_name = player_pool.get(player_id, {}).get("full_name", "")
-            if sleeper_name.lower() == player_name.lower():
-                filtered.append(trade)
-                break
-    return filtered
+    player_id = str(player_id)
+    return [
+        trade for trade in trades
+        if player_id in (trade.get("adds") or {}) or player_id in (trade.get("drops") or {})
+    ]
 
 # START: Side-by-side player images + trade history viewer
-if "selected_names" in locals() and selected_names:
+if "selected_ids" in locals() and selected_ids:
 
     # Trade History Viewer
     if st.button("Show Trade History"):
         with st.spinner("Loading trade history..."):
-            all_trades = get_all_trades_from_league(league_id)
+            all_trades = league.get("trades")
+            player_pool = league.get("league_players")
 
             # Inject rookie picks into player_pool if missing
             all_ids = set()
@@ -1291,8 +1109,9 @@ if "selected_names" in locals() and selected_names:
                         "position": "PICK",
                         "team": ""
                     }
-            for name in selected_names:
-                player_trades = filter_trades_for_player(all_trades, name, player_pool)
+            for selected_id in selected_ids:
+                name = directory.name(selected_id)
+                player_trades = filter_trades_for_player(all_trades, selected_id)
                 st.subheader(f"Trade History for {name} ({len(player_trades)} found)")
                 if player_trades:
                     for trade in player_trades:
@@ -1309,7 +1128,7 @@ if "selected_names" in locals() and selected_names:
                         roster_ids = trade.get("roster_ids", [])
 
                         # Reverse lookup for roster_id to team name
-                        owner_lookup = {int(row["Roster_ID"]): row["Team_Owner"] for _, row in df.iterrows()}
+                        owner_lookup = {int(row["Roster_ID"]): row["Team_Owner"] for _, row in df.dropna(subset=["Roster_ID"]).iterrows()}
                         teams = [owner_lookup.get(rid, f"Team {rid}") for rid in roster_ids]
 
                         added_names = [player_pool.get(pid, {}).get("full_name", pid) for pid in added_by.keys()]
@@ -1322,7 +1141,7 @@ if "selected_names" in locals() and selected_names:
                         week = trade.get("week", "?")
                         roster_ids = trade.get("roster_ids", [])
 
-                        owner_lookup = {int(row["Roster_ID"]): row["Team_Owner"] for _, row in df.iterrows()}
+                        owner_lookup = {int(row["Roster_ID"]): row["Team_Owner"] for _, row in df.dropna(subset=["Roster_ID"]).iterrows()}
 
                         give_by_roster = {}
                         receive_by_roster = {}
@@ -1347,4 +1166,34 @@ if "selected_names" in locals() and selected_names:
                     st.write("No trades found involving this player.")
 # END
 
-                
+# Snapshot whatever this run loaded that the last snapshot didn't have
+if "league" in locals():
+    try:
+        if save_league_snapshot(league, restored=restored_nodes):
+            # Read the newer snapshot on the next run
+            memory.discard(("league_snapshot", league_id))
+    except Exception as e:
+        print(f"Could not save league snapshot: {e}")
+
+# Account for this session's widget state (one selection list per league it has opened)
+memory.put(("session", session_id), None, size=estimate_size(st.session_state.to_dict()))
+
+# --------------------
+# Sleeper request budget (shared by every session on this server)
+# --------------------
+with st.sidebar.expander("Sleeper Request Budget"):
+    st.json(scheduler.metrics())
+    st.caption("League metadata cache")
+    st.json(metadata.stats())
+    st.caption("Shared cache (player pool, transactions, league snapshots; shared by replicas on this host)")
+    st.json(shared_cache().stats())
+    st.caption("Image thumbnail cache")
+    st.json(thumbnails.stats())
+    st.caption("Memory budget (league state kept between reruns)")
+    st.json(memory.stats())
+    st.caption("Live suggestion results")
+    st.json(suggestion_memo.stats())
+    if "league" in locals():
+        st.caption("League data loaded this run (seconds)")
+        st.json(league.timings)
+        st.caption(f"Restored from snapshot: {', '.join(restored_nodes) or 'nothing'}")
@@ -0,0 +1,775 @@
+# --------------------
+# Trade suggestion engine (no Streamlit imports so it can run anywhere)
+# --------------------
+import heapq
+from itertools import combinations, permutations
+
+import numpy as np
+
+CORE_POSITIONS = ["QB", "RB", "WR", "TE"]
+BENCH_TAGS = {"BN", "BE", "IR", "TAXI"}
+
+# --------------------
+# Package Bonus Function (for multi-player trade away)
+# --------------------
+# (minimum package total, bonus) from the highest tier down
+SINGLE_PLAYER_BONUS_TIERS = [
+    (9000, 3700), (8500, 3200), (8000, 2900), (7500, 2550), (7000, 2300), (6500, 2100),
+    (6000, 1850), (5000, 1650), (4000, 1300), (3000, 1000), (2000, 700),
+]
+MULTI_PLAYER_BONUS_TIERS = [
+    (9000, 3500), (8000, 2700), (7000, 2200), (6000, 1800), (5000, 1300), (4000, 900),
+    (3000, 600), (2000, 400),
+]
+EXTRA_PLAYER_PENALTY = 400
+
+
+def _tier_bonus(total, tiers):
+    for minimum, bonus in tiers:
+        if total >= minimum:
+            return bonus
+    return 0
+
+
+def package_bonus(values):
+    total = sum(values)
+    num_players = len(values)
+
+    if num_players == 1:
+        return _tier_bonus(total, SINGLE_PLAYER_BONUS_TIERS)
+    else:
+        penalty = max(0, (num_players - 1) * EXTRA_PLAYER_PENALTY)
+        return _tier_bonus(total, MULTI_PLAYER_BONUS_TIERS) - penalty
+
+
+def package_bonus_array(totals, counts):
+    """
+    Vectorized package_bonus over many packages at once: package totals and player counts.
+    """
+    totals = np.asarray(totals)
+    counts = np.asarray(counts)
+
+    def tier_lookup(tiers):
+        minimums = np.array([m for m, _ in reversed(tiers)])
+        bonuses = np.array([0] + [b for _, b in reversed(tiers)])
+        return bonuses[np.searchsorted(minimums, totals, side="right")]
+
+    single = tier_lookup(SINGLE_PLAYER_BONUS_TIERS)
+    multi = tier_lookup(MULTI_PLAYER_BONUS_TIERS) - np.maximum(0, (counts - 1) * EXTRA_PLAYER_PENALTY)
+    return np.where(counts == 1, single, multi)
+
+# --------------------
+# Dud Bonus Function
+# --------------------
+def dud_bonus(value):
+    if value <= 1000: return -800
+    elif value <= 1500: return -600
+    elif value <= 2000: return -400
+    elif value <= 2500: return -250
+    return 0
+
+# --------------------
+# Roster constraints
+# --------------------
+def starting_slots(roster_positions):
+    """
+    Returns the roster_positions entries before the first bench slot.
+    """
+    positions = roster_positions or []
+    for i, pos in enumerate(positions):
+        if pos in BENCH_TAGS:
+            return positions[:i]
+    return positions
+
+
+def lineup_minimums(roster_positions):
+    """
+    Minimum players per position a team needs to field its dedicated starting slots.
+    FLEX / SUPER_FLEX slots are ignored since any of several positions can fill them.
+    """
+    lineup = starting_slots(roster_positions)
+    return {pos: lineup.count(pos) for pos in CORE_POSITIONS if lineup.count(pos)}
+
+
+def position_counts(players):
+    counts = {}
+    for p in players:
+        counts[p["Position"]] = counts.get(p["Position"], 0) + 1
+    return counts
+
+
+def keeps_minimums(counts, minimums, outgoing_positions, incoming_positions=()):
+    """
+    True if a roster with `counts` still meets `minimums` after sending away
+    `outgoing_positions` and receiving `incoming_positions`.
+    """
+    if not minimums:
+        return True
+    after = dict(counts)
+    for pos in outgoing_positions:
+        after[pos] = after.get(pos, 0) - 1
+    for pos in incoming_positions:
+        after[pos] = after.get(pos, 0) + 1
+    return all(after.get(pos, 0) >= need for pos, need in minimums.items())
+
+
+def movable_players(players, blocked_ids=(), max_value=None):
+    """
+    Drops excluded / protected players (and anyone above max_value) before the search runs.
+    """
+    blocked = {str(pid) for pid in blocked_ids}
+    return [
+        p for p in players
+        if str(p["Sleeper_Player_ID"]) not in blocked
+        and (max_value is None or p["KTC_Value"] <= max_value)
+    ]
+
+
+# --------------------
+# Package search
+# --------------------
+def with_effective_values(players, top_qbs, qb_premium):
+    """
+    Copies player records with a "Value" key: KTC plus the QB premium for top QBs.
+    """
+    top = set(top_qbs)
+    return [
+        dict(p, Value=p["KTC_Value"] + (qb_premium if p["Position"] == "QB" and p["Player_Sleeper"] in top else 0))
+        for p in players
+    ]
+
+
+def position_slack(counts, minimums, incoming_positions=()):
+    """
+    How many players of each minimum-tracked position a roster can still send away.
+    """
+    if not minimums:
+        return {}
+    after = dict(counts or {})
+    for pos in incoming_positions:
+        after[pos] = after.get(pos, 0) + 1
+    slack = {pos: after.get(pos, 0) - need for pos, need in minimums.items()}
+    if any(s < 0 for s in slack.values()):
+        # Roster is already short; only stop it from getting worse
+        slack = {pos: max(s, 0) for pos, s in slack.items()}
+    return slack
+
+
+def search_packages(players, size, low, high, counts=None, minimums=None, incoming_positions=()):
+    """
+    Branch-and-bound search for every `size`-player package whose "Value" lands in [low, high].
+
+    players: list of dicts with at least "Position" and "Value" (KTC plus any QB premium).
+    counts / minimums: the giving team's position counts and the per-position floor it must
+    keep after the trade (incoming_positions are credited first). Branches are cut as soon as
+    a package overshoots the band, can no longer reach it, or would break a minimum.
+    """
+    if size < 1 or len(players) < size:
+        return []
+
+    items = sorted(players, key=lambda p: p["Value"], reverse=True)
+    values = [p["Value"] for p in items]
+    n = len(items)
+    prefix = [0]
+    for v in values:
+        prefix.append(prefix[-1] + v)
+
+    slack = position_slack(counts, minimums, incoming_positions)
+    results = []
+    chosen = []
+
+    def extend(start, total):
+        need = size - len(chosen)
+        if need == 0:
+            results.append(tuple(chosen))
+            return
+        # Cheapest possible tail for the remaining picks after this one
+        cheapest_tail = prefix[n] - prefix[n - need + 1]
+        for i in range(start, n - need + 1):
+            # Best case from here is the next `need` values (sorted descending)
+            if total + prefix[i + need] - prefix[i] < low:
+                break
+            value = values[i]
+            if total + value + cheapest_tail > high:
+                continue
+            pos = items[i]["Position"]
+            if pos in slack:
+                if slack[pos] <= 0:
+                    continue
+                slack[pos] -= 1
+            chosen.append(items[i])
+            extend(i + 1, total + value)
+            chosen.pop()
+            if pos in slack:
+                slack[pos] += 1
+
+    extend(0, 0)
+    return results
+
+
+def top_qb_names(players, limit=30):
+    qbs = sorted((p for p in players if p["Position"] == "QB"), key=lambda p: p["KTC_Value"], reverse=True)
+    return [p["Player_Sleeper"] for p in qbs[:limit]]
+
+
+# --------------------
+# Band index: slider changes without re-enumerating packages
+# --------------------
+class BandIndex:
+    """
+    Every package each roster in a league could send, built once per league state (each
+    package size on first use).
+
+    A package's value is its KTC sum plus (top QBs in it) x QB premium, so packages are grouped
+    by top-QB count and sorted by KTC sum within each group. Any tolerance band at any premium
+    is then one binary search and a slice per group, O(log n + k), with no combination loop.
+    """
+
+    def __init__(self, players, top_qbs=None):
+        if top_qbs is None:
+            top_qbs = top_qb_names(players)
+        top = set(top_qbs)
+        self.players = list(players)
+        self.teams = sorted({p["Team_Owner"] for p in self.players})
+        team_codes = {team: i for i, team in enumerate(self.teams)}
+        self.team_of = np.array([team_codes[p["Team_Owner"]] for p in self.players], dtype=np.int32)
+        self.rows = {str(p["Sleeper_Player_ID"]): i for i, p in enumerate(self.players)}
+        self.positions = np.array([p["Position"] for p in self.players])
+        self.ktc = np.array([p["KTC_Value"] for p in self.players], dtype=np.int64)
+        self.top_qb = np.array([p["Position"] == "QB" and p["Player_Sleeper"] in top for p in self.players], dtype=np.int64)
+        self._groups = {}  # size -> {top QB count: (sorted KTC sums, member rows in the same order)}
+        self._valued = {}  # qb_premium -> player records carrying "Value" at that premium
+        self.on_grow = None  # called after a package size or premium is filled in (a cache re-measuring us)
+
+    def _grew(self):
+        if self.on_grow is not None:
+            self.on_grow()
+
+    def _build(self, size):
+        chunks = []
+        for code in range(len(self.teams)):
+            roster = np.nonzero(self.team_of == code)[0]
+            if len(roster) >= size:
+                local = np.fromiter(
+                    (i for combo in combinations(range(len(roster)), size) for i in combo), dtype=np.int32
+                ).reshape(-1, size)
+                chunks.append(roster[local])
+        if not chunks:
+            return {}
+        members = np.concatenate(chunks)
+        sums = self.ktc[members].sum(axis=1)
+        qb_counts = self.top_qb[members].sum(axis=1)
+        groups = {}
+        for q in np.unique(qb_counts):
+            rows = np.nonzero(qb_counts == q)[0]
+            order = rows[np.argsort(sums[rows], kind="stable")]
+            groups[int(q)] = (sums[order], members[order])
+        return groups
+
+    def valued(self, qb_premium):
+        if qb_premium not in self._valued:
+            if len(self._valued) >= 8:
+                self._valued.clear()
+            self._valued[qb_premium] = [
+                dict(p, Value=int(ktc + flag * qb_premium))
+                for p, ktc, flag in zip(self.players, self.ktc, self.top_qb)
+            ]
+            self._grew()
+        return self._valued[qb_premium]
+
+    def query(self, size, low, high, qb_premium, teams=None, player_ok=None, slack=None, needs=None):
+        """
+        Packages (tuples of player records carrying "Value") whose value at qb_premium is in [low, high].
+
+        teams: owners whose packages count (default all); player_ok: bool per player;
+        slack: {owner: {position: most that roster may send}}; needs: {position: fewest a package
+        must hold}. All are array masks on the slice, so only packages that survive become records.
+        """
+        if size not in self._groups:
+            self._groups[size] = self._build(size)
+            self._grew()
+        team_ok = None
+        if teams is not None:
+            team_ok = np.zeros(len(self.teams), dtype=bool)
+            team_ok[[i for i, team in enumerate(self.teams) if team in set(teams)]] = True
+        limits = {}
+        for team, team_slack in (slack or {}).items():
+            for pos, limit in team_slack.items():
+                limits.setdefault(pos, np.full(len(self.teams), size, dtype=np.int64))[self.teams.index(team)] = limit
+
+        results = []
+        for q, (sums, members) in self._groups[size].items():
+            offset = q * qb_premium
+            lo = np.searchsorted(sums, low - offset, side="left")
+            hi = np.searchsorted(sums, high - offset, side="right")
+            rows = members[lo:hi]
+            if team_ok is not None and len(rows):
+                rows = rows[team_ok[self.team_of[rows[:, 0]]]]
+            if player_ok is not None and len(rows):
+                rows = rows[player_ok[rows].all(axis=1)]
+            for pos, limit in limits.items():
+                if len(rows):
+                    rows = rows[(self.positions[rows] == pos).sum(axis=1) <= limit[self.team_of[rows[:, 0]]]]
+            for pos, need in (needs or {}).items():
+                if len(rows):
+                    rows = rows[(self.positions[rows] == pos).sum(axis=1) >= need]
+            if len(rows):
+                # Highest value first within a package, like search_packages lists them
+                values = self.ktc[rows] + self.top_qb[rows] * qb_premium
+                rows = np.take_along_axis(rows, np.argsort(-values, axis=1, kind="stable"), axis=1)
+                players = self.valued(qb_premium)
+                results.extend(tuple(players[i] for i in row) for row in rows.tolist())
+        return results
+
+
+def band_packages(index, size, low, high, qb_premium, teams, allowed_ids=None, blocked_ids=(), max_value=None,
+                  team_counts=None, minimums=None, incoming_positions=(), needs=None):
+    """
+    search_packages over a BandIndex for the given teams: same band, same roster-minimum rule,
+    plus the movable-player filters (allowed_ids / blocked_ids / max_value) and the receiving
+    roster's needs ({position: fewest the package must bring}).
+    """
+    player_ok = np.ones(len(index.players), dtype=bool)
+    if allowed_ids is not None:
+        player_ok[:] = False
+        player_ok[[index.rows[pid] for pid in allowed_ids if pid in index.rows]] = True
+    player_ok[[index.rows[pid] for pid in blocked_ids if pid in index.rows]] = False
+    if max_value is not None:
+        player_ok &= index.ktc <= max_value
+    slack = {
+        team: position_slack((team_counts or {}).get(team, {}), minimums, incoming_positions)
+        for team in teams
+    } if minimums else None
+    return index.query(size, low, high, qb_premium, teams, player_ok, slack, needs)
+
+
+def trade_for_packages(my_players, target, tolerance, max_size=3, counts=None, minimums=None, target_owner_counts=None,
+                       index=None, qb_premium=0):
+    """
+    The Trade For search: packages of 1..max_size of `my_players` (already carrying "Value")
+    worth the target's KTC plus its package bonus, within +/- tolerance %.
+    Returns {size: [package, ...]} with packages that keep both rosters above `minimums`.
+
+    index: optional BandIndex for the league (my_players must then carry Value at qb_premium);
+    packages come from band queries instead of a fresh search.
+    """
+    my_teams = {p["Team_Owner"] for p in my_players}
+    allowed_ids = {str(p["Sleeper_Player_ID"]) for p in my_players}
+    target_adjusted_value = target["KTC_Value"] + package_bonus([target["KTC_Value"]])
+    low = int(target_adjusted_value * (1 - tolerance / 100))
+    high = int(target_adjusted_value * (1 + tolerance / 100))
+    # What the target's roster has to get back once the target is gone
+    needs = {}
+    if target_owner_counts is not None:
+        for pos, need in (minimums or {}).items():
+            short = need - target_owner_counts.get(pos, 0) + (target["Position"] == pos)
+            if short > 0:
+                needs[pos] = short
+
+    offers = {}
+    for size in range(1, max_size + 1):
+        if index is not None:
+            offers[size] = band_packages(
+                index, size, low, high, qb_premium, my_teams, allowed_ids,
+                team_counts={team: counts for team in my_teams}, minimums=minimums,
+                incoming_positions=[target["Position"]], needs=needs
+            )
+            continue
+        packages = search_packages(
+            my_players, size, low, high,
+            counts=counts, minimums=minimums, incoming_positions=[target["Position"]]
+        )
+        offers[size] = [
+            combo for combo in packages
+            if target_owner_counts is None
+            or keeps_minimums(target_owner_counts, minimums, [target["Position"]], [p["Position"] for p in combo])
+        ]
+    return offers
+
+
+def trade_away_packages(players, owner, selected, top_qbs, tolerance, qb_premium, max_size=3, minimums=None, blocked_ids=(),
+                        index=None):
+    """
+    The Trade Away search: what the other teams in `players` (league records) could send
+    `owner` for `selected` (records from owner's roster), within +/- tolerance %.
+    Returns {1: [player, ...], 2: [(p1, p2), ...]}; the 2-player side is only searched when max_size >= 2.
+
+    index: optional BandIndex(players, top_qbs) so pairs come from one band query.
+    """
+    minimums = minimums or {}
+    blocked = {str(pid) for pid in blocked_ids}
+    selected_values = [p["KTC_Value"] for p in selected]
+    total_ktc = sum(selected_values)
+    total_qb_premium = sum(qb_premium for p in selected if p["Position"] == "QB" and p["Player_Sleeper"] in top_qbs)
+    incoming_positions = [p["Position"] for p in selected]
+
+    team_rosters = {}
+    for p in players:
+        if p["Team_Owner"] != owner:
+            team_rosters.setdefault(p["Team_Owner"], []).append(p)
+    team_counts = {team: position_counts(rows) for team, rows in team_rosters.items()}
+    my_counts = position_counts([p for p in players if p["Team_Owner"] == owner])
+
+    # 1-for-1 (or n-for-1): their single player carries the package bonus when we send several
+    adjusted_total = total_ktc + total_qb_premium
+    one_low = int(adjusted_total * (1 - tolerance / 100))
+    one_high = int(adjusted_total * (1 + tolerance / 100))
+    singles = []
+    for p in players:
+        value = p["KTC_Value"] + (package_bonus([p["KTC_Value"]]) if len(selected) > 1 else 0)
+        if (one_low <= value <= one_high and p["Team_Owner"] != owner
+                and str(p["Sleeper_Player_ID"]) not in blocked
+                and keeps_minimums(team_counts.get(p["Team_Owner"], {}), minimums, [p["Position"]], incoming_positions)
+                and keeps_minimums(my_counts, minimums, incoming_positions, [p["Position"]])):
+            singles.append(p)
+    offers = {1: singles}
+
+    if max_size >= 2:
+        side_total = total_ktc + package_bonus(selected_values)
+        two_low = int(side_total * (1 - tolerance / 100))
+        two_high = int(side_total * (1 + tolerance / 100))
+        if index is not None:
+            # What my roster has to get back to stay above minimums once `selected` is gone
+            needs = {
+                pos: need - my_counts.get(pos, 0) + incoming_positions.count(pos)
+                for pos, need in minimums.items()
+            }
+            offers[2] = band_packages(
+                index, 2, two_low, two_high, qb_premium, list(team_rosters), blocked_ids=blocked,
+                max_value=total_ktc, team_counts=team_counts, minimums=minimums, incoming_positions=incoming_positions,
+                needs={pos: n for pos, n in needs.items() if n > 0}
+            )
+            return offers
+
+        pairs = []
+        for team_owner, team_players in team_rosters.items():
+            candidates = with_effective_values(
+                movable_players(team_players, blocked, max_value=total_ktc), top_qbs, qb_premium
+            )
+            packages = search_packages(
+                candidates, 2, two_low, two_high,
+                counts=team_counts[team_owner], minimums=minimums, incoming_positions=incoming_positions
+            )
+            pairs.extend(
+                (p1, p2) for p1, p2 in packages
+                if keeps_minimums(my_counts, minimums, incoming_positions, [p1["Position"], p2["Position"]])
+            )
+        offers[2] = pairs
+    return offers
+
+
+# --------------------
+# Three-team trades
+# --------------------
+def side_value(players, other_size):
+    """
+    One side of a deal: KTC plus QB premium ("Value"), plus the package bonus when it is
+    the side with fewer pieces (same consolidation rule as the trade grades).
+    """
+    value = sum(p["Value"] for p in players)
+    if len(players) < other_size:
+        value += package_bonus([p["KTC_Value"] for p in players])
+    return value
+
+
+class PackageIndex:
+    """
+    Every 1..max_size package from one roster, sorted by value per (size, other side's size),
+    so the packages worth between low and high come out of two binary searches.
+    """
+
+    def __init__(self, players, max_size, max_value=None):
+        players = [p for p in players if max_value is None or p["Value"] <= max_value]
+        self.packages = {size: list(combinations(players, size)) for size in range(1, max_size + 1)}
+        self._sorted = {}
+
+    def between(self, size, other_size, low, high):
+        key = (size, size < other_size)  # all that matters is whether the bonus applies
+        if key not in self._sorted:
+            packages = self.packages.get(size, [])
+            values = np.array([side_value(c, other_size) for c in packages], dtype=np.float64)
+            order = np.argsort(values, kind="stable")
+            self._sorted[key] = (values[order], [packages[i] for i in order])
+        values, packages = self._sorted[key]
+        lo = np.searchsorted(values, low, side="left")
+        hi = np.searchsorted(values, high, side="right")
+        return [(float(values[i]), packages[i]) for i in range(lo, hi)]
+
+
+def three_team_trades(players, owner, selected, top_qbs, tolerance, qb_premium, max_size=2, minimums=None, blocked_ids=(), top_n=50):
+    """
+    Rotations owner -> A -> B -> owner: team A gets `selected` and sends a package to team B,
+    team B sends a package back to owner. Every team has to receive within +/- tolerance %
+    of what it sends. Packages are 1..max_size players.
+
+    players: league records (every team); selected: records from owner's roster.
+    Returns the top_n rotations with the smallest worst-side gap, best first.
+    """
+    t = tolerance / 100
+    minimums = minimums or {}
+    blocked = {str(pid) for pid in blocked_ids}
+    mine = with_effective_values(selected, top_qbs, qb_premium)
+    my_positions = [p["Position"] for p in mine]
+
+    rosters = {}
+    for p in players:
+        rosters.setdefault(p["Team_Owner"], []).append(p)
+    counts = {team: position_counts(rows) for team, rows in rosters.items()}
+
+    # Upper bound on any one player's value in P_A or P_B; anyone above it can't be in a package
+    penalty = EXTRA_PLAYER_PENALTY * (max_size - 1)
+    largest_bonus = SINGLE_PLAYER_BONUS_TIERS[0][1]
+    p_a_cap = max(side_value(mine, size) for size in range(1, max_size + 1)) / (1 - t)
+    p_b_cap = (p_a_cap + penalty + largest_bonus) / (1 - t)
+    widest = p_b_cap + penalty
+    indexes = {
+        team: PackageIndex(with_effective_values(movable_players(rows, blocked), top_qbs, qb_premium), max_size, widest)
+        for team, rows in rosters.items() if team != owner
+    }
+
+    def gap(received, sent):
+        return (received - sent) / sent * 100 if sent else 0.0
+
+    best = []  # max-heap on worst gap via negation, capped at top_n
+    tiebreak = 0
+    for team_a, team_b in permutations(indexes, 2):
+        for a_size in range(1, max_size + 1):
+            # A receives mine, sends P_A: mine must land within tolerance of P_A
+            mine_for_a = side_value(mine, a_size)
+            for pa_value, p_a in indexes[team_a].between(a_size, len(mine), mine_for_a / (1 + t), mine_for_a / (1 - t)):
+                a_positions = [p["Position"] for p in p_a]
+                if not keeps_minimums(counts[team_a], minimums, a_positions, my_positions):
+                    continue
+                for b_size in range(1, max_size + 1):
+                    # B receives P_A, sends P_B
+                    pa_for_b = side_value(p_a, b_size)
+                    for pb_value, p_b in indexes[team_b].between(b_size, a_size, pa_for_b / (1 + t), pa_for_b / (1 - t)):
+                        # owner receives P_B, sends mine
+                        pb_for_me = side_value(p_b, len(mine))
+                        mine_for_b = side_value(mine, b_size)
+                        if not (mine_for_b * (1 - t) <= pb_for_me <= mine_for_b * (1 + t)):
+                            continue
+                        b_positions = [p["Position"] for p in p_b]
+                        if not (keeps_minimums(counts[team_b], minimums, b_positions, a_positions)
+                                and keeps_minimums(counts[owner], minimums, my_positions, b_positions)):
+                            continue
+                        gaps = (gap(pb_for_me, mine_for_b), gap(mine_for_a, pa_value), gap(pa_for_b, pb_value))
+                        worst = max(abs(g) for g in gaps)
+                        entry = (-worst, tiebreak, team_a, p_a, team_b, p_b, gaps)
+                        tiebreak += 1
+                        if len(best) < top_n:
+                            heapq.heappush(best, entry)
+                        elif -worst > best[0][0]:
+                            heapq.heapreplace(best, entry)
+
+    rows = []
+    for neg_worst, _, team_a, p_a, team_b, p_b, gaps in sorted(best, key=lambda e: (-e[0], e[1])):
+        rows.append({
+            "You Send": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in mine) + f" → {team_a}",
+            "Team A Sends": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in p_a) + f" → {team_b}",
+            "Team B Sends": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in p_b) + " → you",
+            "Your Gap %": round(gaps[0], 1),
+            "Team A Gap %": round(gaps[1], 1),
+            "Team B Gap %": round(gaps[2], 1),
+        })
+    return rows
+
+
+# --------------------
+# Two-sided trades (m-for-n, meet in the middle)
+# --------------------
+PAIR_CHUNK = 1_000_000  # candidate (mine, theirs) pairs materialized at once per team
+TWO_SIDED_SHAPES = [(2, 2), (3, 2)]  # (players I send, players I get) offered in the app
+
+
+class SubsetSums:
+    """
+    One roster's packages of each size as arrays sorted by side value: "Value" total (KTC plus
+    QB premium), plus the package bonus when this side has fewer pieces than the other.
+
+    must_include: Sleeper ids that are in every package (the players being sold, or the target).
+    positions: positions whose per-package counts are kept (for roster minimums).
+    """
+
+    def __init__(self, players, must_include=(), positions=()):
+        must = {str(pid) for pid in must_include}
+        self.fixed = [p for p in players if str(p["Sleeper_Player_ID"]) in must]
+        self.free = [p for p in players if str(p["Sleeper_Player_ID"]) not in must]
+        self.positions = list(positions)
+        self._value = np.array([p["Value"] for p in self.free], dtype=np.int64)
+        self._ktc = np.array([p["KTC_Value"] for p in self.free], dtype=np.int64)
+        self._pos = np.array(
+            [[p["Position"] == pos for pos in self.positions] for p in self.free], dtype=np.int64
+        ).reshape(len(self.free), len(self.positions))
+        self._fixed_pos = np.array(
+            [sum(p["Position"] == pos for p in self.fixed) for pos in self.positions], dtype=np.int64
+        )
+        self._sorted = {}
+
+    def packages(self, size, other_size):
+        """
+        (side values, free-player index rows, position counts), sorted by side value.
+        """
+        key = (size, size < other_size)  # all that matters is whether the bonus applies
+        if key not in self._sorted:
+            k = size - len(self.fixed)
+            if k < 0 or k > len(self.free):
+                members = np.zeros((0, max(k, 0)), dtype=np.int64)
+            else:
+                members = np.fromiter(
+                    (i for combo in combinations(range(len(self.free)), k) for i in combo), dtype=np.int64
+                ).reshape(-1, k) if k else np.zeros((1, 0), dtype=np.int64)
+            values = self._value[members].sum(axis=1) + sum(p["Value"] for p in self.fixed)
+            if size < other_size:
+                ktc = self._ktc[members].sum(axis=1) + sum(p["KTC_Value"] for p in self.fixed)
+                values = values + package_bonus_array(ktc, np.full(len(members), size))
+            counts = self._pos[members].sum(axis=1) + self._fixed_pos
+            order = np.argsort(values, kind="stable")
+            self._sorted[key] = (values[order], members[order], counts[order])
+        return self._sorted[key]
+
+    def players(self, row):
+        return self.fixed + [self.free[i] for i in row]
+
+
+def _band_pairs(my_values, their_values, tolerance):
+    """
+    Every (i, j) with their_values[j] within +/- tolerance % of my_values[i] (their_values sorted),
+    in chunks of at most about PAIR_CHUNK pairs.
+    """
+    low = np.floor(my_values * (1 - tolerance / 100))
+    high = np.floor(my_values * (1 + tolerance / 100))
+    starts = np.searchsorted(their_values, low, side="left")
+    counts = np.searchsorted(their_values, high, side="right") - starts
+    ends = np.cumsum(counts)
+    first = 0
+    while first < len(my_values):
+        last = max(int(np.searchsorted(ends, (ends[first - 1] if first else 0) + PAIR_CHUNK, side="right")), first + 1)
+        chunk = counts[first:last]
+        total = int(chunk.sum())
+        if total:
+            i = np.repeat(np.arange(first, last), chunk)
+            offsets = np.arange(total) - np.repeat(np.cumsum(chunk) - chunk, chunk)
+            yield i, starts[i] + offsets
+        first = last
+
+
+def two_sided_trades(players, owner, top_qbs, tolerance, qb_premium, my_size, their_size, must_send=(), must_get=(),
+                     minimums=None, blocked_ids=(), top_n=50):
+    """
+    my_size-for-their_size deals between owner and any other team (or only the team holding
+    `must_get`), with both packages searched at once. Each roster's packages are precomputed as
+    sorted subset sums (SubsetSums); every one of my packages then takes its tolerance band out
+    of each other roster's sums with two binary searches, and the matching pairs are checked
+    for roster minimums as arrays.
+
+    must_send / must_get: Sleeper ids that have to be in my / their package.
+    Returns the top_n deals closest to even, as table rows.
+    """
+    minimums = minimums or {}
+    positions = list(minimums)
+    need = np.array([minimums[pos] for pos in positions], dtype=np.int64)
+    keep = {str(pid) for pid in must_send} | {str(pid) for pid in must_get}
+    blocked = {str(pid) for pid in blocked_ids} - keep
+    valued = with_effective_values(movable_players(players, blocked), top_qbs, qb_premium)
+
+    rosters, full_rosters = {}, {}
+    for p in valued:
+        rosters.setdefault(p["Team_Owner"], []).append(p)
+    for p in players:
+        full_rosters.setdefault(p["Team_Owner"], []).append(p)
+    # Minimums count everyone on the roster, blocked or not
+    counts = {
+        team: np.array([position_counts(rows).get(pos, 0) for pos in positions], dtype=np.int64)
+        for team, rows in full_rosters.items()
+    }
+    get_ids = {str(pid) for pid in must_get}
+    targets = {p["Team_Owner"] for p in valued if str(p["Sleeper_Player_ID"]) in get_ids}
+    teams = sorted(targets) if must_get else sorted(team for team in rosters if team != owner)
+    if owner not in rosters or len(targets) > 1 or owner in targets:
+        return []
+
+    mine = SubsetSums(rosters[owner], must_send, positions)
+    my_values, _, my_pos = mine.packages(my_size, their_size)
+    # Packages worth nothing (unmatched or zero-KTC players only) aren't offers, and have no gap %
+    live = np.nonzero(my_values > 0)[0]
+    if not len(live):
+        return []
+
+    found = []  # (|gap|, team, my row, their row) arrays per team chunk, already cut to top_n
+    for team in teams:
+        theirs = SubsetSums(rosters[team], must_get, positions)
+        their_values, _, their_pos = theirs.packages(their_size, my_size)
+        for i, j in _band_pairs(my_values[live], their_values, tolerance):
+            i = live[i]
+            if positions:
+                ok = ((counts[owner] - my_pos[i] + their_pos[j]) >= need).all(axis=1)
+                ok &= ((counts[team] - their_pos[j] + my_pos[i]) >= need).all(axis=1)
+                i, j = i[ok], j[ok]
+            if not len(i):
+                continue
+            gaps = np.abs(their_values[j] - my_values[i]) / my_values[i]
+            if len(gaps) > top_n:
+                best = np.argpartition(gaps, top_n - 1)[:top_n]
+                i, j, gaps = i[best], j[best], gaps[best]
+            found.append((gaps, team, theirs, i, j))
+
+    ranked = sorted(
+        ((float(g), team, theirs, int(a), int(b)) for gaps, team, theirs, i, j in found for g, a, b in zip(gaps, i, j)),
+        key=lambda e: e[0]
+    )[:top_n]
+    _, my_members, _ = mine.packages(my_size, their_size)
+    rows = []
+    for _, team, theirs, a, b in ranked:
+        their_values, their_members, _ = theirs.packages(their_size, my_size)
+        sent, received = mine.players(my_members[a]), theirs.players(their_members[b])
+        sent_value, received_value = int(my_values[a]), int(their_values[b])
+        rows.append({
+            "Team_Owner": team,
+            "You Send": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in sent),
+            "You Get": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in received),
+            "Your Side Value": sent_value,
+            "Their Side Value": received_value,
+            "Gap %": round((received_value - sent_value) / sent_value * 100, 1) if sent_value else 0.0,
+        })
+    return rows
+
+
+def league_trade_for_offers(job):
+    """
+    Worker-pool entry point for one league of the cross-league search.
+
+    job: dict with league_name, league_id, roster (league records for every team),
+    my_owner, target_id, tolerance, qb_premium, max_size, minimums, blocked_ids, top_n.
+    Returns flat offer rows for the combined table.
+    """
+    roster = job["roster"]
+    target = next(p for p in roster if str(p["Sleeper_Player_ID"]) == str(job["target_id"]))
+    mine = [p for p in roster if p["Team_Owner"] == job["my_owner"]]
+    theirs = [p for p in roster if p["Team_Owner"] == target["Team_Owner"]]
+    my_players = with_effective_values(
+        movable_players(mine, job.get("blocked_ids", ())),
+        top_qb_names(roster), job["qb_premium"]
+    )
+    minimums = job.get("minimums") or {}
+    offers = trade_for_packages(
+        my_players, target, job["tolerance"], job.get("max_size", 3),
+        counts=position_counts(mine), minimums=minimums,
+        target_owner_counts=position_counts(theirs)
+    )
+    target_adjusted_value = target["KTC_Value"] + package_bonus([target["KTC_Value"]])
+    rows = []
+    for size, packages in offers.items():
+        ranked = sorted(packages, key=lambda combo: abs(sum(p["Value"] for p in combo) - target_adjusted_value))
+        for combo in ranked[:job.get("top_n", 5)]:
+            total = sum(p["Value"] for p in combo)
+            rows.append({
+                "League": job["league_name"],
+                "Owner": target["Team_Owner"],
+                "Offer": f"{size}-for-1",
+                "You Send": ", ".join(f"{p['Player_Sleeper']} ({p['KTC_Value']})" for p in combo),
+                "Total Value": total,
+                "Target Value": target_adjusted_value,
+                "Gap %": round((total - target_adjusted_value) / target_adjusted_value * 100, 1) if target_adjusted_value else 0.0,
+            })
+    return rows
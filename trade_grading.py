@@ -0,0 +1,150 @@
+# --------------------
+# Batch grading of a league's trade history
+#
+# Each side of a trade is valued like the live calculator does it: KTC value plus the
+# QB premium for top QBs, and the package bonus goes to whichever side of a roster's
+# trade has fewer pieces (the consolidation side). With a KTCHistory, assets are valued
+# as of the trade date instead of today.
+# --------------------
+import numpy as np
+import pandas as pd
+
+from trade_engine import package_bonus_array
+
+PICK_ROUND_NAMES = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th", 5: "5th"}
+
+
+def pick_asset_name(season, round_num):
+    """
+    Future draft picks in a trade -> the KTC name for a mid-round pick of that year.
+    """
+    return f"{season} Mid {PICK_ROUND_NAMES.get(int(round_num), f'{int(round_num)}th')}"
+
+
+def explode_trades(trades, player_pool):
+    """
+    One row per (trade, roster, asset, direction) for every player and pick in every trade.
+    direction is +1 for assets a roster received and -1 for assets it sent.
+    """
+    rows = []
+    for trade in trades:
+        trade_id = trade.get("transaction_id")
+        league_id = trade.get("league_id")
+        created = trade.get("status_updated") or trade.get("created") or 0
+        for pid, roster_id in (trade.get("adds") or {}).items():
+            rows.append((trade_id, league_id, created, roster_id, 1, pid))
+        for pid, roster_id in (trade.get("drops") or {}).items():
+            rows.append((trade_id, league_id, created, roster_id, -1, pid))
+        for pick in trade.get("draft_picks") or []:
+            name = pick_asset_name(pick.get("season"), pick.get("round", 1))
+            rows.append((trade_id, league_id, created, pick.get("owner_id"), 1, name))
+            rows.append((trade_id, league_id, created, pick.get("previous_owner_id"), -1, name))
+
+    assets = pd.DataFrame(rows, columns=["trade_id", "league_id", "created", "roster_id", "direction", "asset_id"])
+    pool_names = {pid: p.get("full_name") or pid for pid, p in player_pool.items()}
+    pool_positions = {pid: p.get("position", "") for pid, p in player_pool.items()}
+    assets["name"] = assets["asset_id"].map(pool_names).fillna(assets["asset_id"])
+    assets["position"] = assets["asset_id"].map(pool_positions).fillna("PICK")
+    return assets
+
+
+def grade_trades(trades, player_pool, ktc_df, roster_owners, qb_premium=750, history=None, top_qb_count=30, ktc_lookup=None):
+    """
+    Grades every trade in one vectorized pass.
+
+    roster_owners: {(league_id, roster_id): owner display name} for every linked season.
+    ktc_lookup: optional name_index.KTCLookup so assets resolve through the Sleeper id alias table.
+    Returns (per_trade_df, per_owner_df); "Net Value" is value received minus value sent.
+    per_trade_df.attrs["history_share"] is the fraction of assets valued as of their trade date
+    (the rest, e.g. picks and trades older than the history, use today's values).
+    """
+    assets = explode_trades(trades, player_pool)
+    if assets.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # --- asset values: as of the trade date if there is history, otherwise today's KTC
+    if ktc_lookup is not None:
+        ktc_names = [
+            ktc_lookup.ktc_name(asset_id, name) or name
+            for asset_id, name in zip(assets["asset_id"].tolist(), assets["name"].tolist())
+        ]
+        keys = pd.Series(ktc_names, index=assets.index).str.strip().str.lower()
+    else:
+        keys = assets["name"].str.strip().str.lower()
+    current = dict(zip(ktc_df["Player_Sleeper"].str.strip().str.lower(), ktc_df["KTC_Value"]))
+    values = keys.map(current).fillna(0).to_numpy().astype(np.int64)
+    history_share = 0.0
+    if history is not None and len(history):
+        dates = pd.to_datetime(assets["created"], unit="ms")
+        dated = history.values_at(keys.to_numpy(), dates.to_numpy(), fill_value=-1)
+        # No snapshot on or before the trade date (or a name history never saw): today's value
+        found = dated >= 0
+        values = np.where(found, dated, values)
+        history_share = float(found.mean())
+    assets["value"] = values
+
+    # Top QBs keyed like the assets: through the alias table when there is one
+    qb_names = (
+        (ktc_lookup.ktc_name(pid, p.get("full_name")) if ktc_lookup is not None else None) or str(p.get("full_name", ""))
+        for pid, p in player_pool.items() if p.get("position") == "QB"
+    )
+    qb_keys = {k for k in (name.strip().lower() for name in qb_names) if k in current}
+    top_qbs = set(sorted(qb_keys, key=lambda k: current[k], reverse=True)[:top_qb_count])
+    assets["qb_premium"] = np.where(keys.isin(top_qbs), qb_premium, 0)
+
+    # --- per roster side: totals and piece counts
+    sides = assets.groupby(["trade_id", "roster_id", "direction"]).agg(
+        raw=("value", "sum"), premium=("qb_premium", "sum"), pieces=("value", "size")
+    ).reset_index()
+    # Asset name lists in one pass (a Python join per group is the slow part of a groupby)
+    side_names = {}
+    asset_keys = zip(assets["trade_id"].tolist(), assets["roster_id"].tolist(), assets["direction"].tolist())
+    for key, name in zip(asset_keys, assets["name"].tolist()):
+        side_names.setdefault(key, []).append(name)
+    sides["names"] = [
+        ", ".join(side_names[key])
+        for key in zip(sides["trade_id"].tolist(), sides["roster_id"].tolist(), sides["direction"].tolist())
+    ]
+    received = sides[sides["direction"] == 1].drop(columns="direction").set_index(["trade_id", "roster_id"])
+    sent = sides[sides["direction"] == -1].drop(columns="direction").set_index(["trade_id", "roster_id"])
+    per_roster = received.join(sent, how="outer", lsuffix="_in", rsuffix="_out")
+    for col in ["raw_in", "premium_in", "pieces_in", "raw_out", "premium_out", "pieces_out"]:
+        per_roster[col] = per_roster[col].fillna(0).astype(np.int64)
+    per_roster[["names_in", "names_out"]] = per_roster[["names_in", "names_out"]].fillna("nothing")
+
+    pieces_in = per_roster["pieces_in"].to_numpy()
+    pieces_out = per_roster["pieces_out"].to_numpy()
+    bonus_in = np.where((pieces_in > 0) & (pieces_in < pieces_out),
+                        package_bonus_array(per_roster["raw_in"], np.maximum(pieces_in, 1)), 0)
+    bonus_out = np.where((pieces_out > 0) & (pieces_out < pieces_in),
+                         package_bonus_array(per_roster["raw_out"], np.maximum(pieces_out, 1)), 0)
+    per_roster["Value Received"] = per_roster["raw_in"] + per_roster["premium_in"] + bonus_in
+    per_roster["Value Sent"] = per_roster["raw_out"] + per_roster["premium_out"] + bonus_out
+    per_roster["Net Value"] = per_roster["Value Received"] - per_roster["Value Sent"]
+    per_roster = per_roster.reset_index()
+
+    # --- labels
+    meta = assets.drop_duplicates("trade_id").set_index("trade_id")[["league_id", "created"]]
+    per_roster = per_roster.join(meta, on="trade_id")
+    per_roster["Owner"] = [
+        roster_owners.get((lg, rid), f"Team {rid}")
+        for lg, rid in zip(per_roster["league_id"].tolist(), per_roster["roster_id"].tolist())
+    ]
+    per_roster["Season"] = per_roster["trade_id"].map({t.get("transaction_id"): t.get("season", "?") for t in trades})
+    per_roster["Week"] = per_roster["trade_id"].map({t.get("transaction_id"): t.get("week", "?") for t in trades})
+    per_roster["Date"] = pd.to_datetime(per_roster["created"], unit="ms").dt.date
+
+    per_trade = per_roster.rename(columns={"trade_id": "Trade ID", "names_in": "Received", "names_out": "Sent"})[
+        ["Trade ID", "Season", "Week", "Date", "Owner", "Received", "Sent", "Value Received", "Value Sent", "Net Value"]
+    ].sort_values(["Date", "Trade ID", "Net Value"], ascending=[False, True, False]).reset_index(drop=True)
+    per_trade.attrs["history_share"] = history_share
+
+    per_roster["Won"] = (per_roster["Net Value"] > 0).astype(int)
+    per_roster["Lost"] = (per_roster["Net Value"] < 0).astype(int)
+    per_owner = per_roster.groupby("Owner").agg(
+        Trades=("trade_id", "nunique"),
+        Won=("Won", "sum"),
+        Lost=("Lost", "sum"),
+        **{"Value Received": ("Value Received", "sum"), "Value Sent": ("Value Sent", "sum"), "Net Value": ("Net Value", "sum")}
+    ).sort_values("Net Value", ascending=False).reset_index()
+    return per_trade, per_owner
@@ -0,0 +1,488 @@
+# --------------------
+# Local trade-evaluation service (HTTP/JSON, no Streamlit)
+#
+# For bots and spreadsheets that want "is this trade fair in league X?" without a browser.
+# League rosters are loaded once and kept as snapshots. Evaluations are micro-batched and
+# valued in one vectorized pass. Suggestion searches are micro-batched per league and run in
+# a process pool, where each worker keeps its own band index for the league.
+#
+# Usage:
+#   python trade_service.py [--port 8765] [--workers 4] [--memory-budget-mb 512] [--cache sqlite:////shared/cache.sqlite]
+#
+#   POST /evaluate            {"league_id", "side_a": [ids or names], "side_b": [...], "qb_premium", "tolerance"}
+#                             or {"league_id", "trades": [{"side_a", "side_b"}, ...]}
+#   POST /suggest/trade_for   {"league_id", "owner", "target", "tolerance", "qb_premium", "max_size", "blocked"}
+#   POST /suggest/trade_away  {"league_id", "owner", "players": [...], "tolerance", "qb_premium", "max_size", "blocked"}
+#   GET  /health
+# --------------------
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from league_data import LeagueGraph, LeagueUnavailable, restore_league_snapshot, save_league_snapshot
+from memory_budget import DEFAULT_BUDGET_MB, MB, MemoryBudget, budget_mb_from_env
+from shared_cache import CACHE_URL_ENV, DEFAULT_CACHE_URL, configure, shared_cache
+from sleeper_client import CRAWL
+from suggestion_tables import (
+    DEFAULT_QB_PREMIUM, DEFAULT_TOLERANCE, SuggestionMemo, frame_fingerprint, search_query, trade_away_rows, trade_for_rows
+)
+from trade_engine import (
+    BandIndex, lineup_minimums, movable_players, package_bonus_array, position_counts, top_qb_names,
+    trade_away_packages, trade_for_packages, with_effective_values
+)
+
+DEFAULT_PORT = 8765
+SNAPSHOT_TTL = 300       # seconds a league snapshot is served before it is rebuilt
+BATCH_MAX = 64           # requests per micro-batch
+BATCH_WAIT = 0.002       # seconds a batch waits to fill up
+REQUEST_TIMEOUT = 60
+WORKER_INDEX_BUDGET_MB = 256  # band indexes each pool worker keeps
+SNAPSHOT_LOCK_STRIPES = 64    # leagues share this many build locks, so the set never grows
+
+
+class BadRequest(Exception):
+    pass
+
+
+# --------------------
+# League snapshots
+# --------------------
+class LeagueSnapshot:
+    """
+    One league's rosters at one point in time, with lookups for request player lists.
+    """
+
+    def __init__(self, league_id, records, minimums, ktc_df):
+        self.league_id = str(league_id)
+        self.records = records
+        self.minimums = minimums
+        self.hash = frame_fingerprint(pd.DataFrame(records)) if records else ""
+        self.top_qbs = top_qb_names(records)
+        self.built_at = time.monotonic()
+        self.by_id = {str(p["Sleeper_Player_ID"]): p for p in records}
+        self.by_name = {str(p["Player_Sleeper"]).strip().lower(): p for p in records}
+        # Assets nobody rosters (future picks, free agents) are valued straight from KTC
+        self.ktc_only = {
+            str(name).strip().lower(): {
+                "Player_Sleeper": name, "Position": "PICK" if str(name)[:4].isdigit() else "",
+                "KTC_Value": int(value), "Team_Owner": None
+            }
+            for name, value in zip(ktc_df["Player_Sleeper"].tolist(), ktc_df["KTC_Value"].tolist())
+        }
+
+    def resolve(self, assets):
+        """
+        Sleeper ids or names -> records; raises BadRequest listing anything unknown.
+        """
+        found, unknown = [], []
+        for asset in assets or []:
+            key = str(asset).strip()
+            record = self.by_id.get(key) or self.by_name.get(key.lower()) or self.ktc_only.get(key.lower())
+            if record is None:
+                unknown.append(key)
+            else:
+                found.append(record)
+        if unknown:
+            raise BadRequest(f"unknown players in league {self.league_id}: {', '.join(unknown)}")
+        return found
+
+    def resolve_rostered(self, assets):
+        """
+        resolve(), for searches: raises BadRequest for anything valued from KTC alone (a free
+        agent, a future pick), since the searches only move rostered assets.
+        """
+        found = self.resolve(assets)
+        loose = [str(p["Player_Sleeper"]) for p in found if "Sleeper_Player_ID" not in p]
+        if loose:
+            raise BadRequest(f"{', '.join(loose)} isn't on a roster in this league")
+        return found
+
+
+class SnapshotStore:
+    """
+    league_id -> LeagueSnapshot, rebuilt after SNAPSHOT_TTL; one build per league at a time.
+    Snapshots live in a memory budget, so leagues nobody has asked about lately are dropped.
+    Builds lock one of SNAPSHOT_LOCK_STRIPES locks picked by league id (two leagues sharing a
+    stripe just build one after the other), so nothing here grows with the leagues asked for.
+    """
+
+    def __init__(self, ktc_path="ktc_values.csv", ttl=SNAPSHOT_TTL, budget_mb=DEFAULT_BUDGET_MB):
+        self.ktc_path = ktc_path
+        self.ttl = ttl
+        self._ktc = None
+        self._ktc_mtime = None
+        self.memory = MemoryBudget(budget_mb * MB)
+        self._locks = [threading.Lock() for _ in range(SNAPSHOT_LOCK_STRIPES)]
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def ktc_df(self):
+        mtime = os.path.getmtime(self.ktc_path)
+        if self._ktc is None or mtime != self._ktc_mtime:
+            self._ktc = pd.read_csv(self.ktc_path, encoding="utf-8-sig")
+            self._ktc_mtime = mtime
+        return self._ktc
+
+    def get(self, league_id):
+        league_id = str(league_id)
+        with self._locks[hash(league_id) % SNAPSHOT_LOCK_STRIPES]:
+            snapshot = self.memory.get(("snapshot", league_id))
+            if snapshot is None or time.monotonic() - snapshot.built_at >= self.ttl:
+                ktc_df = self.ktc_df()
+                league = LeagueGraph(league_id, ktc_df, priority=CRAWL)
+                restored = restore_league_snapshot(league)
+                minimums = lineup_minimums(league.get("league_info").get("roster_positions", []))
+                records = league.get("frame").to_dict(orient="records")
+                save_league_snapshot(league, restored=restored)
+                snapshot = LeagueSnapshot(league_id, records, minimums, ktc_df)
+                self.memory.put(("snapshot", league_id), snapshot)
+                with self._lock:
+                    self.builds += 1
+            return snapshot
+
+    def stats(self):
+        with self._lock:
+            builds = self.builds
+        return {"snapshot_builds": builds, "memory": self.memory.stats()}
+
+
+# --------------------
+# Micro-batching
+# --------------------
+class MicroBatcher:
+    """
+    Collects submitted items for up to `wait` seconds (or `max_batch` items) and hands them
+    to handle_batch(items, futures) on one background thread. handle_batch must resolve
+    every future, now or later.
+    """
+
+    def __init__(self, handle_batch, max_batch=BATCH_MAX, wait=BATCH_WAIT):
+        self.handle_batch = handle_batch
+        self.max_batch = max_batch
+        self.wait = wait
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.wait
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(pending)
+            items, futures = [item for item, _ in pending], [future for _, future in pending]
+            try:
+                self.handle_batch(items, futures)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items, "queued": self._queue.qsize()}
+
+
+# --------------------
+# Evaluation: any N-for-M, valued like trade grading does it
+# --------------------
+def evaluate_batch(requests_):
+    """
+    requests_: [(snapshot, side_a records, side_b records, qb_premium, tolerance)] -> result dicts.
+
+    Each side is KTC plus the QB premium for top QBs; the package bonus goes to the side
+    with fewer pieces. Sides are valued for the whole batch in one numpy pass.
+    """
+    raw, premium, pieces = (np.zeros((len(requests_), 2), dtype=np.int64) for _ in range(3))
+    for i, (snapshot, side_a, side_b, qb_premium, _) in enumerate(requests_):
+        top = set(snapshot.top_qbs)
+        for j, side in enumerate((side_a, side_b)):
+            raw[i, j] = sum(p["KTC_Value"] for p in side)
+            premium[i, j] = sum(qb_premium for p in side if p["Position"] == "QB" and p["Player_Sleeper"] in top)
+            pieces[i, j] = len(side)
+
+    fewer = pieces < pieces[:, ::-1]
+    bonus = np.where(fewer & (pieces > 0), package_bonus_array(raw, np.maximum(pieces, 1)), 0)
+    value = raw + premium + bonus
+
+    results = []
+    for i, (_, side_a, side_b, _, tolerance) in enumerate(requests_):
+        a, b = int(value[i, 0]), int(value[i, 1])
+        gap = (b - a) / a * 100 if a else 0.0
+        results.append({
+            "side_a": {
+                "players": [p["Player_Sleeper"] for p in side_a],
+                "ktc": int(raw[i, 0]), "qb_premium": int(premium[i, 0]), "package_bonus": int(bonus[i, 0]), "value": a,
+            },
+            "side_b": {
+                "players": [p["Player_Sleeper"] for p in side_b],
+                "ktc": int(raw[i, 1]), "qb_premium": int(premium[i, 1]), "package_bonus": int(bonus[i, 1]), "value": b,
+            },
+            "gap_pct": round(gap, 1),
+            "fair": abs(gap) <= tolerance,
+            "favors": "even" if abs(gap) <= tolerance else ("a" if b > a else "b"),
+        })
+    return results
+
+
+def resolve_evaluations(items, futures):
+    results = evaluate_batch(items)
+    for future, result in zip(futures, results):
+        future.set_result(result)
+
+
+# --------------------
+# Suggestion search (process pool side)
+# --------------------
+_worker_indexes = MemoryBudget(WORKER_INDEX_BUDGET_MB * MB)  # (league_id, snapshot hash) -> BandIndex, per worker
+
+
+def run_search_batch(batch):
+    """
+    Worker-pool entry point: every queued search for one league snapshot.
+
+    batch: league_id, hash, records, top_qbs, minimums, queries ([{kind, ...}]).
+    Returns one {"tables": ...} or {"error": ...} per query.
+    """
+    key = ("band_index", batch["league_id"], batch["hash"])
+
+    def build():
+        index = BandIndex(batch["records"], batch["top_qbs"])
+        index.on_grow = lambda: _worker_indexes.resize(key)  # package groups fill in on first query
+        return index
+
+    index = _worker_indexes.get_or_build(key, build)
+    records, top_qbs = batch["records"], batch["top_qbs"]
+
+    results = []
+    for q in batch["queries"]:
+        minimums = batch["minimums"] if q.get("enforce_minimums", True) else {}
+        try:
+            mine = [p for p in records if p["Team_Owner"] == q["owner"]]
+            if not mine:
+                raise BadRequest(f"no team owned by {q['owner']}")
+            if q["kind"] == "trade_for":
+                target = next(p for p in records if str(p["Sleeper_Player_ID"]) == q["target_id"])
+                theirs = [p for p in records if p["Team_Owner"] == target["Team_Owner"]]
+                my_players = with_effective_values(movable_players(mine, q["blocked"]), top_qbs, q["qb_premium"])
+                tables = trade_for_rows(trade_for_packages(
+                    my_players, target, q["tolerance"], q["max_size"],
+                    counts=position_counts(mine), minimums=minimums, target_owner_counts=position_counts(theirs),
+                    index=index, qb_premium=q["qb_premium"]
+                ))
+            else:
+                selected = [p for p in mine if str(p["Sleeper_Player_ID"]) in q["player_ids"]]
+                tables = trade_away_rows(trade_away_packages(
+                    records, q["owner"], selected, top_qbs, q["tolerance"], q["qb_premium"], q["max_size"],
+                    minimums=minimums, blocked_ids=q["blocked"], index=index
+                ))
+            results.append({"tables": {str(size): rows for size, rows in tables.items()}})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+class SearchDispatcher:
+    """
+    Groups a micro-batch of searches by league snapshot and sends one pool job per league.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __call__(self, items, futures):
+        groups = {}
+        for (snapshot, query), future in zip(items, futures):
+            group = groups.setdefault((snapshot.league_id, snapshot.hash), (snapshot, [], []))
+            group[1].append(query)
+            group[2].append(future)
+        for snapshot, queries, group_futures in groups.values():
+            job = self.pool.submit(run_search_batch, {
+                "league_id": snapshot.league_id, "hash": snapshot.hash, "records": snapshot.records,
+                "top_qbs": snapshot.top_qbs, "minimums": snapshot.minimums, "queries": queries,
+            })
+            job.add_done_callback(lambda done, fs=group_futures: self._resolve(done, fs))
+
+    @staticmethod
+    def _resolve(done, futures):
+        try:
+            results = done.result()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if "error" in result:
+                future.set_exception(BadRequest(result["error"]))
+            else:
+                future.set_result(result)
+
+
+# --------------------
+# HTTP
+# --------------------
+class TradeService:
+    def __init__(self, ktc_path="ktc_values.csv", workers=None, memory_budget_mb=DEFAULT_BUDGET_MB):
+        self.snapshots = SnapshotStore(ktc_path, budget_mb=memory_budget_mb)
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.evaluations = MicroBatcher(resolve_evaluations)
+        self.searches = MicroBatcher(SearchDispatcher(self.pool))
+        self.memo = SuggestionMemo()
+        self.started = time.time()
+
+    def _settings(self, body):
+        return (
+            int(body.get("qb_premium", DEFAULT_QB_PREMIUM)),
+            float(body.get("tolerance", DEFAULT_TOLERANCE)),
+        )
+
+    def evaluate(self, body):
+        snapshot = self.snapshots.get(body["league_id"])
+        qb_premium, tolerance = self._settings(body)
+        trades = body.get("trades") or [body]
+        futures = [
+            self.evaluations.submit((
+                snapshot, snapshot.resolve(t.get("side_a")), snapshot.resolve(t.get("side_b")), qb_premium, tolerance
+            ))
+            for t in trades
+        ]
+        results = [future.result(REQUEST_TIMEOUT) for future in futures]
+        return {"results": results} if "trades" in body else results[0]
+
+    def suggest(self, kind, body):
+        snapshot = self.snapshots.get(body["league_id"])
+        qb_premium, tolerance = self._settings(body)
+        query = {
+            "kind": kind,
+            "owner": body["owner"],
+            "qb_premium": qb_premium,
+            "tolerance": tolerance,
+            "max_size": min(int(body.get("max_size", 3)), 3),
+            "blocked": {str(p["Sleeper_Player_ID"]) for p in snapshot.resolve_rostered(body.get("blocked"))},
+            "enforce_minimums": bool(body.get("enforce_minimums", True)),
+        }
+        if kind == "trade_for":
+            (target,) = snapshot.resolve_rostered([body["target"]])
+            query["target_id"] = str(target["Sleeper_Player_ID"])
+        else:
+            query["player_ids"] = {str(p["Sleeper_Player_ID"]) for p in snapshot.resolve_rostered(body.get("players"))}
+        memo_key = search_query(
+            kind, query["owner"], [query["target_id"]] if kind == "trade_for" else query["player_ids"],
+            tolerance, qb_premium, query["max_size"], query["blocked"],
+            minimums=snapshot.minimums if query["enforce_minimums"] else {}
+        )
+        return self.memo.get_or_search(
+            snapshot.league_id, snapshot.hash, memo_key,
+            lambda: self.searches.submit((snapshot, query)).result(REQUEST_TIMEOUT)
+        )
+
+    def health(self):
+        return {
+            "uptime_seconds": round(time.time() - self.started),
+            "snapshots": self.snapshots.stats(),
+            "evaluation_batches": self.evaluations.stats(),
+            "search_batches": self.searches.stats(),
+            "search_memo": self.memo.stats(),
+            "shared_cache": shared_cache().stats(),
+        }
+
+    def handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so clients can stream many requests
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def _reply(self, code, payload):
+                body = json.dumps(payload, default=int).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._reply(200, service.health())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                routes = {
+                    "/evaluate": service.evaluate,
+                    "/suggest/trade_for": lambda body: service.suggest("trade_for", body),
+                    "/suggest/trade_away": lambda body: service.suggest("trade_away", body),
+                }
+                if self.path not in routes:
+                    self._reply(404, {"error": "not found"})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                    self._reply(200, routes[self.path](body))
+                except (BadRequest, KeyError, ValueError, TypeError) as e:
+                    self._reply(400, {"error": str(e) if not isinstance(e, KeyError) else f"missing field {e}"})
+                except LeagueUnavailable as e:
+                    self._reply(404, {"error": str(e)})
+                except Exception as e:
+                    self._reply(500, {"error": str(e)})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON trade evaluation and suggestion service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ktc", default="ktc_values.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--memory-budget-mb", type=float, default=budget_mb_from_env(),
+                        help="cap on league snapshots kept in memory (least recently used are dropped)")
+    parser.add_argument("--cache", default=os.environ.get(CACHE_URL_ENV, DEFAULT_CACHE_URL),
+                        help="cache shared with other replicas on this host: sqlite:///path or memory://")
+    args = parser.parse_args()
+
+    configure(args.cache)
+
+    service = TradeService(args.ktc, args.workers, args.memory_budget_mb)
+    server = service.serve(args.host, args.port)
+    print(f"Trade service on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+# --------------------
+# Trade watcher: new trades in any of your leagues, re-valued, as a JSON-lines feed
+#
+# Runs on its own (no Streamlit). Only each league's current week is polled, each league on
+# its own schedule: a league that just traded is checked again within a minute, a quiet one
+# backs off to every half hour, and the whole watcher stays inside its share of Sleeper's
+# rate limit. Trades are de-duplicated by transaction_id (the feed itself is the record of
+# what was already announced, so restarts don't repeat anything).
+#
+# Feed lines: {"event": "trade", ...} per new trade, and one {"event": "baseline", ...} per
+# league when it is first watched, listing the trades that were already there.
+#
+# Usage:
+#   python trade_watch.py LEAGUE_ID [LEAGUE_ID ...] [--feed trades.jsonl]
+#   python trade_watch.py --user SLEEPER_USERNAME
+#   python trade_watch.py --user NAME --record replay/   # also save every response under replay/
+#   python trade_watch.py --user NAME --replay replay/   # watch a local copy served from replay/
+# --------------------
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from name_index import build_ktc_lookup
+from sleeper_client import BACKGROUND, scheduler, sleeper_get
+from sleeper_decode import compact_players
+from trade_grading import grade_trades
+
+SLEEPER_API = "https://api.sleeper.app/v1"
+DEFAULT_FEED_PATH = "trades.jsonl"
+
+MIN_INTERVAL = 60          # seconds between polls right after a league trades
+BASE_INTERVAL = 300        # first poll interval for every league
+MAX_INTERVAL = 1800        # quiet leagues back off to this
+BACKOFF = 1.5              # interval growth per poll with nothing new
+WATCH_CALLS_PER_MINUTE = 100   # the watcher's share of Sleeper's 1000 calls/minute
+RATE_LIMIT_RECOVERY = 300  # seconds without a 429 before a halved call budget grows back a step
+STATE_INTERVAL = 1800      # how often the current NFL week is re-checked
+PLAYERS_INTERVAL = 24 * 3600
+OWNERS_INTERVAL = 1800     # how long a league's roster owners are reused for new trades
+OWNER_CALLS = 2            # users + rosters per owner refresh
+
+
+def sleeper_fetch(url):
+    """
+    Default fetcher: parsed JSON through the shared request budget, or None on a bad response.
+    """
+    response = sleeper_get(url, BACKGROUND)
+    return response.json() if response.status_code == 200 else None
+
+
+# --------------------
+# Local replay of recorded API responses
+# --------------------
+def replay_path(directory, url):
+    """
+    Where a url's response lives in a replay directory: <dir>/<url path>.json
+    """
+    path = urlparse(url).path.strip("/")
+    return os.path.join(directory, *path.split("/")) + ".json"
+
+
+def recording_fetch(fetch, directory):
+    """
+    Wraps a fetcher so every answer is also saved under directory, ready for --replay.
+    """
+    def fetch_and_record(url):
+        data = fetch(url)
+        if data is not None:
+            path = replay_path(directory, url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        return data
+    return fetch_and_record
+
+
+class ReplayServer:
+    """
+    Serves a replay directory over HTTP on localhost, laid out like the Sleeper API.
+
+    Files are read on every request, so a test can drop in a new transactions file
+    between polls and the watcher sees a new trade.
+    """
+
+    def __init__(self, directory, port=0):
+        root = directory
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = replay_path(root, self.path)
+                if not os.path.exists(path):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                with open(path, "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --------------------
+# Watcher
+# --------------------
+class LeagueWatch:
+    def __init__(self, league_id, now):
+        self.league_id = str(league_id)
+        self.name = self.league_id
+        self.season = "?"
+        self.interval = BASE_INTERVAL
+        self.next_poll = now
+        self.last_week = None
+        self.polls = 0
+        self.trades = 0
+
+
+def read_feed(path):
+    """
+    (transaction ids already announced, league ids that have events) from an existing feed.
+    """
+    seen, leagues = set(), set()
+    if not os.path.exists(path):
+        return seen, leagues
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # half-written last line from a crash
+            seen.update(event.get("transaction_ids") or [event.get("transaction_id")])
+            leagues.add(str(event.get("league_id")))
+    return seen, leagues
+
+
+class TradeWatcher:
+    """
+    Polls the current week's transactions of every league on an adaptive schedule and
+    appends one JSON line per new completed trade to the feed.
+
+    fetch(url) -> parsed JSON or None, clock() -> seconds; both replaceable for tests.
+    """
+
+    def __init__(self, league_ids, ktc_df, feed_path=DEFAULT_FEED_PATH, api_base=SLEEPER_API, fetch=sleeper_fetch,
+                 clock=time.time, qb_premium=750, calls_per_minute=WATCH_CALLS_PER_MINUTE):
+        self.api_base = api_base
+        self.fetch = fetch
+        self.clock = clock
+        self.ktc_df = ktc_df
+        self.qb_premium = qb_premium
+        self.max_calls_per_minute = calls_per_minute
+        self.calls_per_minute = calls_per_minute
+        self.feed_path = feed_path
+        self.seen, self._announced_leagues = read_feed(feed_path)
+        now = clock()
+        self.leagues = {str(lid): LeagueWatch(lid, now) for lid in league_ids}
+        self._week = None
+        self._week_checked = None
+        self._player_pool = None
+        self._players_checked = None
+        self._ktc_lookup = None
+        self._owners = {}  # league_id -> (checked at, {(league_id, roster_id): owner name})
+        self._rate_limited = scheduler.rate_limited
+        self._budget_changed = now
+
+    def _get(self, path):
+        return self.fetch(f"{self.api_base}{path}")
+
+    # --- shared inputs, refreshed on their own slow clocks
+    def current_week(self):
+        now = self.clock()
+        if self._week is None or now - self._week_checked >= STATE_INTERVAL:
+            state = self._get("/state/nfl") or {}
+            self._week = max(int(state.get("week") or state.get("leg") or 1), 1)
+            self._week_checked = now
+        return self._week
+
+    def player_pool(self):
+        now = self.clock()
+        if self._player_pool is None or now - self._players_checked >= PLAYERS_INTERVAL:
+            # Only full_name / position / team are kept between refreshes
+            self._player_pool = compact_players(self._get("/players/nfl")) or self._player_pool or {}
+            self._players_checked = now
+            self._ktc_lookup = build_ktc_lookup(self._player_pool, self.ktc_df) if self._player_pool else None
+        return self._player_pool
+
+    def budget_floor(self):
+        """
+        Shortest interval every league can have without going over the watcher's call budget
+        (one call per poll, after setting aside what owner refreshes can use). Each new 429
+        halves the budget; every RATE_LIMIT_RECOVERY seconds without one gives back a quarter
+        of the configured budget, until it is whole again.
+        """
+        now = self.clock()
+        if scheduler.rate_limited > self._rate_limited:
+            self._rate_limited = scheduler.rate_limited
+            self.calls_per_minute = max(self.calls_per_minute // 2, 1)
+            self._budget_changed = now
+        elif self.calls_per_minute < self.max_calls_per_minute and now - self._budget_changed >= RATE_LIMIT_RECOVERY:
+            step = max(self.max_calls_per_minute // 4, 1)
+            self.calls_per_minute = min(self.calls_per_minute + step, self.max_calls_per_minute)
+            self._budget_changed = now
+        owner_calls_per_minute = len(self.leagues) * OWNER_CALLS * 60 / OWNERS_INTERVAL
+        floor = len(self.leagues) * 60 / max(self.calls_per_minute - owner_calls_per_minute, 1)
+        return max(floor, MIN_INTERVAL)
+
+    # --- one league
+    def roster_owners(self, league_id):
+        """
+        {(league_id, roster_id): owner name}, fetched at most once per OWNERS_INTERVAL per league
+        (so a busy week costs one refresh, not two calls per trade).
+        """
+        now = self.clock()
+        cached = self._owners.get(league_id)
+        if cached is not None and now - cached[0] < OWNERS_INTERVAL:
+            return cached[1]
+        users = self._get(f"/league/{league_id}/users") or []
+        rosters = self._get(f"/league/{league_id}/rosters") or []
+        names = {user["user_id"]: user["display_name"] for user in users}
+        owners = {
+            (league_id, r["roster_id"]): names.get(r.get("owner_id"), f"Team {r['roster_id']}")
+            for r in rosters
+        }
+        if rosters:
+            self._owners[league_id] = (now, owners)
+        return owners
+
+    def trade_event(self, watch, trade):
+        per_trade, _ = grade_trades(
+            [trade], self.player_pool(), self.ktc_df, self.roster_owners(watch.league_id),
+            qb_premium=self.qb_premium, ktc_lookup=self._ktc_lookup
+        )
+        sides = [
+            {
+                "owner": row["Owner"],
+                "received": row["Received"],
+                "sent": row["Sent"],
+                "value_received": int(row["Value Received"]),
+                "value_sent": int(row["Value Sent"]),
+                "net_value": int(row["Net Value"]),
+            }
+            for row in per_trade.to_dict(orient="records")
+        ]
+        return {
+            "event": "trade",
+            "transaction_id": trade.get("transaction_id"),
+            "league_id": watch.league_id,
+            "league_name": watch.name,
+            "season": watch.season,
+            "week": trade.get("week"),
+            "status_updated": trade.get("status_updated"),
+            "seen_at": int(self.clock() * 1000),
+            "sides": sides,
+        }
+
+    def poll(self, watch):
+        """
+        Checks one league's current week (and the week before, right after a rollover).
+        Returns the new feed events; their trades only count as seen once write() has them.
+        """
+        if watch.polls == 0:
+            info = self._get(f"/league/{watch.league_id}") or {}
+            watch.name = info.get("name", watch.league_id)
+            watch.season = info.get("season", "?")
+        week = self.current_week()
+        weeks = [week] if watch.last_week in (None, week) else [watch.last_week, week]
+        # Until its baseline is in the feed (a failed write means the next poll tries again)
+        first_poll = watch.league_id not in self._announced_leagues
+
+        events = []
+        baseline = []
+        found = set()
+        for wk in weeks:
+            for trade in self._get(f"/league/{watch.league_id}/transactions/{wk}") or []:
+                trade_id = trade.get("transaction_id")
+                if trade.get("type") != "trade" or trade.get("status") != "complete" or trade_id in self.seen | found:
+                    continue
+                found.add(trade_id)
+                if first_poll:
+                    baseline.append(trade_id)  # already there when we started watching this league
+                    continue
+                trade.setdefault("league_id", watch.league_id)
+                trade.setdefault("season", watch.season)
+                trade.setdefault("week", wk)
+                events.append(self.trade_event(watch, trade))
+
+        if first_poll:
+            events.append({
+                "event": "baseline",
+                "league_id": watch.league_id,
+                "league_name": watch.name,
+                "week": week,
+                "seen_at": int(self.clock() * 1000),
+                "transaction_ids": baseline,
+            })
+
+        watch.last_week = week
+        watch.polls += 1
+        traded = any(event["event"] == "trade" for event in events)
+        watch.trades += sum(event["event"] == "trade" for event in events)
+        watch.interval = MIN_INTERVAL if traded else min(watch.interval * BACKOFF, MAX_INTERVAL)
+        watch.interval = max(watch.interval, self.budget_floor())
+        watch.next_poll = self.clock() + watch.interval
+        return events
+
+    def write(self, events):
+        """
+        Appends events to the feed, then marks their trades (and leagues) as announced, the
+        same way read_feed() does on a restart. A poll or write that fails leaves its trades
+        unseen, so the next poll announces them.
+        """
+        if not events:
+            return
+        with open(self.feed_path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+        for event in events:
+            self.seen.update(event.get("transaction_ids") or [event.get("transaction_id")])
+            self._announced_leagues.add(str(event.get("league_id")))
+
+    def run_once(self):
+        """
+        Polls every league that is due. Returns the events written.
+        """
+        now = self.clock()
+        events = []
+        for watch in sorted(self.leagues.values(), key=lambda w: w.next_poll):
+            if watch.next_poll > now:
+                break
+            try:
+                new = self.poll(watch)
+            except Exception as e:
+                print(f"League {watch.league_id}: poll failed ({e})")
+                watch.next_poll = now + watch.interval
+                continue
+            self.write(new)
+            events.extend(new)
+        return events
+
+    def seconds_until_due(self):
+        return max(min(w.next_poll for w in self.leagues.values()) - self.clock(), 0)
+
+    def run(self, sleep=time.sleep):
+        while True:
+            for event in self.run_once():
+                if event["event"] != "trade":
+                    continue
+                print(f"{event['league_name']}: trade {event['transaction_id']} ("
+                      + "; ".join(f"{s['owner']} {s['net_value']:+d}" for s in event["sides"]) + ")")
+            sleep(self.seconds_until_due())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch Sleeper leagues for new trades and write a JSON-lines feed.")
+    parser.add_argument("league_ids", nargs="*")
+    parser.add_argument("--user", help="also watch every 2025 league this Sleeper user is in")
+    parser.add_argument("--feed", default=DEFAULT_FEED_PATH)
+    parser.add_argument("--ktc", default="ktc_values.csv")
+    parser.add_argument("--qb-premium", type=int, default=750)
+    parser.add_argument("--record", metavar="DIR", help="save every API response under DIR")
+    parser.add_argument("--replay", metavar="DIR", help="serve DIR as the API instead of calling Sleeper")
+    args = parser.parse_args()
+
+    replay = ReplayServer(args.replay) if args.replay else None
+    api_base = replay.api_base if replay else SLEEPER_API
+    fetch = sleeper_fetch
+    if args.record:
+        fetch = recording_fetch(fetch, args.record)
+
+    league_ids = list(args.league_ids)
+    if replay:
+        replay.__enter__()
+    try:
+        if args.user:
+            user = fetch(f"{api_base}/user/{args.user}") or {}
+            leagues = fetch(f"{api_base}/user/{user.get('user_id')}/leagues/nfl/2025") or []
+            league_ids += [lg["league_id"] for lg in leagues if lg["league_id"] not in league_ids]
+        if not league_ids:
+            parser.error("give at least one league id or --user")
+
+        ktc_df = pd.read_csv(args.ktc, encoding="utf-8-sig")
+        watcher = TradeWatcher(league_ids, ktc_df, args.feed, api_base, fetch, qb_premium=args.qb_premium)
+        print(f"Watching {len(league_ids)} leagues; feed: {args.feed}")
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if replay:
+            replay.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()